@@ -0,0 +1,115 @@
+# anggaran_token.py
+# File ini berisi estimasi token, konteks per model, dan penanganan kode yang terlalu panjang.
+
+import json
+import os
+from typing import List, Optional
+
+# Panjang konteks (token) tiap model di Groq
+KONTEKS_MODEL = {
+    "openai/gpt-oss-120b": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "llama-3.2-90b-text-preview": 8192,
+    "llama-3.1-70b-versatile": 131072,
+    "mixtral-8x7b-32768": 32768,
+    "gemma2-9b-it": 8192,
+    "gemma-7b-it": 8192,
+}
+KONTEKS_DEFAULT = 8192
+# Token output untuk satu hasil penilaian (max_tokens pada request)
+MAX_TOKENS_OUTPUT = 1024
+# Cadangan untuk header pesan, nama file, dan ketidakakuratan estimasi
+MARGIN_TOKEN = 256
+
+
+def estimasi_token(text: str) -> int:
+    """
+    Memperkirakan jumlah token dari sebuah teks tanpa tokenizer asli model.
+    Rata-rata tokenizer LLM modern menghasilkan ~1 token per 4 karakter untuk kode/teks campuran.
+    """
+    if not text:
+        return 0
+    return len(text) // 4 + 1
+
+def konteks_model(model: str) -> int:
+    """Panjang konteks model; model yang tidak dikenal dianggap memiliki konteks kecil."""
+    return KONTEKS_MODEL.get(model, KONTEKS_DEFAULT)
+
+def anggaran_kode(model: str, system_prompt: str, max_tokens_output: int = MAX_TOKENS_OUTPUT) -> int:
+    """Sisa token untuk kode setelah dikurangi system prompt, output, dan margin."""
+    sisa = konteks_model(model) - estimasi_token(system_prompt) - max_tokens_output - MARGIN_TOKEN
+    return max(MARGIN_TOKEN, sisa)
+
+def kode_dari_notebook(isi: str) -> Optional[str]:
+    """Mengambil isi cell kode dari notebook Jupyter (.ipynb). None jika bukan JSON notebook."""
+    try:
+        notebook = json.loads(isi)
+    except ValueError:
+        return None
+    if not isinstance(notebook, dict) or not isinstance(notebook.get("cells"), list):
+        return None
+    potongan = []
+    for nomor, cell in enumerate(notebook["cells"], 1):
+        if not isinstance(cell, dict) or cell.get("cell_type") != "code":
+            continue
+        sumber = cell.get("source", "")
+        if isinstance(sumber, list):
+            sumber = "".join(sumber)
+        if sumber.strip():
+            potongan.append(f"# In[{nomor}]:\n{sumber.rstrip()}")
+    return "\n\n".join(potongan)
+
+def minifikasi_kode(kode: str, nama_file: str = "") -> str:
+    """
+    Mengecilkan payload tanpa mengubah makna kode: notebook diringkas menjadi cell kode saja
+    (tanpa output/gambar base64), spasi di akhir baris dan baris kosong dibuang.
+    """
+    if os.path.splitext(nama_file)[1].lower() == ".ipynb":
+        isi_notebook = kode_dari_notebook(kode)
+        if isi_notebook is not None:
+            kode = isi_notebook
+    baris = kode.replace('\r\n', '\n').split('\n')
+    return '\n'.join(b.rstrip() for b in baris if b.strip())
+
+def potong_kode(kode: str, batas_token: int) -> str:
+    """
+    Memotong kode agar muat dalam `batas_token`: sekitar 70% awal dan 30% akhir dipertahankan,
+    bagian tengah diganti penanda jumlah baris yang dipotong.
+    """
+    if estimasi_token(kode) <= batas_token:
+        return kode
+    batas_karakter = max(0, batas_token * 4 - 200)
+    baris = kode.split('\n')
+    awal, akhir = [], []
+    kuota_awal = int(batas_karakter * 0.7)
+    kuota_akhir = batas_karakter - kuota_awal
+    for b in baris:
+        if kuota_awal - len(b) - 1 < 0:
+            break
+        awal.append(b)
+        kuota_awal -= len(b) + 1
+    for b in reversed(baris[len(awal):]):
+        if kuota_akhir - len(b) - 1 < 0:
+            break
+        akhir.append(b)
+        kuota_akhir -= len(b) + 1
+    akhir.reverse()
+    dipotong = len(baris) - len(awal) - len(akhir)
+    penanda = f"# ... [{dipotong} baris dipotong karena file terlalu panjang] ..."
+    return '\n'.join(awal + [penanda] + akhir)
+
+def pecah_kode(kode: str, batas_token: int) -> List[str]:
+    """Memecah kode per baris menjadi beberapa potongan yang masing-masing muat dalam `batas_token`."""
+    batas_karakter = max(1, batas_token * 4)
+    potongan, sekarang, panjang = [], [], 0
+    for b in kode.split('\n'):
+        # Baris tunggal yang sangat panjang (mis. data minified) dipotong paksa
+        b = b[:batas_karakter]
+        if sekarang and panjang + len(b) + 1 > batas_karakter:
+            potongan.append('\n'.join(sekarang))
+            sekarang, panjang = [], 0
+        sekarang.append(b)
+        panjang += len(b) + 1
+    if sekarang:
+        potongan.append('\n'.join(sekarang))
+    return potongan
@@ -1,18 +1,22 @@
 # app.py
 # File ini adalah antarmuka pengguna (UI) menggunakan Streamlit.
 
-import io
-import os
+import functools
+import time
 from pathlib import Path
 
-import pandas as pd
 import streamlit as st
 from dotenv import load_dotenv
-# --- PERUBAHAN UTAMA: IMPORT GROQ ---
-from groq import Groq
 
 # Import fungsi-fungsi dari file 'otak'
-from penilai_otomatis import (baca_soal_pdf, proses_file_zip_realtime)
+from cache_penilaian import CachePenilaian
+from ekspor_hasil import FORMAT_EKSPOR, ekspor_bytes, parquet_tersedia
+from klien_groq import KumpulanKlien, dapatkan_kumpulan_klien, kunci_dari_env, panaskan_koneksi
+from manajer_job import ManajerJob
+from metrik_penilaian import KOLOM_METRIK
+from penilai_otomatis import BATAS_KEYAKINAN, RENTANG_NILAI_RAGU, baca_soal_pdf
+from riwayat_penilaian import RiwayatPenilaian
+from saringan_awal import MODE_SARINGAN
 
 # Load environment variables dari file .env
 load_dotenv()
@@ -25,8 +29,9 @@ st.set_page_config(
 )
 
 # --- Cek API Key dari Environment ---
-api_key = os.getenv('GROQ_API_KEY')
-if not api_key:
+# GROQ_API_KEYS (beberapa key dipisah koma) atau GROQ_API_KEY
+daftar_kunci = kunci_dari_env()
+if not daftar_kunci:
     st.error("❌ **API Key tidak ditemukan!**")
     st.info("""
     ### Setup API Key:
@@ -35,6 +40,7 @@ if not api_key:
     ```
     GROQ_API_KEY=your_groq_api_key_here
     ```
+    Untuk beberapa key sekaligus: `GROQ_API_KEYS=key1,key2`
     3. Dapatkan API key di [Groq Console](https://console.groq.com/keys)
     4. Restart aplikasi setelah menambahkan API key
     """)
@@ -43,6 +49,135 @@ if not api_key:
 # --- Temperature Static ---
 TEMPERATURE = 0.1  # Temperature rendah untuk konsistensi penilaian
 
+# --- Throttle render tabel ---
+INTERVAL_REFRESH_TABEL = 0.5  # detik antar polling status job
+MAX_PARSIAL_DITAMPILKAN = 8  # jumlah file yang feedback sementaranya ditampilkan
+
+
+def color_nilai(val):
+    """Warna sel kolom nilai sesuai rentang grade."""
+    if isinstance(val, (int, float)):
+        if val >= 85:
+            return 'background-color: #d4edda; color: #155724; font-weight: bold'
+        elif val >= 70:
+            return 'background-color: #fff3cd; color: #856404'
+        elif val >= 50:
+            return 'background-color: #f8d7da; color: #721c24'
+        else:
+            return 'background-color: #f5c6cb; color: #721c24; font-weight: bold'
+    return ''
+
+
+def style_dataframe(df):
+    """Styling untuk tabel hasil (pandas lama hanya punya Styler.applymap)."""
+    styler = df.style
+    map_sel = getattr(styler, 'map', None) or styler.applymap
+    return map_sel(color_nilai, subset=['nilai'])
+
+def tabel_hasil(hasil_list):
+    """Tabel hasil tanpa kolom metrik. pandas baru di-import saat tabel pertama kali ditampilkan."""
+    import pandas as pd
+    return style_dataframe(pd.DataFrame(hasil_list).drop(columns=list(KOLOM_METRIK), errors='ignore'))
+
+
+def tabel_berjalan(job_id, total):
+    """
+    Tabel hasil job yang sedang berjalan, dialokasikan sekali (satu baris per index file) dan disimpan
+    di session_state. Setiap tick hanya hasil baru yang ditulis (lihat isi_tabel_berjalan).
+    """
+    import numpy as np
+    import pandas as pd
+    tabel = st.session_state.get('tabel_berjalan')
+    if tabel is None or tabel['job'] != job_id:
+        tabel = {
+            'job': job_id,
+            'df': pd.DataFrame(index=pd.RangeIndex(total), dtype=object),
+            'terisi': np.zeros(total, dtype=bool),
+            'jumlah': 0,  # jumlah hasil yang sudah ditulis (argumen hasil_sejak untuk Job.snapshot)
+        }
+        st.session_state['tabel_berjalan'] = tabel
+    return tabel
+
+
+def isi_tabel_berjalan(tabel, hasil_baru):
+    """Menulis pasangan (index, hasil) baru ke baris index-nya; kolom baru ditambahkan bila perlu."""
+    import numpy as np
+    import pandas as pd
+    for index, hasil in hasil_baru:
+        df = tabel['df']
+        if index >= len(df):
+            ukuran = max(index + 1, 2 * len(df))
+            tabel['df'] = df = df.reindex(pd.RangeIndex(ukuran))
+            tabel['terisi'] = np.concatenate([tabel['terisi'], np.zeros(ukuran - len(tabel['terisi']), dtype=bool)])
+        kolom = [k for k in hasil if k not in KOLOM_METRIK]
+        for k in kolom:
+            if k not in df.columns:
+                df[k] = pd.Series(None, index=df.index, dtype=object)
+        df.loc[index, kolom] = [hasil[k] for k in kolom]
+        tabel['terisi'][index] = True
+    tabel['jumlah'] += len(hasil_baru)
+
+
+def tampilkan_metrik(slot, metrik):
+    """Ringkasan metrik run (waktu per tahap, retry, token) untuk sidebar."""
+    slot.markdown(
+        f"📁 **{metrik['jumlah_file']}** file ({metrik['file_per_detik']:.2f} file/detik)  \n"
+        f"📖 Baca ZIP: {metrik['waktu_baca']['total']:.2f} s total, p95 {metrik['waktu_baca']['p95'] * 1000:.1f} ms  \n"
+        f"📡 API: {metrik['latensi_api']['total']:.1f} s total, p50 {metrik['latensi_api']['p50']:.2f} s, "
+        f"p95 {metrik['latensi_api']['p95']:.2f} s  \n"
+        f"🧩 Parse: {metrik['waktu_parse']['total']:.3f} s total, p95 {metrik['waktu_parse']['p95'] * 1000:.1f} ms  \n"
+        f"🔁 Retry: **{metrik['jumlah_retry']}**  \n"
+        f"🔤 Token: {metrik['token_prompt']:,} prompt / {metrik['token_completion']:,} completion "
+        f"({metrik['token_per_detik']:,.0f} token/detik)"
+        + (
+            f"  \n🪜 Eskalasi: **{metrik['jumlah_eskalasi']}** / {metrik['jumlah_kaskade']} file "
+            f"({metrik['fraksi_eskalasi']:.0%}) ke model besar"
+            if metrik.get('jumlah_kaskade') else ""
+        )
+    )
+
+def tampilkan_parsial(slot, daftar_parsial):
+    """Menampilkan feedback sementara file yang sedang dinilai (mode streaming)."""
+    if not daftar_parsial:
+        slot.empty()
+        return
+    baris = []
+    for data in daftar_parsial[:MAX_PARSIAL_DITAMPILKAN]:
+        nilai = data.get('nilai')
+        teks_nilai = f" · nilai sementara **{nilai}**" if isinstance(nilai, (int, float)) else ""
+        feedback = str(data.get('feedback') or data.get('kesalahan') or "")
+        baris.append(f"✍️ `{data.get('nama_file', '')}`{teks_nilai}  \n{feedback}▌")
+    slot.info("\n\n".join(baris))
+
+
+@st.cache_resource
+def dapatkan_cache() -> CachePenilaian:
+    """Cache hasil penilaian di disk, dibagi ke semua sesi dalam satu proses."""
+    return CachePenilaian()
+
+
+@st.cache_resource
+def dapatkan_riwayat() -> RiwayatPenilaian:
+    """Riwayat semua hasil penilaian di disk, dibagi ke semua sesi (dibaca halaman Riwayat Penilaian)."""
+    return RiwayatPenilaian()
+
+
+@st.cache_resource
+def dapatkan_manajer_job() -> ManajerJob:
+    """Manajer job latar belakang, dibagi ke semua sesi agar konkurensi dan kuota API dipakai bersama."""
+    # Client dan connection pool-nya dipakai bersama; koneksi dibuka sebelum request pertama.
+    # Beberapa key menjadi satu KumpulanKlien dengan pembagian beban dan failover
+    klien = dapatkan_kumpulan_klien(daftar_kunci)
+    panaskan_koneksi(klien)
+    return ManajerJob(klien, cache=dapatkan_cache(), riwayat=dapatkan_riwayat())
+
+
+def pilih_job(job_id: str) -> None:
+    """Menyambungkan sesi ke job; ID juga disimpan di URL agar tetap tersambung setelah refresh."""
+    st.session_state['job_id'] = job_id
+    st.query_params['job'] = job_id
+
+
 # --- UI Sidebar untuk Model Selection ---
 st.sidebar.header("⚙️ Konfigurasi Model")
 
@@ -79,11 +214,175 @@ model_info = {
 if selected_model in model_info:
     st.sidebar.info(model_info[selected_model])
 
+# Mode kaskade: model kecil menilai dulu, model terpilih hanya untuk hasil yang meragukan
+mode_kaskade = st.sidebar.checkbox(
+    "Mode kaskade (model kecil dulu)",
+    value=False,
+    help="Semua file dinilai dulu oleh model kecil yang cepat. Hanya file yang outputnya gagal, "
+         "nilainya di rentang ragu, atau keyakinannya rendah yang dinilai ulang oleh model di atas."
+)
+model_kecil = selected_model
+rentang_nilai_ragu = RENTANG_NILAI_RAGU
+batas_keyakinan = BATAS_KEYAKINAN
+if mode_kaskade:
+    model_kecil = st.sidebar.selectbox(
+        "Model kecil (penilai pertama):",
+        available_models,
+        index=available_models.index("gemma2-9b-it")
+    )
+    rentang_nilai_ragu = st.sidebar.slider(
+        "Rentang nilai yang dieskalasi:", min_value=0, max_value=100, value=RENTANG_NILAI_RAGU,
+        help="Nilai model kecil di dalam rentang ini dianggap di perbatasan dan dinilai ulang."
+    )
+    batas_keyakinan = st.sidebar.slider(
+        "Batas keyakinan model kecil:", min_value=0, max_value=100, value=BATAS_KEYAKINAN,
+        help="Hasil dengan keyakinan (dilaporkan model) di bawah batas ini dinilai ulang."
+    )
+
+# Jumlah file yang dinilai bersamaan (sebagian besar waktu habis menunggu respons API)
+max_workers = st.sidebar.slider(
+    "Jumlah Penilaian Paralel:",
+    min_value=1,
+    max_value=16,
+    value=4,
+    help="Berapa file dari satu job yang dikirim ke API secara bersamaan. Semua job berbagi batas "
+         "konkurensi global. Turunkan jika sering terkena rate limit."
+)
+
+# Cache hasil: file yang sudah pernah dinilai dengan soal/kriteria/model yang sama tidak dikirim ulang
+gunakan_cache = st.sidebar.checkbox(
+    "Gunakan cache hasil penilaian",
+    value=True,
+    help="Matikan untuk memaksa semua file dinilai ulang oleh AI."
+)
+cache = dapatkan_cache()
+manajer = dapatkan_manajer_job()
+
+# Per mahasiswa: beberapa file milik satu mahasiswa dinilai bersama dalam satu request
+per_mahasiswa = st.sidebar.checkbox(
+    "Kelompokkan file per mahasiswa",
+    value=False,
+    help="Untuk ZIP berisi folder per mahasiswa (nim/main.py, nim/utils.py, ...) atau ZIP per mahasiswa "
+         "(nim.zip). Semua file satu mahasiswa dinilai sebagai satu program dalam satu request, "
+         "dan hasilnya satu baris per mahasiswa."
+)
+
+# Deteksi duplikat: file identik dinilai sekali, file yang sangat mirip ditandai
+deteksi_duplikat = st.sidebar.checkbox(
+    "Deteksi submission duplikat",
+    value=True,
+    help="File yang identik (abaikan spasi & komentar) hanya dinilai sekali. File yang sangat mirip "
+         "(mis. hanya ganti nama variabel) ditandai di kolom 'duplikat'."
+)
+
+# Mode batch: beberapa file kecil dikirim dalam satu request agar soal tidak dikirim berulang kali
+mode_batch = st.sidebar.checkbox(
+    "Gabungkan file kecil dalam satu request (batch)",
+    value=False,
+    help="Hemat token input & jumlah request untuk soal panjang dengan jawaban pendek. "
+         "Jika hasil batch tidak valid, file dinilai ulang satu per satu."
+)
+token_per_batch = 0
+if mode_batch:
+    token_per_batch = st.sidebar.number_input(
+        "Anggaran token kode per batch:",
+        min_value=500,
+        max_value=20000,
+        value=3000,
+        step=500,
+        help="Total perkiraan token kode dalam satu request batch (maksimal 10 file per batch)."
+    )
+
+# Streaming: feedback sementara muncul selama model masih menulis
+streaming = st.sidebar.checkbox(
+    "Tampilkan feedback sementara (streaming)",
+    value=True,
+    help="Feedback muncul kata demi kata selama AI menulis, dan request dihentikan begitu JSON "
+         "penilaiannya lengkap. Tidak berlaku untuk file yang dinilai dalam batch."
+)
+
+# Penanganan file besar
+minifikasi = st.sidebar.checkbox(
+    "Minifikasi kode sebelum dikirim",
+    value=False,
+    help="Buang baris kosong & spasi di akhir baris; notebook (.ipynb) diringkas menjadi cell kode saja."
+)
+strategi_file_besar = st.sidebar.selectbox(
+    "File melebihi konteks model:",
+    ["potong", "ringkas"],
+    format_func=lambda x: {
+        "potong": "✂️ Potong bagian tengah",
+        "ringkas": "📝 Ringkas per bagian, lalu nilai"
+    }[x],
+    help="'Ringkas' lebih akurat untuk file sangat panjang tetapi memakai beberapa request tambahan."
+)
+
+# Saringan awal: cek lokal (sintaks, file kosong, bahasa) sebelum file dikirim ke AI
+saringan_awal = st.sidebar.selectbox(
+    "Saringan awal (lokal):",
+    list(MODE_SARINGAN),
+    index=MODE_SARINGAN.index("diagnostik"),
+    format_func=lambda x: {
+        "nonaktif": "⏭️ Nonaktif",
+        "diagnostik": "🩺 Sertakan hasil cek sintaks di prompt",
+        "otomatis": "⚡ Nilai 0 otomatis untuk file yang jelas gagal"
+    }[x],
+    help="'Otomatis' langsung memberi nilai 0 (tanpa API) untuk file kosong, hanya template/komentar, "
+         "tidak bisa dikompilasi, atau isinya bukan bahasa sesuai ekstensinya. Kategorinya tercatat "
+         "di kolom 'saringan'."
+)
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📊 Status Sistem")
-st.sidebar.success("✅ API Key terdeteksi")
-st.sidebar.caption(f"🤖 Model: **{selected_model.split('/')[-1]}**")
+st.sidebar.success(
+    "✅ API Key terdeteksi" + (f" ({len(daftar_kunci)} key)" if len(daftar_kunci) > 1 else "")
+)
+st.sidebar.caption(
+    f"🤖 Model: **{selected_model.split('/')[-1]}**"
+    + (f" (kaskade dari **{model_kecil.split('/')[-1]}**)" if mode_kaskade else "")
+)
 st.sidebar.caption(f"🌡️ Temperature: **{TEMPERATURE}** (static)")
+st.sidebar.caption(f"🧵 Paralel: **{max_workers}** file per job")
+statistik_cache = cache.statistik()
+st.sidebar.caption(
+    f"🗄️ Cache: **{statistik_cache['entri']}** entri | "
+    f"hit **{statistik_cache['hits']}** / miss **{statistik_cache['misses']}**"
+    + ("" if gunakan_cache else " (nonaktif)")
+)
+if st.sidebar.button("🗑️ Kosongkan Cache", use_container_width=True):
+    cache.kosongkan()
+    st.sidebar.success("Cache dikosongkan")
+statistik_riwayat = manajer.riwayat.statistik()
+st.sidebar.caption(
+    f"📚 Riwayat: **{statistik_riwayat['hasil']}** hasil dari **{statistik_riwayat['tugas']}** tugas, "
+    f"**{statistik_riwayat['mahasiswa']}** mahasiswa"
+)
+statistik_job = manajer.statistik()
+st.sidebar.caption(
+    f"🗂️ Job: **{statistik_job['berjalan']}** berjalan, **{statistik_job['menunggu']}** menunggu"
+)
+st.sidebar.caption(
+    f"📡 API: **{statistik_job['panggilan']}** panggilan, **{statistik_job['retry']}** retry, "
+    f"**{statistik_job['throttled']}** kali kena rate limit (konkurensi: {statistik_job['konkurensi']})"
+)
+if isinstance(manajer.client, KumpulanKlien):
+    # Pemakaian per API key di kumpulan
+    for info_key in manajer.client.statistik():
+        sisa = (
+            f", sisa {info_key['sisa_token']:,}/{info_key['limit_token']:,} token/menit"
+            if info_key['sisa_token'] is not None and info_key['limit_token'] else ""
+        )
+        st.sidebar.caption(
+            f"🔑 `{info_key['key']}`: {info_key['status']} | **{info_key['panggilan']}** panggilan, "
+            f"{info_key['gagal']} gagal, {info_key['token']:,} token{sisa}"
+        )
+
+# Metrik run job yang sedang dipantau; diisi dari kolom hasil
+st.sidebar.markdown("---")
+st.sidebar.markdown("### ⏱️ Metrik Run")
+slot_metrik = st.sidebar.empty()
+slot_metrik.caption("Belum ada job yang dipilih.")
+slot_ekspor_metrik = st.sidebar.container()
 
 st.sidebar.markdown("---")
 st.sidebar.markdown("### 📚 Resources")
@@ -112,11 +411,19 @@ with col1:
     
     with tab2:
         uploaded_pdf = st.file_uploader("Pilih file soal (.pdf)", type="pdf")
+        rentang_halaman = st.text_input(
+            "Halaman soal (opsional)",
+            placeholder="Semua halaman",
+            help="Contoh: 1-3, 5. Kosongkan untuk membaca semua halaman."
+        )
         if uploaded_pdf:
-            soal_text = baca_soal_pdf(uploaded_pdf.getvalue())
-            st.success("✅ File PDF berhasil dibaca!")
-            with st.expander("Lihat teks dari PDF"):
-                st.write(soal_text)
+            try:
+                soal_text = baca_soal_pdf(uploaded_pdf.getvalue(), rentang_halaman)
+                st.success("✅ File PDF berhasil dibaca!")
+                with st.expander("Lihat teks dari PDF"):
+                    st.write(soal_text)
+            except ValueError as e:
+                st.error(f"❌ {e}")
 
     st.markdown("---")
     
@@ -139,6 +446,14 @@ with col1:
     if uploaded_zip:
         st.success(f"✅ File uploaded: {uploaded_zip.name}")
 
+    # Nama tugas mengelompokkan hasil di riwayat penilaian (halaman Riwayat Penilaian)
+    nama_tugas = st.text_input(
+        "🏷️ Nama tugas (opsional)",
+        placeholder=Path(uploaded_pdf.name).stem if uploaded_pdf else "Otomatis dari soal",
+        help="Dipakai untuk membandingkan nilai mahasiswa antar tugas di halaman Riwayat Penilaian. "
+             "Kosongkan untuk memakai nama file PDF soal, atau ID dari isi soal jika soal diketik."
+    ).strip() or (Path(uploaded_pdf.name).stem if uploaded_pdf else None)
+
     # Tombol mulai penilaian
     mulai_button = st.button(
         "🚀 Mulai Penilaian", 
@@ -151,13 +466,63 @@ with col1:
 with col2:
     st.header("📊 Hasil Penilaian")
     
+    if mulai_button:
+        if not soal_text:
+            st.error("❌ Soal tidak boleh kosong. Silakan isi teks soal atau upload PDF.")
+        elif not uploaded_zip:
+            st.error("❌ File .zip tugas belum di-upload.")
+        else:
+            # Penilaian berjalan di latar belakang; script ini hanya memantau job-nya
+            job_id = manajer.buat_job(
+                uploaded_zip,
+                uploaded_zip.name,
+                soal_text,
+                kriteria_text,
+                model=model_kecil,
+                temperature=TEMPERATURE,
+                max_workers=max_workers,
+                gunakan_cache=gunakan_cache,
+                deteksi_duplikat=deteksi_duplikat,
+                token_per_batch=int(token_per_batch),
+                minifikasi=minifikasi,
+                strategi_file_besar=strategi_file_besar,
+                streaming=streaming,
+                per_mahasiswa=per_mahasiswa,
+                saringan_awal=saringan_awal,
+                model_eskalasi=selected_model if mode_kaskade else None,
+                rentang_nilai_ragu=list(rentang_nilai_ragu),
+                batas_keyakinan=batas_keyakinan,
+                nama_tugas=nama_tugas
+            )
+            pilih_job(job_id)
+
+    # Sambungkan kembali ke job yang sedang/pernah berjalan
+    job_id = st.session_state.get('job_id') or st.query_params.get('job')
+    daftar_job = {j.id: j for j in manajer.daftar()}
+    if daftar_job:
+        id_job = list(daftar_job)
+        dipilih = st.selectbox(
+            "🗂️ Job penilaian:",
+            id_job,
+            index=id_job.index(job_id) if job_id in daftar_job else None,
+            format_func=lambda i: (
+                f"{i} · {daftar_job[i].nama_arsip} · "
+                f"{time.strftime('%d/%m %H:%M', time.localtime(daftar_job[i].dibuat))}"
+            ),
+            placeholder="Pilih job untuk disambungkan...",
+        )
+        if dipilih and dipilih != job_id:
+            pilih_job(dipilih)
+            job_id = dipilih
+    job = manajer.ambil(job_id) if job_id else None
+
     # Container untuk progress dan tabel
     progress_container = st.container()
     table_container = st.container()
     download_container = st.container()
-    
+
     # Info default
-    if not mulai_button:
+    if job is None:
         with table_container:
             st.info("💡 Hasil penilaian akan muncul di sini secara real-time setelah Anda klik 'Mulai Penilaian'")
             
@@ -170,184 +535,182 @@ with col2:
                 4. **Klik Mulai**: Tunggu hasil muncul satu per satu
                 5. **Download Excel**: Setelah selesai, unduh hasil lengkap
                 """)
+    else:
+        model_job = job.pengaturan.get('model_eskalasi') or job.pengaturan.get('model', selected_model)
 
-    if mulai_button:
-        if not soal_text:
-            st.error("❌ Soal tidak boleh kosong. Silakan isi teks soal atau upload PDF.")
-        elif not uploaded_zip:
-            st.error("❌ File .zip tugas belum di-upload.")
-        else:
-            try:
-                # Inisialisasi Groq client
-                client = Groq(api_key=api_key)
+        with progress_container:
+            st.markdown(
+                f"**Job:** `{job.id}` ({job.nama_arsip}) | **Model:** {model_job} | "
+                f"**Temperature:** {job.pengaturan.get('temperature', TEMPERATURE)}"
+            )
+            if job.aktif and st.button("⏹️ Batalkan Job"):
+                manajer.batalkan(job.id)
+
+        # Selama job aktif, hanya fragment ini yang dijalankan ulang setiap INTERVAL_REFRESH_TABEL:
+        # satu kali baca state job lalu selesai, tanpa menahan thread script dengan loop + sleep.
+        # Rerun (klik widget, refresh browser) tidak memengaruhi job yang berjalan di latar belakang.
+        dipantau = job.aktif
+
+        @st.fragment(run_every=INTERVAL_REFRESH_TABEL if dipantau else None)
+        def pantau_job():
+            aktif = job.aktif
+            if aktif:
+                # Hanya hasil yang belum ada di tabel berjalan yang disalin dari job
+                tabel = tabel_berjalan(job.id, job.total)
+                snapshot = job.snapshot(hasil_sejak=tabel['jumlah'])
+                isi_tabel_berjalan(tabel, snapshot['hasil'])
+            else:
+                st.session_state.pop('tabel_berjalan', None)
+                snapshot = job.snapshot()
+            jumlah_hasil = snapshot['jumlah_hasil']
+            total = snapshot['total']
+            progress_bar = st.progress(min(snapshot['current'] / total, 1.0) if total else 0.0)
+            if snapshot['status'] == 'menunggu':
+                st.text("⏳ Menunggu giliran (job lain sedang berjalan)...")
+            elif aktif:
+                if total:
+                    st.text(f"⏳ Memproses file {snapshot['current']}/{total}: {snapshot['file_name']}...")
+            elif snapshot['status'] == 'selesai':
+                progress_bar.progress(1.0)
+                st.success("✅ Semua file telah selesai dinilai!")
+            elif snapshot['status'] == 'dibatalkan':
+                st.warning(f"⏹️ Job dibatalkan setelah {jumlah_hasil} file dinilai.")
+            else:
+                st.error("❌ Job berhenti karena error.")
+            if snapshot['dimulai']:
+                if aktif:
+                    st.caption(f"⏱️ Waktu: {time.time() - snapshot['dimulai']:.1f} detik")
+                else:
+                    total_time = snapshot['selesai'] - snapshot['dimulai']
+                    st.caption(
+                        f"⏱️ Total waktu: {total_time:.1f} detik "
+                        f"({total_time / max(jumlah_hasil, 1):.1f} detik/file)"
+                    )
+            if snapshot['batch']['batch']:
+                statistik_batch = snapshot['batch']
+                st.caption(
+                    f"📦 Batch: **{statistik_batch['batch']}** batch berisi {statistik_batch['file']} file, "
+                    f"**{statistik_batch['request']}** request (termasuk fallback), "
+                    f"~{statistik_batch['token']:,} token input"
+                )
+            if snapshot['error']:
+                st.error("❌ Error: " + "\n\n".join(snapshot['error']))
+            tampilkan_metrik(slot_metrik, snapshot['metrik'])
+            tampilkan_parsial(st.empty(), snapshot['parsial'])
+            if aktif and jumlah_hasil:
+                # Tanpa Styler selama berjalan; pewarnaan nilai diterapkan sekali setelah job selesai
+                st.dataframe(
+                    tabel['df'][tabel['terisi']],
+                    use_container_width=True,
+                    hide_index=True,
+                    height=400  # Fixed height untuk scrollable table
+                )
+            elif jumlah_hasil:
+                st.dataframe(
+                    tabel_hasil(snapshot['hasil']),
+                    use_container_width=True,
+                    hide_index=True,
+                    height=400
+                )
+            if dipantau and not aktif:
+                # Job baru saja berhenti: jalankan ulang seluruh halaman untuk statistik dan tombol download
+                st.rerun()
+
+        with table_container:
+            pantau_job()
+        if job.aktif:
+            st.stop()
+        snapshot = job.snapshot()
+        hasil_list = snapshot['hasil']
+
+        # Ekspor metrik run (dibuat saat tombol diklik)
+        with slot_ekspor_metrik:
+            col_m1, col_m2 = st.columns(2)
+            with col_m1:
+                st.download_button(
+                    "📥 JSON",
+                    data=functools.partial(job.ekspor_metrik, "json"),
+                    file_name=f"metrik_{job.id}.json",
+                    mime="application/json",
+                    use_container_width=True,
+                )
+            with col_m2:
+                st.download_button(
+                    "📥 Prometheus",
+                    data=functools.partial(job.ekspor_metrik, "prometheus"),
+                    file_name=f"metrik_{job.id}.prom",
+                    mime="text/plain",
+                    use_container_width=True,
+                )
+
+        # Tampilkan tombol download jika ada hasil
+        if hasil_list:
+            statistik = snapshot['statistik']
+            with download_container:
+                st.markdown("---")
                 
-                # Placeholder untuk progress bar dan status
-                with progress_container:
-                    st.markdown(f"**Model:** {selected_model} | **Temperature:** {TEMPERATURE}")
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    elapsed_time = st.empty()
-                    
-                # Placeholder untuk tabel
-                with table_container:
-                    table_placeholder = st.empty()
-                    
-                # List untuk menyimpan hasil
-                hasil_list = []
+                # Tampilkan statistik dalam cards
+                st.subheader("📈 Statistik Penilaian")
+                col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
                 
-                # Timer
-                import time
-                start_time = time.time()
+                with col_stat1:
+                    st.metric(
+                        "📁 Total File", 
+                        len(hasil_list),
+                        help="Jumlah file yang dinilai"
+                    )
+                with col_stat2:
+                    avg_nilai = statistik['rata_rata']
+                    st.metric(
+                        "📊 Rata-rata", 
+                        f"{avg_nilai:.1f}",
+                        delta=f"{avg_nilai-70:.1f} dari 70",
+                        delta_color="normal" if avg_nilai >= 70 else "inverse",
+                        help="Nilai rata-rata semua tugas"
+                    )
+                with col_stat3:
+                    st.metric(
+                        "🏆 Tertinggi", 
+                        statistik['tertinggi'],
+                        help="Nilai tertinggi"
+                    )
+                with col_stat4:
+                    st.metric(
+                        "📉 Terendah", 
+                        statistik['terendah'],
+                        help="Nilai terendah"
+                    )
                 
-                # Generator untuk proses real-time
-                for progress_info in proses_file_zip_realtime(
-                    client=client,
-                    zip_file_bytes=uploaded_zip.getvalue(),
-                    soal_text=soal_text,
-                    kriteria_text=kriteria_text,
-                    model=selected_model,
-                    temperature=TEMPERATURE
-                ):
-                    if progress_info['type'] == 'progress':
-                        # Update progress bar dan status
-                        progress = progress_info['current'] / progress_info['total']
-                        progress_bar.progress(progress)
-                        status_text.text(f"⏳ Memproses file {progress_info['current']}/{progress_info['total']}: {progress_info['file_name']}...")
-                        
-                        # Update elapsed time
-                        elapsed = time.time() - start_time
-                        elapsed_time.caption(f"⏱️ Waktu: {elapsed:.1f} detik")
-                        
-                    elif progress_info['type'] == 'result':
-                        # Tambahkan hasil ke list
-                        hasil_list.append(progress_info['data'])
-                        
-                        # Update tabel dengan hasil terbaru
-                        df_hasil = pd.DataFrame(hasil_list)
-                        
-                        # Styling untuk tabel
-                        def style_dataframe(df):
-                            def color_nilai(val):
-                                if isinstance(val, (int, float)):
-                                    if val >= 85:
-                                        return 'background-color: #d4edda; color: #155724; font-weight: bold'
-                                    elif val >= 70:
-                                        return 'background-color: #fff3cd; color: #856404'
-                                    elif val >= 50:
-                                        return 'background-color: #f8d7da; color: #721c24'
-                                    else:
-                                        return 'background-color: #f5c6cb; color: #721c24; font-weight: bold'
-                                return ''
-                            
-                            return df.style.applymap(color_nilai, subset=['nilai'])
-                        
-                        # Tampilkan tabel dengan styling
-                        table_placeholder.dataframe(
-                            style_dataframe(df_hasil),
-                            use_container_width=True,
-                            hide_index=True,
-                            height=400  # Fixed height untuk scrollable table
-                        )
-                    
-                    elif progress_info['type'] == 'error':
-                        st.error(f"❌ Error: {progress_info['message']}")
+                # Distribusi nilai
+                st.subheader("📊 Distribusi Nilai")
+                nilai_ranges = statistik['distribusi']
                 
-                # Selesai - update progress dan status
-                progress_bar.progress(1.0)
-                total_time = time.time() - start_time
-                status_text.success(f"✅ Semua file telah selesai dinilai!")
-                elapsed_time.caption(f"⏱️ Total waktu: {total_time:.1f} detik ({total_time/len(hasil_list):.1f} detik/file)")
+                dist_cols = st.columns(4)
+                for idx, (grade, count) in enumerate(nilai_ranges.items()):
+                    with dist_cols[idx]:
+                        st.metric(grade, count)
                 
-                # Tampilkan tombol download jika ada hasil
-                if hasil_list:
-                    with download_container:
-                        st.markdown("---")
-                        
-                        # Tampilkan statistik dalam cards
-                        st.subheader("📈 Statistik Penilaian")
-                        col_stat1, col_stat2, col_stat3, col_stat4 = st.columns(4)
-                        df_final = pd.DataFrame(hasil_list)
-                        
-                        with col_stat1:
-                            st.metric(
-                                "📁 Total File", 
-                                len(hasil_list),
-                                help="Jumlah file yang dinilai"
-                            )
-                        with col_stat2:
-                            avg_nilai = df_final['nilai'].mean()
-                            st.metric(
-                                "📊 Rata-rata", 
-                                f"{avg_nilai:.1f}",
-                                delta=f"{avg_nilai-70:.1f} dari 70",
-                                delta_color="normal" if avg_nilai >= 70 else "inverse",
-                                help="Nilai rata-rata semua tugas"
-                            )
-                        with col_stat3:
-                            st.metric(
-                                "🏆 Tertinggi", 
-                                df_final['nilai'].max(),
-                                help="Nilai tertinggi"
-                            )
-                        with col_stat4:
-                            st.metric(
-                                "📉 Terendah", 
-                                df_final['nilai'].min(),
-                                help="Nilai terendah"
-                            )
-                        
-                        # Distribusi nilai
-                        st.subheader("📊 Distribusi Nilai")
-                        nilai_ranges = {
-                            "A (85-100)": len(df_final[df_final['nilai'] >= 85]),
-                            "B (70-84)": len(df_final[(df_final['nilai'] >= 70) & (df_final['nilai'] < 85)]),
-                            "C (50-69)": len(df_final[(df_final['nilai'] >= 50) & (df_final['nilai'] < 70)]),
-                            "D (< 50)": len(df_final[df_final['nilai'] < 50])
-                        }
-                        
-                        dist_cols = st.columns(4)
-                        for idx, (grade, count) in enumerate(nilai_ranges.items()):
-                            with dist_cols[idx]:
-                                st.metric(grade, count)
-                        
-                        # Buat file Excel untuk download
-                        output = io.BytesIO()
-                        with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                            df_final.to_excel(writer, index=False, sheet_name='Hasil Penilaian')
-                            
-                            # Auto-adjust columns width
-                            worksheet = writer.sheets['Hasil Penilaian']
-                            for column in df_final:
-                                column_length = max(df_final[column].astype(str).map(len).max(), len(column))
-                                col_idx = df_final.columns.get_loc(column)
-                                worksheet.column_dimensions[chr(65 + col_idx)].width = min(column_length + 2, 50)
-                                
-                        excel_data = output.getvalue()
-
-                        # Tombol download
-                        st.markdown("---")
-                        col_dl1, col_dl2 = st.columns(2)
-                        with col_dl1:
-                            st.download_button(
-                                label="📥 Download Excel (.xlsx)",
-                                data=excel_data,
-                                file_name=f"HasilPenilaian_{selected_model.split('/')[-1]}_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
-                                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                                use_container_width=True,
-                            )
-                        with col_dl2:
-                            # Download as CSV
-                            csv_data = df_final.to_csv(index=False).encode('utf-8')
-                            st.download_button(
-                                label="📥 Download CSV",
-                                data=csv_data,
-                                file_name=f"HasilPenilaian_{pd.Timestamp.now().strftime('%Y%m%d_%H%M%S')}.csv",
-                                mime="text/csv",
-                                use_container_width=True,
-                            )
-                else:
-                    st.warning("⚠️ Tidak ada hasil untuk ditampilkan.")
-
-            except Exception as e:
-                st.error(f"❌ Terjadi kesalahan: {e}")
-                st.info("💡 Pastikan API key di file .env sudah benar dan model yang dipilih tersedia.")
\ No newline at end of file
+                # Tombol download: file ekspor baru dibuat saat tombol diklik (lazy)
+                st.markdown("---")
+                waktu = time.strftime('%Y%m%d_%H%M%S', time.localtime(snapshot['selesai']))
+                nama_dasar = f"HasilPenilaian_{model_job.split('/')[-1]}_{waktu}"
+                format_tersedia = [
+                    ("xlsx", "📥 Download Excel (.xlsx)"),
+                    ("csv", "📥 Download CSV"),
+                    ("jsonl", "📥 Download JSONL"),
+                ]
+                if parquet_tersedia():
+                    format_tersedia.append(("parquet", "📥 Download Parquet"))
+                kolom_download = st.columns(len(format_tersedia))
+                for kolom_dl, (format_ekspor, label) in zip(kolom_download, format_tersedia):
+                    ekstensi, mime = FORMAT_EKSPOR[format_ekspor]
+                    with kolom_dl:
+                        st.download_button(
+                            label=label,
+                            data=functools.partial(ekspor_bytes, hasil_list, format_ekspor),
+                            file_name=nama_dasar + ekstensi,
+                            mime=mime,
+                            use_container_width=True,
+                        )
+        else:
+            st.warning("⚠️ Tidak ada hasil untuk ditampilkan.")
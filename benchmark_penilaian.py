@@ -0,0 +1,348 @@
+# benchmark_penilaian.py
+# File ini berisi benchmark offline pipeline penilaian dengan client Groq palsu.
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import re
+import resource
+import subprocess
+import sys
+import threading
+import time
+import types
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional
+
+import groq
+import httpx
+
+from metrik_penilaian import persentil
+from penilai_otomatis import buat_prompt_penilaian, dapatkan_penilaian, proses_file_zip_realtime
+from penjadwal_api import PenjadwalAPI
+
+MODEL_BENCHMARK = "benchmark-palsu"
+PATH_HASIL = os.path.join("benchmark", "hasil_benchmark.jsonl")
+# Penurunan file/detik lebih dari ini dibanding run sebelumnya dianggap regresi
+AMBANG_REGRESI = 0.2
+
+SOAL_BENCHMARK = "Buatlah program yang membaca N bilangan lalu mencetak jumlah, rata-rata, dan nilai terbesarnya."
+_POLA_NAMA_FILE = re.compile(r'(?:^Nama File: |=== Nama File: )(.+?)(?: ===)?$', re.MULTILINE)
+
+
+class DistribusiLatensi:
+    """
+    Latensi respons palsu (detik). Format teks: 'tetap:0.2', 'uniform:0.1,0.5', atau
+    'lognormal:0.3,0.5' (median, sigma), yang paling mirip ekor panjang latensi API sungguhan.
+    """
+
+    def __init__(self, spesifikasi: str):
+        self.spesifikasi = spesifikasi
+        jenis, _, parameter = spesifikasi.partition(":")
+        self.jenis = jenis
+        self.parameter = [float(p) for p in parameter.split(",") if p]
+        if jenis not in ("tetap", "uniform", "lognormal"):
+            raise ValueError(f"Distribusi latensi tidak dikenal: {spesifikasi}")
+
+    def sampel(self, rng: random.Random) -> float:
+        if self.jenis == "tetap":
+            return self.parameter[0]
+        if self.jenis == "uniform":
+            return rng.uniform(self.parameter[0], self.parameter[1])
+        median, sigma = self.parameter
+        return median * rng.lognormvariate(0, sigma)
+
+
+class KlienGroqPalsu:
+    """
+    Meniru `client.chat.completions.create` milik Groq SDK.
+
+    Setiap panggilan menunggu sesuai `latensi`, lalu dengan peluang tertentu melempar
+    RateLimitError (429, dengan header retry-after), InternalServerError (5xx), atau mengembalikan
+    prosa tanpa objek JSON. Selain itu mengembalikan penilaian JSON acak (objek tunggal, atau
+    array untuk prompt batch) lengkap dengan `usage`. Aman dipakai dari banyak thread.
+    """
+
+    def __init__(
+        self,
+        latensi: str = "lognormal:0.05,0.5",
+        p_429: float = 0.0,
+        p_5xx: float = 0.0,
+        p_json_rusak: float = 0.0,
+        retry_after: float = 0.5,
+        seed: int = 0
+    ):
+        self.latensi = DistribusiLatensi(latensi)
+        self.p_429 = p_429
+        self.p_5xx = p_5xx
+        self.p_json_rusak = p_json_rusak
+        self.retry_after = retry_after
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self.jumlah_panggilan = 0
+        self.jumlah_429 = 0
+        self.jumlah_5xx = 0
+        self.jumlah_json_rusak = 0
+        # Waktu request pertama untuk setiap nama file (dasar latensi per file)
+        self.request_pertama: Dict[str, float] = {}
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: List[Dict[str, str]], **kwargs: Any) -> Any:
+        sekarang = time.perf_counter()
+        pesan_user = messages[-1]["content"]
+        nama_file = _POLA_NAMA_FILE.findall(pesan_user)
+        with self._lock:
+            self.jumlah_panggilan += 1
+            for nama in nama_file:
+                self.request_pertama.setdefault(nama, sekarang)
+            tunggu = self.latensi.sampel(self._rng)
+            undian = self._rng.random()
+            nilai = [self._rng.randint(40, 100) for _ in nama_file]
+        time.sleep(tunggu)
+
+        request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+        if undian < self.p_429:
+            with self._lock:
+                self.jumlah_429 += 1
+            respons = httpx.Response(429, headers={"retry-after": str(self.retry_after)}, request=request)
+            raise groq.RateLimitError("Rate limit (palsu)", response=respons, body=None)
+        undian -= self.p_429
+        if undian < self.p_5xx:
+            with self._lock:
+                self.jumlah_5xx += 1
+            respons = httpx.Response(503, request=request)
+            raise groq.InternalServerError("Server error (palsu)", response=respons, body=None)
+        undian -= self.p_5xx
+        if undian < self.p_json_rusak:
+            with self._lock:
+                self.jumlah_json_rusak += 1
+            # Prosa tanpa objek JSON: tidak bisa diperbaiki lokal oleh pengurai_json, jadi
+            # benar-benar memicu request ulang (output terpotong justru akan diperbaiki)
+            konten = "Maaf, saya tidak dapat memberikan penilaian dalam format yang diminta untuk kode ini."
+        else:
+            hasil = [
+                {"nama_file": nama, "nilai": n, "kesalahan": "-", "feedback": "Penilaian dari klien palsu."}
+                for nama, n in zip(nama_file, nilai)
+            ]
+            if "=== Nama File:" in pesan_user:
+                konten = "```json\n" + json.dumps(hasil) + "\n```"
+            else:
+                konten = json.dumps(hasil[0] if hasil else {"nilai": 0, "kesalahan": "-", "feedback": "-"})
+
+        token_prompt = sum(len(m["content"]) for m in messages) // 4 + 1
+        return types.SimpleNamespace(
+            choices=[types.SimpleNamespace(message=types.SimpleNamespace(content=konten))],
+            usage=types.SimpleNamespace(
+                prompt_tokens=token_prompt,
+                completion_tokens=len(konten) // 4 + 1,
+                total_tokens=token_prompt + len(konten) // 4 + 1,
+            ),
+        )
+
+
+def buat_zip_sintetis(jumlah_file: int, seed: int = 0) -> bytes:
+    """ZIP berisi `jumlah_file` program Python dengan panjang bervariasi (10-300 baris)."""
+    rng = random.Random(seed)
+    data = io.BytesIO()
+    with zipfile.ZipFile(data, "w", zipfile.ZIP_DEFLATED) as zf:
+        for i in range(jumlah_file):
+            baris = [f"# Tugas mahasiswa {i:05d}", "def hitung(data):", "    total = 0"]
+            for j in range(rng.randint(10, 300)):
+                baris.append(f"    total += data[{j % 7}] * {rng.randint(1, 99)}  # langkah {j}")
+            baris += ["    return total", "", f"print(hitung(list(range({rng.randint(7, 50)}))))"]
+            zf.writestr(f"{2024000 + i}_mahasiswa/tugas.py", "\n".join(baris) + "\n")
+    return data.getvalue()
+
+def _rss_puncak_mb() -> float:
+    """Peak RSS proses ini dalam MB (ru_maxrss: KB di Linux, byte di macOS)."""
+    puncak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return puncak / (1024 * 1024) if sys.platform == "darwin" else puncak / 1024
+
+def jalankan_skenario(skenario: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Menjalankan satu skenario dan mengembalikan metriknya. Dipanggil di proses anak tersendiri
+    (lihat main) agar peak RSS tiap skenario tidak tercampur.
+    """
+    klien = KlienGroqPalsu(
+        latensi=skenario["latensi"],
+        p_429=skenario["p_429"],
+        p_5xx=skenario["p_5xx"],
+        p_json_rusak=skenario["p_json_rusak"],
+        seed=skenario["seed"],
+    )
+    # Batas RPM/TPM dibuat sangat besar: yang diukur adalah pipeline, bukan kuota
+    penjadwal = PenjadwalAPI(
+        max_konkurensi=skenario["workers"],
+        batas_model={MODEL_BENCHMARK: (10 ** 9, 10 ** 12)},
+    )
+    arsip = buat_zip_sintetis(skenario["jumlah_file"], skenario["seed"])
+    latensi_file: List[float] = []
+    gagal = 0
+
+    keluaran = io.StringIO()
+    with contextlib.redirect_stdout(keluaran if not skenario["verbose"] else sys.stdout):
+        mulai = time.perf_counter()
+        if skenario["mode"] == "zip":
+            for event in proses_file_zip_realtime(
+                klien,
+                arsip,
+                SOAL_BENCHMARK,
+                "",
+                model=MODEL_BENCHMARK,
+                max_workers=skenario["workers"],
+                penjadwal=penjadwal,
+                token_per_batch=skenario["token_per_batch"],
+            ):
+                if event["type"] == "result":
+                    selesai = time.perf_counter()
+                    nama = event["data"]["nama_file"]
+                    latensi_file.append(selesai - klien.request_pertama.get(nama, selesai))
+                    gagal += event["data"].get("kesalahan") == "GAGAL proses"
+                elif event["type"] == "error":
+                    raise RuntimeError(event["message"])
+        else:
+            system_prompt = buat_prompt_penilaian(SOAL_BENCHMARK, "")
+            with zipfile.ZipFile(io.BytesIO(arsip)) as zf:
+                for nama in zf.namelist():
+                    kode = zf.read(nama).decode("utf-8")
+                    awal = time.perf_counter()
+                    hasil = dapatkan_penilaian(
+                        klien, system_prompt, nama, kode, model=MODEL_BENCHMARK, penjadwal=penjadwal
+                    )
+                    latensi_file.append(time.perf_counter() - awal)
+                    gagal += hasil.get("kesalahan") == "GAGAL proses"
+        durasi = time.perf_counter() - mulai
+
+    statistik_api = penjadwal.statistik()
+    return {
+        "durasi_detik": round(durasi, 3),
+        "file_per_detik": round(len(latensi_file) / durasi, 2) if durasi else 0.0,
+        "latensi_p50": round(persentil(latensi_file, 50), 4),
+        "latensi_p95": round(persentil(latensi_file, 95), 4),
+        "jumlah_hasil": len(latensi_file),
+        "gagal": gagal,
+        "panggilan_api": klien.jumlah_panggilan,
+        "retry_api": statistik_api["retry"],
+        "throttled": statistik_api["throttled"],
+        "error_5xx": klien.jumlah_5xx,
+        "json_rusak": klien.jumlah_json_rusak,
+        "rss_puncak_mb": round(_rss_puncak_mb(), 1),
+    }
+
+def _commit_git() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _kunci_skenario(skenario: Dict[str, Any]) -> str:
+    return json.dumps({k: v for k, v in skenario.items() if k != "verbose"}, sort_keys=True)
+
+def muat_riwayat(path: str) -> List[Dict[str, Any]]:
+    if not os.path.exists(path):
+        return []
+    riwayat = []
+    with open(path, "r", encoding="utf-8") as f:
+        for baris in f:
+            try:
+                riwayat.append(json.loads(baris))
+            except ValueError:
+                continue
+    return riwayat
+
+def bandingkan(sebelumnya: Optional[Dict[str, Any]], hasil: Dict[str, Any], ambang: float) -> Optional[str]:
+    """Keterangan perbandingan dengan run sebelumnya; diawali 'REGRESI' jika file/detik turun melewati ambang."""
+    if not sebelumnya or not sebelumnya.get("file_per_detik"):
+        return None
+    perubahan = hasil["file_per_detik"] / sebelumnya["file_per_detik"] - 1
+    teks = (
+        f"{perubahan:+.1%} file/detik, p95 {sebelumnya['latensi_p95']:.3f} -> {hasil['latensi_p95']:.3f} detik"
+    )
+    return ("REGRESI: " if perubahan < -ambang else "") + teks
+
+def buat_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Benchmark offline pipeline penilaian dengan client Groq palsu.")
+    parser.add_argument("--mode", choices=["zip", "tunggal"], default="zip",
+                        help="'zip': proses_file_zip_realtime; 'tunggal': dapatkan_penilaian per file (sekuensial)")
+    parser.add_argument("--jumlah-file", type=int, nargs="+", default=[10, 100, 1000],
+                        help="Ukuran ZIP sintetis yang diuji (default: 10 100 1000)")
+    parser.add_argument("--workers", type=int, default=8, help="max_workers untuk mode zip")
+    parser.add_argument("--token-per-batch", type=int, default=0, help="Mode batch untuk mode zip (0 = nonaktif)")
+    parser.add_argument("--latensi", default="lognormal:0.05,0.5",
+                        help="Distribusi latensi: tetap:D, uniform:MIN,MAX, lognormal:MEDIAN,SIGMA")
+    parser.add_argument("--p-429", type=float, default=0.0, help="Peluang respons 429")
+    parser.add_argument("--p-5xx", type=float, default=0.0, help="Peluang respons 5xx")
+    parser.add_argument("--p-json-rusak", type=float, default=0.0, help="Peluang output tanpa objek JSON")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=PATH_HASIL, help=f"File riwayat hasil (default: {PATH_HASIL})")
+    parser.add_argument("--tanpa-simpan", action="store_true", help="Jangan tambahkan hasil ke riwayat")
+    parser.add_argument("--gagal-jika-regresi", action="store_true",
+                        help=f"Exit code 1 jika file/detik turun lebih dari {AMBANG_REGRESI:.0%}% dari run sebelumnya")
+    parser.add_argument("--verbose", action="store_true", help="Tampilkan log pipeline")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = buat_parser().parse_args(argv)
+    DistribusiLatensi(args.latensi)  # validasi lebih awal
+    riwayat = muat_riwayat(args.output)
+    commit = _commit_git()
+    ada_regresi = False
+
+    for jumlah_file in args.jumlah_file:
+        skenario = {
+            "mode": args.mode,
+            "jumlah_file": jumlah_file,
+            "workers": args.workers if args.mode == "zip" else 1,
+            "token_per_batch": args.token_per_batch if args.mode == "zip" else 0,
+            "latensi": args.latensi,
+            "p_429": args.p_429,
+            "p_5xx": args.p_5xx,
+            "p_json_rusak": args.p_json_rusak,
+            "seed": args.seed,
+            "verbose": args.verbose,
+        }
+        # Satu proses baru per skenario supaya peak RSS terukur terpisah
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+            hasil = executor.submit(jalankan_skenario, skenario).result()
+
+        kunci = _kunci_skenario(skenario)
+        sebelumnya = next((r["hasil"] for r in reversed(riwayat) if r.get("kunci") == kunci), None)
+        perbandingan = bandingkan(sebelumnya, hasil, AMBANG_REGRESI)
+        ada_regresi = ada_regresi or bool(perbandingan and perbandingan.startswith("REGRESI"))
+
+        print(
+            f"[{args.mode}] {jumlah_file:>5} file: {hasil['file_per_detik']:>8.1f} file/detik | "
+            f"p50 {hasil['latensi_p50']:.3f} s | p95 {hasil['latensi_p95']:.3f} s | "
+            f"retry {hasil['retry_api']} (429: {hasil['throttled']}, 5xx: {hasil['error_5xx']}) | "
+            f"JSON rusak {hasil['json_rusak']} | gagal {hasil['gagal']} | RSS {hasil['rss_puncak_mb']:.0f} MB"
+        )
+        if perbandingan:
+            print(f"        dibanding run sebelumnya: {perbandingan}")
+
+        entri = {
+            "waktu": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "commit": commit,
+            "kunci": kunci,
+            "skenario": {k: v for k, v in skenario.items() if k != "verbose"},
+            "hasil": hasil,
+        }
+        riwayat.append(entri)
+        if not args.tanpa_simpan:
+            folder = os.path.dirname(args.output)
+            if folder:
+                os.makedirs(folder, exist_ok=True)
+            with open(args.output, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entri, ensure_ascii=False) + "\n")
+
+    return 1 if ada_regresi and args.gagal_jika_regresi else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,147 @@
+# cache_penilaian.py
+# File ini berisi cache hasil penilaian yang disimpan di disk (SQLite).
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Dict, Any, Optional
+
+
+def normalisasi_kode(kode: str) -> str:
+    """
+    Menormalisasi kode sebelum di-hash supaya perbedaan yang tidak berarti
+    (line ending Windows, spasi di akhir baris, baris kosong di awal/akhir)
+    tidak menghasilkan kunci cache yang berbeda.
+    """
+    baris = kode.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    return '\n'.join(b.rstrip() for b in baris).strip('\n')
+
+def buat_kunci_cache(
+    system_prompt: str,
+    model: str,
+    temperature: float,
+    kode: str,
+    pengaturan: Optional[Dict[str, Any]] = None
+) -> str:
+    """
+    Membuat kunci cache dari prompt, model, temperature, dan kode yang dinormalisasi.
+    `pengaturan` berisi setelan lain yang mengubah isi request (mis. strategi dan batas pemotongan
+    file besar); urutan key-nya tidak berpengaruh.
+    """
+    h = hashlib.sha256()
+    setelan = json.dumps(pengaturan or {}, sort_keys=True, default=str)
+    for bagian in (system_prompt, model, repr(float(temperature)), setelan, normalisasi_kode(kode)):
+        h.update(bagian.encode('utf-8'))
+        h.update(b'\x00')
+    return h.hexdigest()
+
+
+class CachePenilaian:
+    """
+    Cache hasil penilaian berbasis SQLite yang aman dipakai dari banyak thread.
+
+    Entri yang lebih tua dari `max_umur_detik` dihapus, dan jika jumlah entri melebihi
+    `max_entri` maka entri yang paling lama tidak dipakai ikut dihapus.
+    """
+
+    def __init__(
+        self,
+        path: str = ".cache_penilaian/penilaian.sqlite3",
+        max_entri: int = 20000,
+        max_umur_detik: float = 30 * 24 * 3600
+    ):
+        self.path = path
+        self.max_entri = max_entri
+        self.max_umur_detik = max_umur_detik
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._simpan_sejak_eviksi = 0
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS penilaian (
+                kunci TEXT PRIMARY KEY,
+                hasil TEXT NOT NULL,
+                dibuat REAL NOT NULL,
+                terakhir_dipakai REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_penilaian_dipakai ON penilaian (terakhir_dipakai)"
+        )
+        self._conn.commit()
+        self.eviksi()
+
+    def ambil(self, kunci: str) -> Optional[Dict[str, Any]]:
+        """Mengambil hasil dari cache. Mengembalikan None jika tidak ada atau sudah kedaluwarsa."""
+        sekarang = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT hasil, dibuat FROM penilaian WHERE kunci = ?", (kunci,)
+            ).fetchone()
+            if row is None or sekarang - row[1] > self.max_umur_detik:
+                self.misses += 1
+                return None
+            self._conn.execute(
+                "UPDATE penilaian SET terakhir_dipakai = ? WHERE kunci = ?", (sekarang, kunci)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return json.loads(row[0])
+
+    def simpan(self, kunci: str, hasil: Dict[str, Any]) -> None:
+        """Menyimpan hasil penilaian ke cache (langsung di-commit agar aman jika proses crash)."""
+        sekarang = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO penilaian (kunci, hasil, dibuat, terakhir_dipakai) VALUES (?, ?, ?, ?)",
+                (kunci, json.dumps(hasil, ensure_ascii=False), sekarang, sekarang)
+            )
+            self._conn.commit()
+            self._simpan_sejak_eviksi += 1
+            perlu_eviksi = self._simpan_sejak_eviksi >= 100
+        if perlu_eviksi:
+            self.eviksi()
+
+    def eviksi(self) -> int:
+        """Menghapus entri kedaluwarsa dan entri berlebih. Mengembalikan jumlah entri yang dihapus."""
+        batas_umur = time.time() - self.max_umur_detik
+        with self._lock:
+            dihapus = self._conn.execute(
+                "DELETE FROM penilaian WHERE dibuat < ?", (batas_umur,)
+            ).rowcount
+            jumlah = self._conn.execute("SELECT COUNT(*) FROM penilaian").fetchone()[0]
+            if jumlah > self.max_entri:
+                dihapus += self._conn.execute(
+                    """
+                    DELETE FROM penilaian WHERE kunci IN (
+                        SELECT kunci FROM penilaian ORDER BY terakhir_dipakai ASC LIMIT ?
+                    )
+                    """,
+                    (jumlah - self.max_entri,)
+                ).rowcount
+            self._conn.commit()
+            self._simpan_sejak_eviksi = 0
+        return dihapus
+
+    def kosongkan(self) -> None:
+        """Menghapus seluruh isi cache."""
+        with self._lock:
+            self._conn.execute("DELETE FROM penilaian")
+            self._conn.commit()
+
+    def statistik(self) -> Dict[str, int]:
+        """Jumlah hit, miss, dan entri yang tersimpan."""
+        with self._lock:
+            jumlah = self._conn.execute("SELECT COUNT(*) FROM penilaian").fetchone()[0]
+        return {'hits': self.hits, 'misses': self.misses, 'entri': jumlah}
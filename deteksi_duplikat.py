@@ -0,0 +1,195 @@
+# deteksi_duplikat.py
+# File ini berisi deteksi submission identik dan sangat mirip (MinHash + LSH).
+
+import builtins
+import hashlib
+import io
+import keyword
+import os
+import re
+import tokenize
+from typing import Dict, List, Optional, Tuple
+
+# Jumlah fungsi hash MinHash = JUMLAH_BAND * BARIS_PER_BAND
+JUMLAH_BAND = 16
+BARIS_PER_BAND = 4
+PANJANG_SHINGLE = 5
+AMBANG_MIRIP = 0.8
+
+_PRIMA = (1 << 61) - 1
+_KOEFISIEN = [
+    (
+        int.from_bytes(hashlib.blake2b(f"a{i}".encode(), digest_size=8).digest(), 'big') % _PRIMA or 1,
+        int.from_bytes(hashlib.blake2b(f"b{i}".encode(), digest_size=8).digest(), 'big') % _PRIMA,
+    )
+    for i in range(JUMLAH_BAND * BARIS_PER_BAND)
+]
+
+# Kata kunci umum bahasa non-Python (C/C++/Java/JS/Go/PHP) yang tidak diganti menjadi ID
+_KATA_KUNCI_UMUM = {
+    'auto', 'bool', 'boolean', 'break', 'case', 'catch', 'char', 'class', 'const', 'continue',
+    'default', 'delete', 'do', 'double', 'else', 'enum', 'extends', 'false', 'final', 'float',
+    'for', 'func', 'function', 'if', 'implements', 'import', 'include', 'int', 'interface', 'let',
+    'long', 'new', 'null', 'package', 'private', 'protected', 'public', 'return', 'short',
+    'static', 'string', 'String', 'struct', 'switch', 'this', 'throw', 'throws', 'true', 'try',
+    'typedef', 'unsigned', 'var', 'void', 'while', 'echo', 'std', 'cout', 'cin', 'endl',
+    'printf', 'scanf', 'System', 'console', 'main',
+}
+_BUILTIN_PYTHON = set(dir(builtins))
+
+_POLA_KOMENTAR_C = re.compile(r'//[^\n]*|/\*.*?\*/', re.DOTALL)
+_POLA_KOMENTAR_HASH = re.compile(r'#[^\n]*')
+_POLA_TOKEN = re.compile(
+    r'"(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\'|[A-Za-z_]\w*|\d+(?:\.\d+)?|==|!=|<=|>=|&&|\|\||\+\+|--|->|\S'
+)
+_EKSTENSI_KOMENTAR_HASH = {'.rb', '.sh', '.r', '.pl', '.yaml', '.yml'}
+
+
+def _token_python(kode: str, ganti_identifier: bool) -> Optional[List[str]]:
+    tokens = []
+    try:
+        for tok in tokenize.generate_tokens(io.StringIO(kode).readline):
+            if tok.type in (tokenize.COMMENT, tokenize.NL, tokenize.ENCODING, tokenize.ENDMARKER):
+                continue
+            if tok.type == tokenize.NEWLINE:
+                tokens.append('\n')
+            elif tok.type == tokenize.INDENT:
+                tokens.append('<INDENT>')
+            elif tok.type == tokenize.DEDENT:
+                tokens.append('<DEDENT>')
+            elif (
+                ganti_identifier and tok.type == tokenize.NAME
+                and not keyword.iskeyword(tok.string) and tok.string not in _BUILTIN_PYTHON
+            ):
+                tokens.append('ID')
+            else:
+                tokens.append(tok.string)
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        return None
+    return tokens
+
+def _token_umum(kode: str, ekstensi: str, ganti_identifier: bool) -> List[str]:
+    kode = _POLA_KOMENTAR_C.sub(' ', kode)
+    if ekstensi in _EKSTENSI_KOMENTAR_HASH:
+        kode = _POLA_KOMENTAR_HASH.sub(' ', kode)
+    tokens = []
+    for tok in _POLA_TOKEN.findall(kode):
+        if ganti_identifier and (tok[0].isalpha() or tok[0] == '_') and tok not in _KATA_KUNCI_UMUM:
+            tokens.append('ID')
+        else:
+            tokens.append(tok)
+    return tokens
+
+def token_ternormalisasi(kode: str, nama_file: str = "", ganti_identifier: bool = False) -> List[str]:
+    """
+    Memecah kode menjadi token tanpa komentar dan spasi.
+    Jika `ganti_identifier` True, nama variabel/fungsi diganti dengan 'ID' agar penggantian nama
+    tidak mengubah hasil. File Python memakai tokenizer bawaan; bahasa lain memakai regex umum.
+    """
+    ekstensi = os.path.splitext(nama_file)[1].lower()
+    if ekstensi in ('.py', '.pyw', ''):
+        tokens = _token_python(kode, ganti_identifier)
+        if tokens is not None:
+            return tokens
+        # Kode Python yang tidak bisa di-tokenize tetap diproses dengan tokenizer umum
+        ekstensi = '.rb'
+    return _token_umum(kode, ekstensi, ganti_identifier)
+
+def sidik_jari(tokens: List[str]) -> str:
+    """Hash SHA-256 dari aliran token."""
+    return hashlib.sha256('\x1f'.join(tokens).encode('utf-8')).hexdigest()
+
+def minhash(tokens: List[str]) -> Tuple[int, ...]:
+    """Signature MinHash dari shingle token sepanjang PANJANG_SHINGLE."""
+    if len(tokens) < PANJANG_SHINGLE:
+        shingles = {' '.join(tokens)}
+    else:
+        shingles = {
+            ' '.join(tokens[i:i + PANJANG_SHINGLE]) for i in range(len(tokens) - PANJANG_SHINGLE + 1)
+        }
+    nilai_dasar = [
+        int.from_bytes(hashlib.blake2b(s.encode('utf-8'), digest_size=8).digest(), 'big')
+        for s in shingles
+    ]
+    return tuple(min((a * x + b) % _PRIMA for x in nilai_dasar) for a, b in _KOEFISIEN)
+
+def estimasi_jaccard(sig_a: Tuple[int, ...], sig_b: Tuple[int, ...]) -> float:
+    """Perkiraan kemiripan Jaccard dari dua signature MinHash."""
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+
+class HasilDuplikat:
+    """
+    Hasil pengelompokan duplikat.
+
+    - `wakil`: nama file -> nama file wakil kelompok identiknya (wakil menunjuk dirinya sendiri).
+    - `anggota`: nama file wakil -> semua nama file di kelompok identiknya (termasuk wakil).
+    - `mirip`: nama file -> daftar nama file lain yang sangat mirip (di luar kelompok identiknya).
+    """
+
+    def __init__(self):
+        self.wakil: Dict[str, str] = {}
+        self.anggota: Dict[str, List[str]] = {}
+        self.mirip: Dict[str, List[str]] = {}
+
+    def keterangan(self, nama_file: str) -> str:
+        """Teks untuk kolom 'duplikat' pada tabel hasil."""
+        bagian = []
+        wakil = self.wakil.get(nama_file, nama_file)
+        identik = [n for n in self.anggota.get(wakil, []) if n != nama_file]
+        if identik:
+            bagian.append("Identik dengan: " + ", ".join(identik))
+        if self.mirip.get(nama_file):
+            bagian.append("Mirip dengan: " + ", ".join(self.mirip[nama_file]))
+        return "; ".join(bagian)
+
+
+def kelompokkan_duplikat(
+    daftar_kode: List[Tuple[str, str]],
+    ambang_mirip: float = AMBANG_MIRIP
+) -> HasilDuplikat:
+    """
+    Mengelompokkan submission.
+
+    - Identik: token sama persis setelah komentar dan spasi dibuang. Cukup dinilai sekali.
+    - Mirip: kemiripan Jaccard (MinHash) token yang identifier-nya dinormalisasi >= `ambang_mirip`.
+      Kandidat dicari dengan LSH sehingga tidak perlu membandingkan semua pasangan.
+    """
+    hasil = HasilDuplikat()
+    wakil_per_sidik: Dict[str, str] = {}
+    signature: Dict[str, Tuple[int, ...]] = {}
+
+    for nama_file, kode in daftar_kode:
+        sidik = sidik_jari(token_ternormalisasi(kode, nama_file))
+        wakil = wakil_per_sidik.setdefault(sidik, nama_file)
+        hasil.wakil[nama_file] = wakil
+        hasil.anggota.setdefault(wakil, []).append(nama_file)
+        if wakil == nama_file:
+            signature[nama_file] = minhash(token_ternormalisasi(kode, nama_file, ganti_identifier=True))
+
+    # LSH: file yang memiliki setidaknya satu band identik menjadi kandidat
+    kandidat = set()
+    for band in range(JUMLAH_BAND):
+        ember: Dict[Tuple[int, ...], List[str]] = {}
+        awal = band * BARIS_PER_BAND
+        for nama_file, sig in signature.items():
+            ember.setdefault(sig[awal:awal + BARIS_PER_BAND], []).append(nama_file)
+        for anggota in ember.values():
+            for i in range(len(anggota)):
+                for j in range(i + 1, len(anggota)):
+                    kandidat.add((anggota[i], anggota[j]))
+
+    mirip_wakil: Dict[str, List[str]] = {}
+    for a, b in kandidat:
+        if estimasi_jaccard(signature[a], signature[b]) >= ambang_mirip:
+            mirip_wakil.setdefault(a, []).append(b)
+            mirip_wakil.setdefault(b, []).append(a)
+
+    # Sebarkan kemiripan antar-wakil ke semua anggota kelompok identiknya
+    for nama_file, wakil in hasil.wakil.items():
+        nama_mirip = []
+        for wakil_lain in sorted(mirip_wakil.get(wakil, [])):
+            nama_mirip.extend(hasil.anggota[wakil_lain])
+        if nama_mirip:
+            hasil.mirip[nama_file] = nama_mirip
+    return hasil
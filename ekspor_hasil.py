@@ -0,0 +1,179 @@
+# ekspor_hasil.py
+# File ini berisi ekspor hasil penilaian ke Excel, CSV, JSONL, dan Parquet.
+
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Any, BinaryIO, Dict, Iterable, List, Optional, Sequence
+
+KOLOM_UTAMA = ["nama_file", "nilai", "kesalahan", "feedback"]
+LEBAR_KOLOM_MAKS = 50
+NAMA_SHEET = "Hasil Penilaian"
+# Hasil ekspor lebih besar dari ini ditulis ke disk sementara sebelum dibaca sebagai bytes
+BATAS_SPOOL_MEMORI = 16 * 1024 * 1024
+
+# format -> (ekstensi, MIME type)
+FORMAT_EKSPOR = {
+    "xlsx": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": (".csv", "text/csv"),
+    "jsonl": (".jsonl", "application/x-ndjson"),
+    "parquet": (".parquet", "application/vnd.apache.parquet"),
+}
+
+
+def parquet_tersedia() -> bool:
+    """Ekspor Parquet membutuhkan pyarrow (opsional)."""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+def tentukan_kolom(baris: Iterable[Dict[str, Any]]) -> List[str]:
+    """Kolom utama lebih dulu, lalu kolom tambahan sesuai urutan kemunculan pertamanya."""
+    kolom = list(KOLOM_UTAMA)
+    terlihat = set(kolom)
+    for hasil in baris:
+        for k in hasil:
+            if k not in terlihat:
+                terlihat.add(k)
+                kolom.append(k)
+    return kolom
+
+def _ke_sel(nilai: Any) -> Any:
+    """Nilai sel untuk format tabular: dict/list diubah menjadi JSON, None menjadi string kosong."""
+    if nilai is None:
+        return ""
+    if isinstance(nilai, (dict, list)):
+        return json.dumps(nilai, ensure_ascii=False)
+    return nilai
+
+def tulis_xlsx(baris: Sequence[Dict[str, Any]], tujuan: BinaryIO, kolom: Optional[List[str]] = None) -> None:
+    """
+    Menulis Excel dengan openpyxl mode write-only: baris langsung di-stream ke file, bukan
+    disimpan sebagai objek sel di memori. Lebar kolom dihitung dalam satu lintasan sebelum
+    baris ditulis (mode write-only mengharuskan lebar kolom diatur lebih dulu).
+    """
+    from openpyxl import Workbook
+    from openpyxl.utils import get_column_letter
+
+    kolom = kolom or tentukan_kolom(baris)
+    lebar = [len(k) for k in kolom]
+    for hasil in baris:
+        for idx, k in enumerate(kolom):
+            if lebar[idx] < LEBAR_KOLOM_MAKS:
+                lebar[idx] = max(lebar[idx], len(str(_ke_sel(hasil.get(k)))))
+
+    workbook = Workbook(write_only=True)
+    worksheet = workbook.create_sheet(NAMA_SHEET)
+    for idx, panjang in enumerate(lebar, 1):
+        worksheet.column_dimensions[get_column_letter(idx)].width = min(panjang + 2, LEBAR_KOLOM_MAKS)
+    worksheet.append(kolom)
+    for hasil in baris:
+        worksheet.append([_ke_sel(hasil.get(k)) for k in kolom])
+    workbook.save(tujuan)
+
+def tulis_csv(baris: Iterable[Dict[str, Any]], tujuan: BinaryIO, kolom: List[str]) -> None:
+    """Menulis CSV UTF-8 baris demi baris."""
+    teks = io.TextIOWrapper(tujuan, encoding="utf-8", newline="", write_through=True)
+    writer = csv.DictWriter(teks, fieldnames=kolom, extrasaction="ignore", restval="")
+    writer.writeheader()
+    for hasil in baris:
+        writer.writerow({k: _ke_sel(v) for k, v in hasil.items()})
+    teks.flush()
+    teks.detach()
+
+def tulis_jsonl(baris: Iterable[Dict[str, Any]], tujuan: BinaryIO) -> None:
+    """Menulis satu objek JSON per baris (JSON Lines)."""
+    for hasil in baris:
+        tujuan.write(json.dumps(hasil, ensure_ascii=False).encode("utf-8"))
+        tujuan.write(b"\n")
+
+def tulis_parquet(
+    baris: Iterable[Dict[str, Any]],
+    tujuan: BinaryIO,
+    kolom: List[str],
+    ukuran_row_group: int = 5000
+) -> None:
+    """Menulis Parquet per row group sehingga hanya `ukuran_row_group` baris yang ditahan di memori."""
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Ekspor Parquet membutuhkan pyarrow: pip install pyarrow")
+
+    schema = pa.schema([
+        (k, pa.int64() if k in ("nilai", "jumlah_token") else pa.string()) for k in kolom
+    ])
+
+    def ke_kolom(k: str, nilai: Any) -> Any:
+        if nilai is None or schema.field(k).type == pa.int64():
+            return nilai
+        return str(_ke_sel(nilai))
+
+    writer = pq.ParquetWriter(tujuan, schema)
+    try:
+        potongan: List[Dict[str, Any]] = []
+        for hasil in baris:
+            potongan.append({k: ke_kolom(k, hasil.get(k)) for k in kolom})
+            if len(potongan) >= ukuran_row_group:
+                writer.write_table(pa.Table.from_pylist(potongan, schema=schema))
+                potongan = []
+        if potongan:
+            writer.write_table(pa.Table.from_pylist(potongan, schema=schema))
+    finally:
+        writer.close()
+
+def ekspor_bytes(baris: Sequence[Dict[str, Any]], format: str) -> bytes:
+    """Membuat isi file ekspor dalam format 'xlsx', 'csv', 'jsonl', atau 'parquet'."""
+    if format not in FORMAT_EKSPOR:
+        raise ValueError(f"Format ekspor tidak dikenal: {format}")
+    kolom = tentukan_kolom(baris)
+    with tempfile.SpooledTemporaryFile(max_size=BATAS_SPOOL_MEMORI) as berkas:
+        if format == "xlsx":
+            tulis_xlsx(baris, berkas, kolom)
+        elif format == "csv":
+            tulis_csv(baris, berkas, kolom)
+        elif format == "jsonl":
+            tulis_jsonl(baris, berkas)
+        else:
+            tulis_parquet(baris, berkas, kolom)
+        berkas.seek(0)
+        return berkas.read()
+
+
+class PenulisCSVBerjalan:
+    """
+    Menulis hasil ke file CSV segera setelah hasil tersebut datang (urutan selesai), lengkap dengan
+    kolom 'index' agar urutan asli bisa dipulihkan. File di-flush setiap baris sehingga hasil yang
+    sudah dibayar tetap tersimpan jika proses berhenti di tengah jalan.
+    """
+
+    def __init__(self, path: str, kolom_tambahan: Sequence[str] = ()):
+        self.path = path
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._file = open(path, "w", encoding="utf-8", newline="")
+        self._kolom = ["index"] + KOLOM_UTAMA + [k for k in kolom_tambahan if k not in KOLOM_UTAMA]
+        self._writer = csv.DictWriter(self._file, fieldnames=self._kolom, extrasaction="ignore", restval="")
+        self._writer.writeheader()
+        self.jumlah = 0
+
+    def tulis(self, hasil: Dict[str, Any], index: Optional[int] = None) -> None:
+        baris = {k: _ke_sel(v) for k, v in hasil.items()}
+        baris["index"] = index if index is not None else ""
+        self._writer.writerow(baris)
+        self._file.flush()
+        self.jumlah += 1
+
+    def tutup(self) -> None:
+        self._file.close()
+
+    def __enter__(self) -> "PenulisCSVBerjalan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.tutup()
@@ -0,0 +1,347 @@
+# klien_groq.py
+# File ini berisi client Groq bersama dan kumpulan beberapa API key.
+
+import importlib.util
+import os
+import re
+import threading
+import time
+import types
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import groq
+import httpx
+from groq import Groq
+
+from penjadwal_api import parse_durasi, parse_retry_after
+
+# Batas connection pool; sebaiknya >= jumlah request bersamaan (konkurensi global penjadwal)
+MAX_KONEKSI = 32
+MAX_KONEKSI_KEEPALIVE = 16
+# Koneksi idle tetap dibuka selama ini agar request berikutnya tidak perlu TLS handshake lagi
+KEEPALIVE_DETIK = 120.0
+TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+
+# Lama jeda API key yang kena 429 jika server tidak mengirim retry-after (detik)
+JEDA_RATE_LIMIT = 5.0
+
+_klien: Dict[Tuple[str, Optional[str]], Groq] = {}
+_kumpulan: Dict[Tuple[Tuple[str, Optional[str]], ...], "KumpulanKlien"] = {}
+_lock = threading.Lock()
+
+
+def http2_tersedia() -> bool:
+    """HTTP/2 di httpx butuh paket opsional `h2` (pip install h2)."""
+    return importlib.util.find_spec("h2") is not None
+
+def dapatkan_klien(api_key: str, base_url: Optional[str] = None, max_koneksi: int = MAX_KONEKSI) -> Groq:
+    """
+    Client Groq bersama, satu per (API key, base URL) dalam satu proses. Semua pemanggil memakai
+    connection pool yang sama, sehingga koneksi TLS ke API dipakai ulang antar request, sesi, dan job.
+    `max_retries=0` karena retry sudah ditangani oleh PenjadwalAPI.
+    """
+    kunci = (api_key, base_url)
+    with _lock:
+        if kunci not in _klien:
+            http_client = httpx.Client(
+                limits=httpx.Limits(
+                    max_connections=max_koneksi,
+                    max_keepalive_connections=min(max_koneksi, MAX_KONEKSI_KEEPALIVE),
+                    keepalive_expiry=KEEPALIVE_DETIK,
+                ),
+                timeout=TIMEOUT,
+                http2=http2_tersedia(),
+                follow_redirects=True,
+            )
+            _klien[kunci] = Groq(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+        return _klien[kunci]
+
+def panaskan_koneksi(klien: Groq) -> None:
+    """
+    Membuka koneksi ke API di thread latar (daftar model, tanpa memakai token) supaya DNS dan
+    TLS handshake tidak ditanggung oleh request penilaian pertama.
+    """
+    def panaskan():
+        try:
+            klien.models.list()
+        except Exception as e:
+            print(f"Gagal membuka koneksi awal ke API: {e}")
+
+    threading.Thread(target=panaskan, name="panaskan-koneksi", daemon=True).start()
+
+def parse_daftar_kunci(teks: str) -> List[Tuple[str, Optional[str]]]:
+    """
+    Mengubah daftar API key (dipisah koma, spasi, atau baris baru) menjadi [(api_key, base_url)].
+    Setiap key boleh diberi base URL dengan format "key@https://host", mis. untuk gateway/proxy.
+    Key yang sama hanya diambil sekali.
+    """
+    anggota = []
+    for bagian in re.split(r'[\s,]+', teks or ""):
+        if not bagian:
+            continue
+        api_key, _, base_url = bagian.partition("@")
+        item = (api_key, base_url or None)
+        if item not in anggota:
+            anggota.append(item)
+    return anggota
+
+
+def kunci_dari_env() -> List[Tuple[str, Optional[str]]]:
+    """API key dari GROQ_API_KEYS (beberapa key, lihat parse_daftar_kunci) atau GROQ_API_KEY."""
+    return parse_daftar_kunci(os.getenv("GROQ_API_KEYS") or os.getenv("GROQ_API_KEY") or "")
+
+
+class AnggotaKlien:
+    """Satu API key (dan base URL) di dalam KumpulanKlien beserta sisa kuota dan pemakaiannya."""
+
+    def __init__(self, api_key: str, base_url: Optional[str], klien: Groq):
+        self.api_key = api_key
+        self.base_url = base_url
+        self.klien = klien
+        self.aktif = 0
+        self.panggilan = 0
+        self.gagal = 0
+        self.token = 0
+        # Kuota dari header x-ratelimit-* terakhir; None sampai respons pertama diterima
+        self.limit_token: Optional[float] = None
+        self.sisa_token: Optional[float] = None
+        self.sisa_request: Optional[float] = None
+        self._waktu_header = 0.0
+        self.jeda_sampai = 0.0
+        # Alasan key tidak dipakai lagi (mis. ditolak server); None jika masih dipakai
+        self.nonaktif: Optional[str] = None
+
+    @property
+    def label(self) -> str:
+        """Key yang disamarkan (plus host jika base URL diatur) untuk ditampilkan."""
+        label = f"{self.api_key[:4]}…{self.api_key[-4:]}" if len(self.api_key) > 12 else "****"
+        if self.base_url:
+            label += f" @ {httpx.URL(self.base_url).host}"
+        return label
+
+    def perkiraan_sisa_token(self, sekarang: float) -> float:
+        """Sisa kuota token menit ini, diperkirakan terisi ulang linear sejak header terakhir."""
+        if self.sisa_token is None or not self.limit_token:
+            return float("inf")
+        terisi = (sekarang - self._waktu_header) * self.limit_token / 60.0
+        return min(self.limit_token, self.sisa_token + terisi)
+
+    def catat_header(self, headers: Any) -> None:
+        if headers is None:
+            return
+        try:
+            if headers.get("x-ratelimit-limit-tokens") is not None:
+                self.limit_token = float(headers.get("x-ratelimit-limit-tokens"))
+            if headers.get("x-ratelimit-remaining-tokens") is not None:
+                self.sisa_token = float(headers.get("x-ratelimit-remaining-tokens"))
+                self._waktu_header = time.monotonic()
+            if headers.get("x-ratelimit-remaining-requests") is not None:
+                self.sisa_request = float(headers.get("x-ratelimit-remaining-requests"))
+                # Kuota request harian habis: key diistirahatkan sampai kuotanya direset
+                if self.sisa_request <= 0:
+                    reset = parse_durasi(headers.get("x-ratelimit-reset-requests"))
+                    if reset:
+                        self.jeda_sampai = max(self.jeda_sampai, time.monotonic() + reset)
+        except (TypeError, ValueError):
+            pass
+
+    def catat_usage(self, completion: Any) -> None:
+        usage = getattr(completion, "usage", None)
+        self.token += getattr(usage, "total_tokens", None) or 0
+
+
+class _ResponsKumpulan:
+    """Respons mentah dengan header rate limit yang dijumlahkan dari semua key yang masih aktif."""
+
+    def __init__(self, respons: Any, headers: Any):
+        self._respons = respons
+        self.headers = headers
+
+    def __getattr__(self, nama: str) -> Any:
+        return getattr(self._respons, nama)
+
+
+class KumpulanKlien:
+    """
+    Beberapa API key (boleh dengan base URL berbeda) yang dipakai seperti satu client Groq:
+    `chat.completions.create`, `chat.completions.with_raw_response.create`, dan `models.list`.
+    Bisa diberikan sebagai `client` ke proses_file_zip_realtime, ManajerJob, dan PenjadwalAPI.
+
+    - Setiap request dikirim ke key dengan perkiraan sisa kuota token terbesar (dari header
+      x-ratelimit-*), dibagi jumlah request yang sedang berjalan di key tersebut.
+    - 401/403 menonaktifkan key secara permanen; 429 mengistirahatkan key sampai retry-after.
+      Keduanya langsung dicoba ulang di key lain. Error baru diteruskan jika semua key gagal,
+      sehingga PenjadwalAPI hanya melambat ketika kuota semua key habis.
+    - Header rate limit yang diteruskan ke PenjadwalAPI berisi jumlah kuota semua key aktif.
+
+    Base URL dipakai oleh SDK Groq apa adanya, jadi endpoint-nya harus menerima path ala Groq
+    (/openai/v1/...), mis. gateway atau proxy yang kompatibel.
+    """
+
+    def __init__(self, anggota: Sequence[Tuple[str, Optional[str]]], max_koneksi: int = MAX_KONEKSI):
+        if not anggota:
+            raise ValueError("Kumpulan klien membutuhkan minimal satu API key.")
+        self.anggota = [
+            AnggotaKlien(api_key, base_url, dapatkan_klien(api_key, base_url, max_koneksi))
+            for api_key, base_url in anggota
+        ]
+        self._lock = threading.Lock()
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(
+            create=lambda **kwargs: self._jalankan(False, kwargs),
+            with_raw_response=types.SimpleNamespace(create=lambda **kwargs: self._jalankan(True, kwargs)),
+        ))
+        self.models = types.SimpleNamespace(list=self._daftar_model)
+
+    def _pilih(self, dicoba: List[AnggotaKlien]) -> Optional[AnggotaKlien]:
+        sekarang = time.monotonic()
+        with self._lock:
+            kandidat = [a for a in self.anggota if a.nonaktif is None and a not in dicoba]
+            if not kandidat:
+                return None
+            siap = [a for a in kandidat if a.jeda_sampai <= sekarang]
+            if siap:
+                anggota = max(
+                    siap, key=lambda a: (a.perkiraan_sisa_token(sekarang) / (1 + a.aktif), -a.aktif, -a.panggilan)
+                )
+            elif dicoba:
+                # Key lain sedang diistirahatkan: teruskan 429 terakhir ke pemanggil
+                return None
+            else:
+                anggota = min(kandidat, key=lambda a: a.jeda_sampai)
+            anggota.aktif += 1
+            anggota.panggilan += 1
+            return anggota
+
+    def _header_gabungan(self, headers: Any) -> Any:
+        if headers is None or headers.get("x-ratelimit-remaining-tokens") is None:
+            return headers
+        sekarang = time.monotonic()
+        gabungan = httpx.Headers(headers)
+        with self._lock:
+            aktif = [a for a in self.anggota if a.nonaktif is None]
+            limit = [a.limit_token for a in aktif if a.limit_token]
+            sisa = [a.perkiraan_sisa_token(sekarang) for a in aktif if a.sisa_token is not None and a.limit_token]
+            sisa_request = [a.sisa_request for a in aktif if a.sisa_request is not None]
+            # Key yang belum pernah dipakai dianggap sama dengan key yang baru merespons
+            dasar_limit = float(headers.get("x-ratelimit-limit-tokens") or 0)
+            dasar_request = float(headers.get("x-ratelimit-remaining-requests") or 0)
+            belum = len(aktif) - len(sisa)
+            gabungan["x-ratelimit-remaining-tokens"] = str(int(sum(sisa) + belum * dasar_limit))
+            if limit or dasar_limit:
+                gabungan["x-ratelimit-limit-tokens"] = str(int(sum(limit) + (len(aktif) - len(limit)) * dasar_limit))
+            if headers.get("x-ratelimit-remaining-requests") is not None:
+                gabungan["x-ratelimit-remaining-requests"] = str(
+                    int(sum(sisa_request) + (len(aktif) - len(sisa_request)) * dasar_request)
+                )
+        return gabungan
+
+    def _jalankan(self, raw: bool, kwargs: Dict[str, Any]) -> Any:
+        dicoba: List[AnggotaKlien] = []
+        error_auth: Optional[Exception] = None
+        error_rate_limit: Optional[Exception] = None
+        while True:
+            anggota = self._pilih(dicoba)
+            if anggota is None:
+                error = error_rate_limit or error_auth
+                if error is None:
+                    raise ValueError("Semua API key di kumpulan sudah dinonaktifkan.")
+                raise error
+            dicoba.append(anggota)
+            try:
+                completions = anggota.klien.chat.completions
+                if raw and getattr(completions, "with_raw_response", None) is None:
+                    # Client tanpa akses respons mentah (mis. client palsu untuk tes): tanpa header
+                    hasil = completions.create(**kwargs)
+                    with self._lock:
+                        anggota.catat_usage(hasil)
+                    return _ResponsKumpulan(types.SimpleNamespace(parse=lambda: hasil), None)
+                if raw:
+                    respons = completions.with_raw_response.create(**kwargs)
+                    with self._lock:
+                        anggota.catat_header(respons.headers)
+                        if not kwargs.get("stream"):
+                            # parse() di-cache SDK, jadi pemanggil tidak mem-parse dua kali
+                            anggota.catat_usage(respons.parse())
+                    return _ResponsKumpulan(respons, self._header_gabungan(respons.headers))
+                hasil = completions.create(**kwargs)
+                with self._lock:
+                    anggota.catat_usage(hasil)
+                return hasil
+            except (groq.AuthenticationError, groq.PermissionDeniedError) as e:
+                with self._lock:
+                    anggota.gagal += 1
+                    anggota.nonaktif = f"ditolak server ({e.status_code})"
+                print(f"API key {anggota.label} dinonaktifkan: {e}")
+                error_auth = e
+            except groq.RateLimitError as e:
+                headers = getattr(getattr(e, "response", None), "headers", None)
+                jeda = parse_retry_after(headers) or JEDA_RATE_LIMIT
+                with self._lock:
+                    anggota.gagal += 1
+                    anggota.catat_header(headers)
+                    anggota.jeda_sampai = max(anggota.jeda_sampai, time.monotonic() + jeda)
+                error_rate_limit = e
+            except Exception:
+                with self._lock:
+                    anggota.gagal += 1
+                raise
+            finally:
+                with self._lock:
+                    anggota.aktif -= 1
+
+    def _daftar_model(self) -> Any:
+        """Membuka koneksi ke semua key (dipakai panaskan_koneksi); hasil key aktif pertama dikembalikan."""
+        hasil = None
+        for anggota in self.anggota:
+            try:
+                daftar = anggota.klien.models.list()
+                hasil = hasil or daftar
+            except (groq.AuthenticationError, groq.PermissionDeniedError) as e:
+                with self._lock:
+                    anggota.nonaktif = f"ditolak server ({e.status_code})"
+                print(f"API key {anggota.label} dinonaktifkan: {e}")
+        return hasil
+
+    def statistik(self) -> List[Dict[str, Any]]:
+        """Pemakaian dan status setiap key untuk ditampilkan di UI/CLI."""
+        sekarang = time.monotonic()
+        with self._lock:
+            data = []
+            for a in self.anggota:
+                if a.nonaktif is not None:
+                    status = f"nonaktif: {a.nonaktif}"
+                elif a.jeda_sampai > sekarang:
+                    status = f"istirahat {a.jeda_sampai - sekarang:.0f} s"
+                else:
+                    status = "aktif"
+                sisa = a.perkiraan_sisa_token(sekarang)
+                data.append({
+                    "key": a.label,
+                    "status": status,
+                    "panggilan": a.panggilan,
+                    "gagal": a.gagal,
+                    "token": a.token,
+                    "sisa_token": None if sisa == float("inf") else int(sisa),
+                    "limit_token": int(a.limit_token) if a.limit_token else None,
+                })
+            return data
+
+def dapatkan_kumpulan_klien(
+    anggota: Sequence[Tuple[str, Optional[str]]],
+    max_koneksi: int = MAX_KONEKSI
+) -> Union[Groq, KumpulanKlien]:
+    """
+    Client untuk daftar (api_key, base_url): client Groq biasa jika hanya satu key, atau
+    KumpulanKlien (dibagi dalam satu proses) jika lebih dari satu.
+    """
+    if len(anggota) == 1:
+        return dapatkan_klien(anggota[0][0], anggota[0][1], max_koneksi)
+    kunci = tuple(anggota)
+    with _lock:
+        kumpulan = _kumpulan.get(kunci)
+    if kumpulan is None:
+        # Dibuat di luar _lock karena dapatkan_klien juga memakai lock yang sama
+        kumpulan = KumpulanKlien(anggota, max_koneksi)
+        with _lock:
+            kumpulan = _kumpulan.setdefault(kunci, kumpulan)
+    return kumpulan
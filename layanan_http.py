@@ -0,0 +1,362 @@
+# layanan_http.py
+# File ini adalah layanan HTTP (job + SSE) untuk memakai penilai dari sistem lain.
+
+import argparse
+import asyncio
+import hmac
+import json
+import os
+import sys
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+import uvicorn
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+from cache_penilaian import CachePenilaian
+from ekspor_hasil import FORMAT_EKSPOR, ekspor_bytes
+from klien_groq import MAX_KONEKSI, KumpulanKlien, dapatkan_kumpulan_klien, kunci_dari_env, panaskan_koneksi
+from manajer_job import Job, ManajerJob
+from penilai_otomatis import STRATEGI_FILE_BESAR, baca_soal_pdf
+from riwayat_penilaian import KELOMPOK, RiwayatPenilaian
+from saringan_awal import MODE_SARINGAN
+
+MODEL_DEFAULT = "openai/gpt-oss-120b"
+TEMPERATURE = 0.1
+# Folder job terpisah dari app Streamlit: setiap ManajerJob melanjutkan job aktif di foldernya,
+# jadi dua proses tidak boleh memakai folder yang sama
+FOLDER_JOB_LAYANAN = ".job_layanan"
+# Jeda pemeriksaan perubahan job untuk stream SSE, dan jeda komentar keep-alive
+INTERVAL_EVENT = 0.5
+INTERVAL_KEEPALIVE = 15.0
+MAX_UKURAN_SOAL = 32 * 1024 * 1024
+FORMAT_HASIL = ("json",) + tuple(sorted(FORMAT_EKSPOR))
+
+# Parameter query filter riwayat: nama -> pengubah dari teks
+_FILTER_RIWAYAT = {
+    "tugas": str,
+    "mahasiswa": str,
+    "model": str,
+    "hash_prompt": str,
+    "sejak": float,
+    "sampai": float,
+    "hanya_terakhir": lambda x: x.lower() in ("1", "true", "ya", "on"),
+}
+
+# Field form untuk pengaturan job: nama -> pengubah dari teks
+_PENGATURAN_FORM = {
+    "model": str,
+    "model_eskalasi": str,
+    "nama_tugas": str,
+    "max_workers": int,
+    "token_per_batch": int,
+    "batas_keyakinan": int,
+    "strategi_file_besar": str,
+    "saringan_awal": str,
+    "deteksi_duplikat": lambda x: x.lower() in ("1", "true", "ya", "on"),
+    "minifikasi": lambda x: x.lower() in ("1", "true", "ya", "on"),
+    "per_mahasiswa": lambda x: x.lower() in ("1", "true", "ya", "on"),
+    "gunakan_cache": lambda x: x.lower() in ("1", "true", "ya", "on"),
+}
+
+
+class ErrorPermintaan(Exception):
+    """Input dari klien tidak valid; dikembalikan sebagai respons 4xx berisi pesan error."""
+
+    def __init__(self, pesan: str, status: int = 400):
+        super().__init__(pesan)
+        self.status = status
+
+
+def _error(pesan: str, status: int) -> JSONResponse:
+    return JSONResponse({"error": pesan}, status_code=status)
+
+def _ringkasan_job(job: Job) -> Dict[str, Any]:
+    data = job.snapshot()
+    data.pop("hasil")
+    data.pop("parsial")
+    return data
+
+def _format_sse(event: Dict[str, Any], id: Optional[int] = None) -> str:
+    baris = f"event: {event['type']}\n"
+    if id is not None:
+        baris += f"id: {id}\n"
+    return baris + f"data: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+async def _baca_teks_form(form: Any, nama_file_field: str, nama_teks_field: str, rentang_halaman: str = "") -> str:
+    """Teks dari field teks, atau dari file (PDF dibaca dengan pembaca_pdf, selain itu UTF-8)."""
+    berkas = form.get(nama_file_field)
+    if berkas is not None and not isinstance(berkas, str):
+        isi = await berkas.read(MAX_UKURAN_SOAL + 1)
+        if len(isi) > MAX_UKURAN_SOAL:
+            raise ErrorPermintaan(f"File '{nama_file_field}' terlalu besar.", 413)
+        if (berkas.filename or "").lower().endswith(".pdf"):
+            try:
+                return await run_in_threadpool(baca_soal_pdf, isi, rentang_halaman)
+            except ValueError as e:
+                raise ErrorPermintaan(str(e))
+        return isi.decode("utf-8-sig", errors="replace")
+    return str(form.get(nama_teks_field) or "")
+
+def _pengaturan_dari_form(form: Any) -> Dict[str, Any]:
+    pengaturan: Dict[str, Any] = {"model": MODEL_DEFAULT, "temperature": TEMPERATURE, "saringan_awal": "diagnostik"}
+    for nama, ubah in _PENGATURAN_FORM.items():
+        nilai = form.get(nama)
+        if nilai is None or nilai == "":
+            continue
+        try:
+            pengaturan[nama] = ubah(str(nilai))
+        except ValueError:
+            raise ErrorPermintaan(f"Nilai '{nama}' tidak valid: {nilai}")
+    if form.get("nilai_ragu"):
+        try:
+            bawah, atas = (int(x) for x in str(form.get("nilai_ragu")).split("-"))
+        except ValueError:
+            raise ErrorPermintaan("Nilai 'nilai_ragu' harus berformat MIN-MAKS, mis. 50-75.")
+        pengaturan["rentang_nilai_ragu"] = [bawah, atas]
+    if pengaturan.get("strategi_file_besar", "potong") not in STRATEGI_FILE_BESAR:
+        raise ErrorPermintaan(f"strategi_file_besar harus salah satu dari {', '.join(STRATEGI_FILE_BESAR)}.")
+    if pengaturan["saringan_awal"] not in MODE_SARINGAN:
+        raise ErrorPermintaan(f"saringan_awal harus salah satu dari {', '.join(MODE_SARINGAN)}.")
+    pengaturan["max_workers"] = max(1, min(16, pengaturan.get("max_workers", 4)))
+    return pengaturan
+
+def _filter_riwayat(query: Any) -> Dict[str, Any]:
+    filter: Dict[str, Any] = {}
+    for nama, ubah in _FILTER_RIWAYAT.items():
+        nilai = query.get(nama)
+        if nilai is None or nilai == "":
+            continue
+        try:
+            filter[nama] = ubah(nilai)
+        except ValueError:
+            raise ErrorPermintaan(f"Nilai '{nama}' tidak valid: {nilai}")
+    return filter
+
+
+def buat_aplikasi(manajer: ManajerJob, token: Optional[str] = None) -> Starlette:
+    """
+    Aplikasi ASGI di atas `manajer`. Jika `token` diberikan, setiap request harus membawa header
+    `Authorization: Bearer <token>`.
+
+    Endpoint:
+        POST   /jobs                 form multipart: arsip (ZIP, wajib), soal (file PDF/teks) atau
+                                     soal_text, halaman_soal, kriteria (file) atau kriteria_text,
+                                     dan pengaturan opsional (model, max_workers, per_mahasiswa,
+                                     saringan_awal, nama_tugas, ...). Respons 202 berisi id job.
+        GET    /jobs                 daftar job (tanpa hasil).
+        GET    /jobs/{id}            status, progress, statistik, dan metrik satu job.
+        GET    /jobs/{id}/events     stream SSE event 'progress', 'result', dan 'error' (sama dengan
+                                     proses_file_zip_realtime), lalu 'selesai' saat job berhenti.
+        GET    /jobs/{id}/hasil      hasil job yang sudah selesai; ?format=json (default), csv,
+                                     jsonl, xlsx, atau parquet.
+        DELETE /jobs/{id}            membatalkan job.
+        GET    /status               jumlah job dan aktivitas API (ditambah pemakaian per API key).
+        GET    /riwayat              hasil dari riwayat penilaian (jika manajer punya riwayat), terbaru
+                                     lebih dulu; filter ?tugas=, mahasiswa=, model=, hash_prompt=,
+                                     sejak=, sampai= (epoch detik), hanya_terakhir=1, batas=.
+        GET    /riwayat/agregat      agregat riwayat per ?kelompok=tugas|mahasiswa|model|prompt|hari
+                                     (default model), dengan filter yang sama.
+    """
+
+    def dengan_otorisasi(handler):
+        async def bungkus(request: Request) -> Response:
+            if token:
+                header = request.headers.get("authorization", "")
+                if not hmac.compare_digest(header.encode(), f"Bearer {token}".encode()):
+                    return _error("Token tidak valid.", 401)
+            try:
+                return await handler(request)
+            except ErrorPermintaan as e:
+                return _error(str(e), e.status)
+        return bungkus
+
+    def ambil_job(request: Request) -> Job:
+        job = manajer.ambil(request.path_params["id"])
+        if job is None:
+            raise ErrorPermintaan("Job tidak ditemukan.", 404)
+        return job
+
+    async def buat_job(request: Request) -> Response:
+        async with request.form(max_files=4) as form:
+            arsip = form.get("arsip")
+            if arsip is None or isinstance(arsip, str):
+                raise ErrorPermintaan("Field 'arsip' (file ZIP) wajib diisi.")
+            soal_text = await _baca_teks_form(form, "soal", "soal_text", str(form.get("halaman_soal") or ""))
+            if not soal_text.strip():
+                raise ErrorPermintaan("Soal wajib diisi (field 'soal' berupa file atau 'soal_text').")
+            kriteria_text = await _baca_teks_form(form, "kriteria", "kriteria_text")
+            pengaturan = _pengaturan_dari_form(form)
+            # Arsip disalin ke folder job di thread lain agar event loop tidak tertahan
+            id = await run_in_threadpool(
+                manajer.buat_job, arsip.file, arsip.filename or "arsip.zip", soal_text, kriteria_text,
+                **pengaturan
+            )
+        return JSONResponse(
+            {"id": id, "status": manajer.ambil(id).status, "events": f"/jobs/{id}/events",
+             "hasil": f"/jobs/{id}/hasil"},
+            status_code=202
+        )
+
+    async def daftar_job(request: Request) -> Response:
+        return JSONResponse([job.ke_dict() for job in manajer.daftar()])
+
+    async def detail_job(request: Request) -> Response:
+        return JSONResponse(_ringkasan_job(ambil_job(request)))
+
+    async def batalkan_job(request: Request) -> Response:
+        job = ambil_job(request)
+        if not manajer.batalkan(job.id):
+            raise ErrorPermintaan(f"Job sudah {job.status}.", 409)
+        return JSONResponse({"id": job.id, "dibatalkan": True})
+
+    async def event_job(request: Request) -> Response:
+        job = ambil_job(request)
+
+        async def stream() -> AsyncGenerator[str, None]:
+            # Klien yang tersambung ulang menerima semua hasil dari awal (index hasil tetap sama)
+            jumlah_hasil = jumlah_error = 0
+            versi = -1
+            progress_terakhir = None
+            tenang = 0.0
+            while True:
+                if job.versi != versi:
+                    perubahan = job.perubahan_sejak(jumlah_hasil, jumlah_error)
+                    versi = perubahan['versi']
+                    progress = (perubahan['current'], perubahan['total'], perubahan['file_name'])
+                    if perubahan['total'] and progress != progress_terakhir:
+                        progress_terakhir = progress
+                        yield _format_sse({'type': 'progress', 'current': progress[0], 'total': progress[1],
+                                           'file_name': progress[2]})
+                    for index, hasil in perubahan['hasil']:
+                        yield _format_sse({'type': 'result', 'index': index, 'data': hasil}, id=index)
+                    for pesan in perubahan['error']:
+                        yield _format_sse({'type': 'error', 'message': pesan})
+                    jumlah_hasil += len(perubahan['hasil'])
+                    jumlah_error += len(perubahan['error'])
+                    tenang = 0.0
+                    if not job.aktif and job.versi == versi:
+                        ringkasan = _ringkasan_job(job)
+                        yield _format_sse({'type': 'selesai', 'status': ringkasan['status'],
+                                           'statistik': ringkasan['statistik']})
+                        return
+                if await request.is_disconnected():
+                    return
+                await asyncio.sleep(INTERVAL_EVENT)
+                tenang += INTERVAL_EVENT
+                if tenang >= INTERVAL_KEEPALIVE:
+                    # Komentar SSE menjaga koneksi tetap terbuka melewati proxy
+                    tenang = 0.0
+                    yield ": keep-alive\n\n"
+
+        return StreamingResponse(
+            stream(), media_type="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        )
+
+    async def hasil_job(request: Request) -> Response:
+        job = ambil_job(request)
+        format = request.query_params.get("format", "json")
+        if format not in FORMAT_HASIL:
+            raise ErrorPermintaan(f"Format harus salah satu dari {', '.join(FORMAT_HASIL)}.")
+        if job.aktif:
+            raise ErrorPermintaan(f"Job masih {job.status} ({job.current}/{job.total}).", 409)
+        snapshot = job.snapshot()
+        if format == "json":
+            return JSONResponse({"id": job.id, "status": snapshot["status"], "statistik": snapshot["statistik"],
+                                 "error": snapshot["error"], "hasil": snapshot["hasil"]})
+        isi = await run_in_threadpool(ekspor_bytes, snapshot["hasil"], format)
+        ekstensi, mime = FORMAT_EKSPOR[format]
+        return Response(isi, media_type=mime, headers={
+            "Content-Disposition": f'attachment; filename="hasil_{job.id}{ekstensi}"'
+        })
+
+    async def status(request: Request) -> Response:
+        data: Dict[str, Any] = manajer.statistik()
+        if isinstance(manajer.client, KumpulanKlien):
+            data["api_key"] = manajer.client.statistik()
+        return JSONResponse(data)
+
+    def ambil_riwayat() -> RiwayatPenilaian:
+        if manajer.riwayat is None:
+            raise ErrorPermintaan("Riwayat penilaian tidak aktif.", 404)
+        return manajer.riwayat
+
+    async def cari_riwayat(request: Request) -> Response:
+        riwayat = ambil_riwayat()
+        filter = _filter_riwayat(request.query_params)
+        try:
+            batas = max(1, min(10000, int(request.query_params.get("batas", 1000))))
+        except ValueError:
+            raise ErrorPermintaan("Nilai 'batas' harus bilangan bulat.")
+        return JSONResponse(await run_in_threadpool(riwayat.cari, batas, **filter))
+
+    async def agregat_riwayat(request: Request) -> Response:
+        riwayat = ambil_riwayat()
+        kelompok = request.query_params.get("kelompok", "model")
+        if kelompok not in KELOMPOK:
+            raise ErrorPermintaan(f"Kelompok harus salah satu dari {', '.join(KELOMPOK)}.")
+        filter = _filter_riwayat(request.query_params)
+        return JSONResponse(await run_in_threadpool(riwayat.agregat, kelompok, **filter))
+
+    routes = [
+        Route("/jobs", dengan_otorisasi(buat_job), methods=["POST"]),
+        Route("/jobs", dengan_otorisasi(daftar_job), methods=["GET"]),
+        Route("/jobs/{id}", dengan_otorisasi(detail_job), methods=["GET"]),
+        Route("/jobs/{id}", dengan_otorisasi(batalkan_job), methods=["DELETE"]),
+        Route("/jobs/{id}/events", dengan_otorisasi(event_job), methods=["GET"]),
+        Route("/jobs/{id}/hasil", dengan_otorisasi(hasil_job), methods=["GET"]),
+        Route("/status", dengan_otorisasi(status), methods=["GET"]),
+        Route("/riwayat", dengan_otorisasi(cari_riwayat), methods=["GET"]),
+        Route("/riwayat/agregat", dengan_otorisasi(agregat_riwayat), methods=["GET"]),
+    ]
+    return Starlette(routes=routes)
+
+def buat_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Layanan HTTP penilaian otomatis (job + SSE).")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--folder-job", default=FOLDER_JOB_LAYANAN, help="Folder penyimpanan job")
+    parser.add_argument("--job-paralel", type=int, default=4, help="Jumlah job yang berjalan bersamaan (default: 4)")
+    parser.add_argument(
+        "--konkurensi", type=int, default=16,
+        help="Batas request API bersamaan untuk SEMUA job (default: 16)"
+    )
+    parser.add_argument("--tanpa-cache", action="store_true", help="Jangan gunakan cache hasil penilaian")
+    parser.add_argument("--tanpa-riwayat", action="store_true", help="Jangan simpan hasil ke riwayat penilaian")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = buat_parser().parse_args(argv)
+    load_dotenv()
+    daftar_kunci = kunci_dari_env()
+    if not daftar_kunci:
+        print("GROQ_API_KEY (atau GROQ_API_KEYS) tidak ditemukan. Tambahkan ke file .env atau environment.",
+              file=sys.stderr)
+        return 2
+    token = os.getenv("TOKEN_LAYANAN")
+    if not token and args.host not in ("127.0.0.1", "localhost"):
+        print("Peringatan: TOKEN_LAYANAN tidak diatur, layanan terbuka tanpa autentikasi.", file=sys.stderr)
+
+    klien = dapatkan_kumpulan_klien(daftar_kunci, max_koneksi=max(MAX_KONEKSI, args.konkurensi))
+    panaskan_koneksi(klien)
+    # Satu proses, satu ManajerJob: semua job berbagi thread pool, penjadwal, dan kuota API.
+    # Event loop uvicorn melayani banyak koneksi (upload, SSE) sekaligus tanpa worker tambahan
+    manajer = ManajerJob(
+        klien,
+        cache=None if args.tanpa_cache else CachePenilaian(),
+        folder=args.folder_job,
+        riwayat=None if args.tanpa_riwayat else RiwayatPenilaian(),
+        max_job_berjalan=args.job_paralel,
+        max_konkurensi=args.konkurensi,
+    )
+    uvicorn.run(buat_aplikasi(manajer, token), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,414 @@
+# manajer_job.py
+# File ini berisi manajer job penilaian yang berjalan di latar belakang.
+
+import json
+import os
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set
+
+from cache_penilaian import CachePenilaian
+from klien_groq import KumpulanKlien
+from metrik_penilaian import MetrikBerjalan
+from pembaca_zip import SumberArsip
+from penilai_otomatis import proses_file_zip_realtime
+from penjadwal_api import PenjadwalAPI
+from riwayat_penilaian import RiwayatPenilaian
+from statistik_penilaian import StatistikBerjalan
+
+FOLDER_JOB = ".job_penilaian"
+# Job yang sudah selesai dan lebih tua dari ini dihapus saat manajer dibuat
+MAX_UMUR_JOB_DETIK = 7 * 24 * 3600
+# Jeda minimal antar penulisan status.json selama job berjalan
+INTERVAL_SIMPAN_STATUS = 1.0
+
+STATUS_MENUNGGU = "menunggu"
+STATUS_BERJALAN = "berjalan"
+STATUS_SELESAI = "selesai"
+STATUS_GAGAL = "gagal"
+STATUS_DIBATALKAN = "dibatalkan"
+STATUS_AKTIF = (STATUS_MENUNGGU, STATUS_BERJALAN)
+
+
+def _buka_jsonl_tambah(path: str):
+    """Membuka file JSONL untuk ditambah; baris terakhir yang terpotong dipisahkan dengan newline."""
+    perlu_newline = False
+    if os.path.exists(path) and os.path.getsize(path):
+        with open(path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            perlu_newline = f.read(1) != b"\n"
+    file = open(path, "a", encoding="utf-8")
+    if perlu_newline:
+        file.write("\n")
+    return file
+
+
+class Job:
+    """State satu job penilaian. Diperbarui oleh thread worker, dibaca oleh UI lewat snapshot()."""
+
+    def __init__(self, id: str, nama_arsip: str, pengaturan: Dict[str, Any], dibuat: float):
+        self.id = id
+        self.nama_arsip = nama_arsip
+        self.pengaturan = pengaturan
+        self.status = STATUS_MENUNGGU
+        self.dibuat = dibuat
+        self.dimulai: Optional[float] = None
+        self.selesai: Optional[float] = None
+        self.total = 0
+        self.current = 0
+        self.file_name = ""
+        self.batch = {'batch': 0, 'file': 0, 'request': 0, 'token': 0}
+        self.error: List[str] = []
+        self.hasil: Dict[int, Dict[str, Any]] = {}
+        # Index hasil sesuai urutan datangnya, untuk mengirim hasil baru saja (lihat perubahan_sejak)
+        self.urutan_hasil: List[int] = []
+        # Hasil sementara file yang sedang dinilai (mode streaming); tidak disimpan ke disk
+        self.parsial: Dict[int, Dict[str, Any]] = {}
+        self.statistik = StatistikBerjalan()
+        self.metrik = MetrikBerjalan(mulai=dibuat)
+        # Naik setiap ada perubahan, agar UI cukup me-render ulang jika versinya berbeda
+        self.versi = 0
+        self._dibatalkan = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def aktif(self) -> bool:
+        return self.status in STATUS_AKTIF
+
+    def terapkan(self, event: Dict[str, Any]) -> None:
+        """Memperbarui state dari satu event proses_file_zip_realtime."""
+        with self._lock:
+            if event['type'] == 'progress':
+                self.total = event['total']
+                self.current = event['current']
+                self.file_name = event['file_name']
+            elif event['type'] == 'partial':
+                self.parsial[event['index']] = event['data']
+            elif event['type'] == 'result':
+                self.parsial.pop(event['index'], None)
+                self.tambah_hasil(event['index'], event['data'])
+                self.statistik.tambah(event['data'].get('nilai'))
+                self.metrik.tambah(event['data'])
+            elif event['type'] == 'batch':
+                self.batch['batch'] += 1
+                self.batch['file'] += event['jumlah_file']
+                self.batch['request'] += event['jumlah_request']
+                self.batch['token'] += event['token_estimasi']
+            elif event['type'] == 'error':
+                self.error.append(event['message'])
+            self.versi += 1
+
+    def tambah_hasil(self, index: int, hasil: Dict[str, Any]) -> None:
+        if index not in self.hasil:
+            self.urutan_hasil.append(index)
+        self.hasil[index] = hasil
+
+    def perubahan_sejak(self, jumlah_hasil: int, jumlah_error: int) -> Dict[str, Any]:
+        """
+        Progress, status, serta hasil dan error yang datang setelah `jumlah_hasil` hasil dan
+        `jumlah_error` error pertama. Dipakai untuk streaming event tanpa menyalin semua hasil.
+        """
+        with self._lock:
+            return {
+                'versi': self.versi,
+                'status': self.status,
+                'total': self.total,
+                'current': self.current,
+                'file_name': self.file_name,
+                'hasil': [(i, self.hasil[i]) for i in self.urutan_hasil[jumlah_hasil:]],
+                'error': self.error[jumlah_error:],
+            }
+
+    def ubah_status(self, status: str) -> None:
+        with self._lock:
+            self.status = status
+            if status == STATUS_BERJALAN:
+                self.dimulai = self.dimulai or time.time()
+                self.metrik.mulai = self.dimulai
+            elif status not in STATUS_AKTIF:
+                self.parsial.clear()
+                self.selesai = time.time()
+                self.metrik.selesai = self.selesai
+            self.versi += 1
+
+    def snapshot(self, hasil_sejak: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Salinan state yang konsisten, termasuk daftar hasil yang diurutkan sesuai index file.
+        Jika `hasil_sejak` diisi, 'hasil' hanya berisi pasangan (index, hasil) yang datang setelah
+        `hasil_sejak` hasil pertama (urutan datang, tanpa mengurutkan/menyalin semua hasil).
+        """
+        with self._lock:
+            data = self.ke_dict()
+            if hasil_sejak is None:
+                data['hasil'] = [hasil for _, hasil in sorted(self.hasil.items())]
+            else:
+                data['hasil'] = [(i, self.hasil[i]) for i in self.urutan_hasil[hasil_sejak:]]
+            data['jumlah_hasil'] = len(self.urutan_hasil)
+            data['parsial'] = [dict(parsial) for _, parsial in sorted(self.parsial.items())]
+            data['statistik'] = self.statistik.ringkasan()
+            data['metrik'] = self.metrik.ringkasan()
+            data['versi'] = self.versi
+            return data
+
+    def ekspor_metrik(self, format: str) -> str:
+        """Metrik run dalam format 'json' atau 'prometheus' (label job=<ID>)."""
+        with self._lock:
+            if format == "json":
+                return self.metrik.ke_json()
+            return self.metrik.ke_prometheus({"job": self.id})
+
+    def ke_dict(self) -> Dict[str, Any]:
+        """State tanpa hasil, untuk status.json."""
+        return {
+            'id': self.id,
+            'nama_arsip': self.nama_arsip,
+            'pengaturan': self.pengaturan,
+            'status': self.status,
+            'dibuat': self.dibuat,
+            'dimulai': self.dimulai,
+            'selesai': self.selesai,
+            'total': self.total,
+            'current': self.current,
+            'file_name': self.file_name,
+            'batch': dict(self.batch),
+            'error': list(self.error),
+        }
+
+    @classmethod
+    def dari_dict(cls, data: Dict[str, Any]) -> "Job":
+        job = cls(data['id'], data['nama_arsip'], data['pengaturan'], data['dibuat'])
+        job.status = data['status']
+        job.dimulai = data.get('dimulai')
+        job.selesai = data.get('selesai')
+        job.total = data.get('total', 0)
+        job.current = data.get('current', 0)
+        job.file_name = data.get('file_name', "")
+        job.batch.update(data.get('batch', {}))
+        job.error = list(data.get('error', []))
+        job.metrik.mulai = job.dimulai or job.dibuat
+        job.metrik.selesai = job.selesai
+        return job
+
+
+class ManajerJob:
+    """
+    Menjalankan job penilaian di latar belakang.
+
+    - Setiap job berjalan di thread dari pool job (`max_job_berjalan`); job lain mengantre.
+    - Penilaian file dari semua job memakai satu thread pool bersama (`max_konkurensi`) dan satu
+      PenjadwalAPI, sehingga batas konkurensi dan kuota rate limit berlaku global.
+    - Folder tiap job berisi input.json (soal, kriteria), arsip.zip (dihapus setelah job
+      selesai), status.json (pengaturan & progress), dan hasil.jsonl (satu hasil per baris).
+    - Job yang masih aktif saat proses berhenti dilanjutkan ketika manajer dibuat lagi; file yang
+      sudah berhasil dinilai tidak dinilai ulang.
+
+    Satu instance dipakai bersama oleh semua sesi Streamlit (lihat st.cache_resource di app.py).
+    """
+
+    def __init__(
+        self,
+        client: Any,
+        cache: Optional[CachePenilaian] = None,
+        folder: str = FOLDER_JOB,
+        riwayat: Optional[RiwayatPenilaian] = None,
+        max_job_berjalan: int = 4,
+        max_konkurensi: int = 16,
+        max_umur_detik: float = MAX_UMUR_JOB_DETIK
+    ):
+        self.client = client
+        self.cache = cache
+        self.riwayat = riwayat
+        self.folder = folder
+        self.max_umur_detik = max_umur_detik
+        self.penjadwal = PenjadwalAPI(
+            max_konkurensi=max_konkurensi,
+            jumlah_akun=len(client.anggota) if isinstance(client, KumpulanKlien) else 1
+        )
+        self._pool_job = ThreadPoolExecutor(max_workers=max_job_berjalan, thread_name_prefix="job")
+        self._pool_file = ThreadPoolExecutor(max_workers=max_konkurensi, thread_name_prefix="penilai")
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        os.makedirs(folder, exist_ok=True)
+        self._muat_semua()
+
+    def _folder_job(self, id: str) -> str:
+        return os.path.join(self.folder, id)
+
+    def buat_job(
+        self,
+        arsip: SumberArsip,
+        nama_arsip: str,
+        soal_text: str,
+        kriteria_text: str,
+        **pengaturan: Any
+    ) -> str:
+        """
+        Menyimpan arsip dan input ke disk, lalu mengantrekan job. Mengembalikan ID job.
+        `pengaturan` diteruskan ke proses_file_zip_realtime (model, temperature, max_workers,
+        deteksi_duplikat, token_per_batch, minifikasi, strategi_file_besar, streaming,
+        per_mahasiswa, saringan_awal, model_eskalasi, rentang_nilai_ragu, batas_keyakinan,
+        nama_tugas), ditambah `gunakan_cache` (default True). Jika manajer punya riwayat, hasil job
+        disimpan ke riwayat dengan ID job sebagai ID run.
+        """
+        id = uuid.uuid4().hex[:12]
+        folder = self._folder_job(id)
+        os.makedirs(folder)
+        path_zip = os.path.join(folder, "arsip.zip")
+        if isinstance(arsip, (bytes, bytearray, memoryview)):
+            with open(path_zip, "wb") as f:
+                f.write(arsip)
+        elif isinstance(arsip, (str, os.PathLike)):
+            shutil.copyfile(arsip, path_zip)
+        else:
+            if hasattr(arsip, 'seek'):
+                arsip.seek(0)
+            with open(path_zip, "wb") as f:
+                shutil.copyfileobj(arsip, f, length=1024 * 1024)
+
+        with open(os.path.join(folder, "input.json"), "w", encoding="utf-8") as f:
+            json.dump({'soal_text': soal_text, 'kriteria_text': kriteria_text}, f, ensure_ascii=False)
+
+        job = Job(id, nama_arsip, pengaturan, time.time())
+        with self._lock:
+            self._jobs[id] = job
+        self._simpan_status(job)
+        self._pool_job.submit(self._jalankan, job, set())
+        return id
+
+    def ambil(self, id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(id)
+
+    def daftar(self) -> List[Job]:
+        """Semua job, terbaru lebih dulu."""
+        with self._lock:
+            return sorted(self._jobs.values(), key=lambda job: job.dibuat, reverse=True)
+
+    def batalkan(self, id: str) -> bool:
+        """Meminta job berhenti. File yang sedang dinilai diselesaikan, sisanya dibatalkan."""
+        job = self.ambil(id)
+        if job is None or not job.aktif:
+            return False
+        job._dibatalkan.set()
+        if job.status == STATUS_MENUNGGU:
+            job.ubah_status(STATUS_DIBATALKAN)
+            self._simpan_status(job)
+        return True
+
+    def statistik(self) -> Dict[str, Any]:
+        """Jumlah job per status aktif dan aktivitas penjadwal API bersama."""
+        jobs = self.daftar()
+        return {
+            'berjalan': sum(1 for job in jobs if job.status == STATUS_BERJALAN),
+            'menunggu': sum(1 for job in jobs if job.status == STATUS_MENUNGGU),
+            **self.penjadwal.statistik(),
+        }
+
+    def _simpan_status(self, job: Job) -> None:
+        """Menulis status.json secara atomik (tulis file sementara lalu rename)."""
+        path = os.path.join(self._folder_job(job.id), "status.json")
+        with job._lock:
+            data = job.ke_dict()
+        with open(path + ".tmp", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(path + ".tmp", path)
+
+    def _jalankan(self, job: Job, lewati_file: Set[str]) -> None:
+        if job._dibatalkan.is_set():
+            return
+        folder = self._folder_job(job.id)
+        job.ubah_status(STATUS_BERJALAN)
+        self._simpan_status(job)
+        pengaturan = dict(job.pengaturan)
+        gunakan_cache = pengaturan.pop('gunakan_cache', True)
+        try:
+            with open(os.path.join(folder, "input.json"), "r", encoding="utf-8") as f:
+                masukan = json.load(f)
+            proses = proses_file_zip_realtime(
+                client=self.client,
+                zip_file_bytes=os.path.join(folder, "arsip.zip"),
+                soal_text=masukan['soal_text'],
+                kriteria_text=masukan['kriteria_text'],
+                cache=self.cache if gunakan_cache else None,
+                penjadwal=self.penjadwal,
+                lewati_file=lewati_file,
+                executor=self._pool_file,
+                riwayat=self.riwayat,
+                id_run=job.id,
+                **pengaturan
+            )
+            terakhir_simpan = 0.0
+            with _buka_jsonl_tambah(os.path.join(folder, "hasil.jsonl")) as file_hasil:
+                for event in proses:
+                    if job._dibatalkan.is_set():
+                        proses.close()
+                        break
+                    job.terapkan(event)
+                    if event['type'] == 'result':
+                        baris = {'index': event['index'], 'data': event['data']}
+                        file_hasil.write(json.dumps(baris, ensure_ascii=False) + "\n")
+                        file_hasil.flush()
+                    if time.time() - terakhir_simpan >= INTERVAL_SIMPAN_STATUS:
+                        self._simpan_status(job)
+                        terakhir_simpan = time.time()
+            if job._dibatalkan.is_set():
+                job.ubah_status(STATUS_DIBATALKAN)
+            else:
+                job.ubah_status(STATUS_GAGAL if job.error else STATUS_SELESAI)
+        except Exception as e:
+            print(f"Job {job.id} gagal: {e}")
+            job.terapkan({'type': 'error', 'message': f"Terjadi error tak terduga: {e}"})
+            job.ubah_status(STATUS_GAGAL)
+        finally:
+            self._simpan_status(job)
+            if not job.aktif:
+                path_zip = os.path.join(folder, "arsip.zip")
+                if os.path.exists(path_zip):
+                    os.remove(path_zip)
+
+    def _muat_semua(self) -> None:
+        """Memuat job dari disk, menghapus job lama, dan melanjutkan job yang terputus."""
+        sekarang = time.time()
+        for id in os.listdir(self.folder):
+            folder = self._folder_job(id)
+            try:
+                with open(os.path.join(folder, "status.json"), "r", encoding="utf-8") as f:
+                    job = Job.dari_dict(json.load(f))
+            except (OSError, ValueError, KeyError):
+                continue
+            if not job.aktif and sekarang - (job.selesai or job.dibuat) > self.max_umur_detik:
+                shutil.rmtree(folder, ignore_errors=True)
+                continue
+
+            path_hasil = os.path.join(folder, "hasil.jsonl")
+            if os.path.exists(path_hasil):
+                with open(path_hasil, "r", encoding="utf-8") as f:
+                    for baris in f:
+                        try:
+                            entri = json.loads(baris)
+                        except ValueError:
+                            # Baris terakhir bisa terpotong jika proses berhenti saat menulis
+                            continue
+                        # Hasil gagal dari run yang terputus dinilai ulang saat job dilanjutkan
+                        if job.aktif and entri['data'].get('kesalahan') == "GAGAL proses":
+                            continue
+                        job.tambah_hasil(entri['index'], entri['data'])
+            for hasil in job.hasil.values():
+                job.statistik.tambah(hasil.get('nilai'))
+                job.metrik.tambah(hasil)
+            self._jobs[id] = job
+
+            if job.aktif:
+                if os.path.exists(os.path.join(folder, "arsip.zip")):
+                    print(f"Melanjutkan job {id}: {len(job.hasil)} file sudah dinilai.")
+                    job.status = STATUS_MENUNGGU
+                    self._pool_job.submit(
+                        self._jalankan, job, {hasil['nama_file'] for hasil in job.hasil.values()}
+                    )
+                else:
+                    job.error.append("Arsip job tidak ditemukan, job tidak bisa dilanjutkan.")
+                    job.ubah_status(STATUS_GAGAL)
+                    self._simpan_status(job)
@@ -0,0 +1,167 @@
+# metrik_penilaian.py
+# File ini berisi metrik waktu dan pemakaian token per file dan per run.
+
+import json
+import time
+from typing import Any, Dict, List, Optional
+
+# Kolom metrik yang ditambahkan ke setiap hasil penilaian
+KOLOM_WAKTU = ("waktu_baca", "latensi_api", "waktu_parse")
+KOLOM_METRIK = KOLOM_WAKTU + ("jumlah_retry", "token_prompt", "token_completion")
+
+PERSENTIL = (50, 95)
+
+_KETERANGAN = {
+    "waktu_baca": "Waktu membaca dan decode file dari ZIP (detik).",
+    "latensi_api": "Waktu menunggu API per file, termasuk retry (detik).",
+    "waktu_parse": "Waktu mem-parsing dan memvalidasi output JSON model (detik).",
+}
+
+
+def metrik_kosong() -> Dict[str, Any]:
+    """Nilai awal metrik satu file (juga dipakai untuk hasil dari cache / gagal baca)."""
+    return {"waktu_baca": 0.0, "latensi_api": 0.0, "waktu_parse": 0.0,
+            "jumlah_retry": 0, "token_prompt": 0, "token_completion": 0}
+
+def catat_usage(metrik: Dict[str, Any], completion: Any) -> None:
+    """Menambahkan `completion.usage` (prompt/completion tokens) dari respons Groq ke metrik."""
+    usage = getattr(completion, "usage", None)
+    for kolom, atribut in (("token_prompt", "prompt_tokens"), ("token_completion", "completion_tokens")):
+        nilai = getattr(usage, atribut, None)
+        if isinstance(nilai, int):
+            metrik[kolom] += nilai
+
+def bulatkan(metrik: Dict[str, Any]) -> Dict[str, Any]:
+    """Membulatkan kolom waktu ke 0.1 ms agar hasil ekspor tetap rapi."""
+    for kolom in KOLOM_WAKTU:
+        if kolom in metrik:
+            metrik[kolom] = round(metrik[kolom], 4)
+    return metrik
+
+def persentil(data: List[float], p: float) -> float:
+    """Persentil (metode nearest-rank) dari data; 0.0 untuk data kosong."""
+    if not data:
+        return 0.0
+    urut = sorted(data)
+    indeks = max(0, min(len(urut) - 1, int(round(p / 100 * len(urut) + 0.5)) - 1))
+    return urut[indeks]
+
+
+class MetrikBerjalan:
+    """
+    Agregat metrik satu run: total dan persentil waktu per tahap, retry, token, dan throughput.
+    Waktu per file disimpan (satu float per file) agar persentil bisa dihitung tepat.
+    """
+
+    def __init__(self, mulai: Optional[float] = None):
+        self.mulai = mulai if mulai is not None else time.time()
+        self.selesai: Optional[float] = None
+        self.jumlah_file = 0
+        self.waktu: Dict[str, List[float]] = {kolom: [] for kolom in KOLOM_WAKTU}
+        self.total: Dict[str, float] = {kolom: 0 for kolom in KOLOM_METRIK}
+        # Mode kaskade: jumlah file yang dinilai dengan kaskade dan yang dieskalasi per alasan
+        self.jumlah_kaskade = 0
+        self.eskalasi: Dict[str, int] = {}
+
+    def tambah(self, hasil: Dict[str, Any]) -> None:
+        """Memasukkan metrik dari satu hasil penilaian; kolom yang tidak ada dianggap 0."""
+        self.jumlah_file += 1
+        for kolom in KOLOM_METRIK:
+            nilai = hasil.get(kolom) or 0
+            self.total[kolom] += nilai
+            if kolom in self.waktu:
+                self.waktu[kolom].append(nilai)
+        if "eskalasi" in hasil:
+            self.jumlah_kaskade += 1
+            if hasil["eskalasi"]:
+                self.eskalasi[hasil["eskalasi"]] = self.eskalasi.get(hasil["eskalasi"], 0) + 1
+
+    def gabung(self, lain: "MetrikBerjalan") -> None:
+        """Menggabungkan metrik run lain (mis. arsip lain) ke metrik ini; durasi tidak ikut dijumlah."""
+        self.jumlah_file += lain.jumlah_file
+        for kolom in KOLOM_METRIK:
+            self.total[kolom] += lain.total[kolom]
+        for kolom in KOLOM_WAKTU:
+            self.waktu[kolom].extend(lain.waktu[kolom])
+        self.jumlah_kaskade += lain.jumlah_kaskade
+        for alasan, jumlah in lain.eskalasi.items():
+            self.eskalasi[alasan] = self.eskalasi.get(alasan, 0) + jumlah
+
+    @property
+    def durasi(self) -> float:
+        return max(0.0, (self.selesai or time.time()) - self.mulai)
+
+    def ringkasan(self) -> Dict[str, Any]:
+        """Ringkasan dalam bentuk dict (untuk UI dan JSON)."""
+        durasi = self.durasi
+        token_total = self.total["token_prompt"] + self.total["token_completion"]
+        data: Dict[str, Any] = {
+            "jumlah_file": self.jumlah_file,
+            "durasi_detik": round(durasi, 3),
+            "file_per_detik": round(self.jumlah_file / durasi, 3) if durasi else 0.0,
+        }
+        for kolom in KOLOM_WAKTU:
+            data[kolom] = {
+                "total": round(self.total[kolom], 3),
+                **{f"p{p}": round(persentil(self.waktu[kolom], p), 4) for p in PERSENTIL},
+                "maks": round(max(self.waktu[kolom], default=0.0), 4),
+            }
+        data.update({
+            "jumlah_retry": self.total["jumlah_retry"],
+            "token_prompt": self.total["token_prompt"],
+            "token_completion": self.total["token_completion"],
+            "token_per_detik": round(token_total / durasi, 1) if durasi else 0.0,
+            # Kecepatan generate model: token output per detik menunggu API
+            "token_completion_per_detik_api": (
+                round(self.total["token_completion"] / self.total["latensi_api"], 1)
+                if self.total["latensi_api"] else 0.0
+            ),
+        })
+        if self.jumlah_kaskade:
+            jumlah_eskalasi = sum(self.eskalasi.values())
+            data.update({
+                "jumlah_kaskade": self.jumlah_kaskade,
+                "jumlah_eskalasi": jumlah_eskalasi,
+                "fraksi_eskalasi": round(jumlah_eskalasi / self.jumlah_kaskade, 4),
+                "eskalasi_per_alasan": dict(self.eskalasi),
+            })
+        return data
+
+    def ke_json(self) -> str:
+        return json.dumps(self.ringkasan(), ensure_ascii=False, indent=2)
+
+    def ke_prometheus(self, label: Optional[Dict[str, str]] = None, awalan: str = "penilai") -> str:
+        """Metrik dalam format teks eksposisi Prometheus (mis. untuk node_exporter textfile collector)."""
+        teks_label = ",".join(f'{k}="{v}"' for k, v in (label or {}).items())
+
+        def seri(nama: str, nilai: Any, tambahan: str = "") -> str:
+            isi = ",".join(x for x in (teks_label, tambahan) if x)
+            return f"{nama}{{{isi}}} {nilai}" if isi else f"{nama} {nilai}"
+
+        baris = []
+
+        def metrik(nama: str, jenis: str, keterangan: str, nilai: Any) -> None:
+            baris.extend([f"# HELP {nama} {keterangan}", f"# TYPE {nama} {jenis}", seri(nama, nilai)])
+
+        metrik(f"{awalan}_file_total", "counter", "Jumlah file yang sudah dinilai.", self.jumlah_file)
+        metrik(f"{awalan}_durasi_detik", "gauge", "Lama run penilaian (detik).", round(self.durasi, 3))
+        for kolom in KOLOM_WAKTU:
+            nama = f"{awalan}_{kolom}_detik"
+            baris.extend([f"# HELP {nama} {_KETERANGAN[kolom]}", f"# TYPE {nama} summary"])
+            for p in PERSENTIL:
+                baris.append(seri(nama, round(persentil(self.waktu[kolom], p), 4), f'quantile="{p / 100}"'))
+            baris.append(seri(f"{nama}_sum", round(self.total[kolom], 4)))
+            baris.append(seri(f"{nama}_count", len(self.waktu[kolom])))
+        metrik(f"{awalan}_retry_total", "counter", "Jumlah retry API dan parsing.", self.total["jumlah_retry"])
+        metrik(f"{awalan}_token_prompt_total", "counter", "Token prompt menurut completion.usage.",
+               self.total["token_prompt"])
+        metrik(f"{awalan}_token_completion_total", "counter", "Token completion menurut completion.usage.",
+               self.total["token_completion"])
+        if self.jumlah_kaskade:
+            metrik(f"{awalan}_kaskade_total", "counter", "Jumlah file yang dinilai dengan mode kaskade.",
+                   self.jumlah_kaskade)
+            nama = f"{awalan}_eskalasi_total"
+            baris.extend([f"# HELP {nama} Jumlah file yang dinilai ulang oleh model besar.", f"# TYPE {nama} counter"])
+            for alasan, jumlah in sorted(self.eskalasi.items()):
+                baris.append(seri(nama, jumlah, f'alasan="{alasan}"'))
+        return "\n".join(baris) + "\n"
@@ -0,0 +1,177 @@
+# pages/1_📚_Riwayat_Penilaian.py
+# Halaman analitik riwayat penilaian (multipage Streamlit).
+
+import datetime
+import time
+
+import pandas as pd
+import streamlit as st
+
+from riwayat_penilaian import LEBAR_KELAS_NILAI, RiwayatPenilaian
+
+st.set_page_config(page_title="Riwayat Penilaian", page_icon="📚", layout="wide")
+
+SEMUA = "(semua)"
+MAX_DETAIL = 500
+
+
+@st.cache_resource
+def dapatkan_riwayat() -> RiwayatPenilaian:
+    """Koneksi ke riwayat penilaian (file SQLite yang sama dengan yang ditulis job penilaian)."""
+    return RiwayatPenilaian()
+
+
+def format_waktu(df: pd.DataFrame, *kolom: str) -> pd.DataFrame:
+    for k in kolom:
+        if k in df:
+            df[k] = df[k].map(lambda t: time.strftime("%Y-%m-%d %H:%M", time.localtime(t)))
+    return df
+
+
+riwayat = dapatkan_riwayat()
+
+st.title("📚 Riwayat Penilaian")
+st.markdown("Bandingkan nilai lintas tugas, mahasiswa, model, dan versi prompt dari semua penilaian yang pernah dijalankan.")
+
+statistik = riwayat.statistik()
+if not statistik['hasil']:
+    st.info("Belum ada hasil di riwayat. Hasil setiap job penilaian otomatis tersimpan di sini.")
+    st.stop()
+
+# --- Filter ---
+st.sidebar.header("🔎 Filter")
+pilihan_tugas = st.sidebar.selectbox("Tugas:", [SEMUA] + riwayat.daftar_nilai("tugas"))
+pilihan_model = st.sidebar.selectbox("Model:", [SEMUA] + riwayat.daftar_nilai("model"))
+pilihan_mahasiswa = st.sidebar.selectbox(
+    "Mahasiswa:", [SEMUA] + riwayat.daftar_nilai("mahasiswa"),
+    help="Ketik untuk mencari NIM/nama folder mahasiswa."
+)
+rentang_tanggal = st.sidebar.date_input("Rentang tanggal:", value=(), help="Kosongkan untuk semua waktu.")
+hanya_terakhir = st.sidebar.checkbox(
+    "Hanya hasil terbaru",
+    value=True,
+    help="Jika satu mahasiswa dinilai beberapa kali untuk tugas dan model yang sama, hanya hasil terakhir "
+         "yang dihitung. Pada mode kaskade, model kecil dan model eskalasinya dihitung sebagai satu model."
+)
+
+filter = {'hanya_terakhir': hanya_terakhir}
+if pilihan_tugas != SEMUA:
+    filter['tugas'] = pilihan_tugas
+if pilihan_model != SEMUA:
+    filter['model'] = pilihan_model
+if pilihan_mahasiswa != SEMUA:
+    filter['mahasiswa'] = pilihan_mahasiswa
+if len(rentang_tanggal) == 2:
+    filter['sejak'] = time.mktime(rentang_tanggal[0].timetuple())
+    filter['sampai'] = time.mktime((rentang_tanggal[1] + datetime.timedelta(days=1)).timetuple())
+
+st.sidebar.markdown("---")
+st.sidebar.caption(
+    f"🗄️ **{statistik['hasil']}** hasil dari **{statistik['run']}** run, **{statistik['tugas']}** tugas, "
+    f"**{statistik['mahasiswa']}** mahasiswa"
+)
+
+# --- Ringkasan ---
+ringkasan = riwayat.agregat(None, **filter)
+if not ringkasan:
+    st.warning("Tidak ada hasil yang cocok dengan filter.")
+    st.stop()
+total = ringkasan[0]
+col1, col2, col3, col4, col5 = st.columns(5)
+col1.metric("📁 Hasil", total['jumlah'])
+col2.metric("🎓 Mahasiswa", total['jumlah_mahasiswa'])
+col3.metric("📊 Rata-rata", f"{total['rata_rata']:.1f}" if total['rata_rata'] is not None else "-")
+col4.metric("❌ Gagal", total['gagal'])
+col5.metric("🔤 Token", f"{(total['token_prompt'] or 0) + (total['token_completion'] or 0):,}")
+
+tab_model, tab_tugas, tab_mahasiswa, tab_tren, tab_detail = st.tabs(
+    ["🤖 Per Model", "📝 Per Tugas", "🎓 Per Mahasiswa", "📈 Tren Harian", "📄 Detail"]
+)
+
+KOLOM_AGREGAT = {
+    'jumlah': "Hasil", 'jumlah_mahasiswa': "Mahasiswa", 'rata_rata': "Rata-rata",
+    'simpangan_baku': "Simpangan baku", 'min': "Min", 'maks': "Maks", 'gagal': "Gagal",
+    'token_prompt': "Token prompt", 'token_completion': "Token completion",
+    'rata_latensi_api': "Latensi API (s)", 'pertama': "Pertama", 'terakhir': "Terakhir",
+}
+
+
+def tabel_agregat(kelompok: str, judul: str) -> None:
+    df = pd.DataFrame(riwayat.agregat(kelompok, **filter))
+    if df.empty:
+        st.info("Tidak ada data.")
+        return
+    df = format_waktu(df, 'pertama', 'terakhir')
+    kolom = [k for k in KOLOM_AGREGAT if not (kelompok == 'mahasiswa' and k == 'jumlah_mahasiswa')]
+    df = df[[kelompok] + kolom].rename(columns={kelompok: judul, **KOLOM_AGREGAT})
+    st.dataframe(df.round(2), use_container_width=True, hide_index=True)
+
+
+def grafik_distribusi(kelompok: str) -> None:
+    df = pd.DataFrame(riwayat.distribusi_nilai(kelompok, LEBAR_KELAS_NILAI, **filter))
+    if df.empty:
+        return
+    # Kelas teratas juga memuat nilai 100
+    teratas = (100 - 1) // LEBAR_KELAS_NILAI * LEBAR_KELAS_NILAI
+    df['kelas'] = df['kelas'].map(
+        lambda k: f"{k:02d}-{100 if k == teratas else k + LEBAR_KELAS_NILAI - 1}"
+    )
+    st.bar_chart(df.pivot(index='kelas', columns=kelompok, values='jumlah').fillna(0))
+
+
+with tab_model:
+    st.subheader("Statistik per model")
+    tabel_agregat('model', "Model")
+    st.subheader("Distribusi nilai per model")
+    grafik_distribusi('model')
+
+with tab_tugas:
+    st.subheader("Statistik per tugas")
+    tabel_agregat('tugas', "Tugas")
+    st.subheader("Distribusi nilai per tugas")
+    grafik_distribusi('tugas')
+    st.subheader("Statistik per versi prompt")
+    st.caption("Soal, kriteria, atau mode penilaian yang berbeda menghasilkan hash prompt yang berbeda.")
+    tabel_agregat('prompt', "Hash prompt")
+
+with tab_mahasiswa:
+    st.subheader("Nilai mahasiswa di semua tugas")
+    st.caption("Nilai terbaru setiap mahasiswa per tugas (dan model); rata-rata jika ada beberapa file.")
+    rekap = pd.DataFrame(riwayat.nilai_mahasiswa(**{k: v for k, v in filter.items() if k != 'hanya_terakhir'}))
+    if rekap.empty:
+        st.info("Tidak ada data.")
+    else:
+        if rekap['model_run'].nunique() > 1:
+            # Tanpa prefix penyedia, mis. "openai/gpt-oss-20b>openai/gpt-oss-120b" -> "gpt-oss-20b>gpt-oss-120b"
+            rekap['tugas'] = rekap['tugas'] + " (" + rekap['model_run'].str.replace(r'[^>]*/', '', regex=True) + ")"
+        tabel = rekap.pivot_table(index='mahasiswa', columns='tugas', values='nilai', aggfunc='mean')
+        st.dataframe(tabel, use_container_width=True)
+    st.subheader("Statistik per mahasiswa")
+    tabel_agregat('mahasiswa', "Mahasiswa")
+
+with tab_tren:
+    st.subheader("Rata-rata nilai dan jumlah hasil per hari")
+    df = pd.DataFrame(riwayat.agregat('hari', **filter))
+    if df.empty:
+        st.info("Tidak ada data.")
+    else:
+        df = df.set_index('hari')
+        st.line_chart(df[['rata_rata']].rename(columns={'rata_rata': "Rata-rata"}))
+        st.bar_chart(df[['jumlah']].rename(columns={'jumlah': "Hasil"}))
+
+with tab_detail:
+    st.subheader(f"Hasil terbaru (maksimal {MAX_DETAIL})")
+    detail = pd.DataFrame(riwayat.cari(MAX_DETAIL, **filter))
+    if detail.empty:
+        st.info("Tidak ada data.")
+    else:
+        kolom_depan = ['waktu', 'tugas', 'mahasiswa', 'nama_file', 'model', 'nilai', 'kesalahan', 'feedback']
+        detail = format_waktu(detail, 'waktu')
+        detail = detail[[k for k in kolom_depan if k in detail] + [k for k in detail if k not in kolom_depan]]
+        st.dataframe(detail, use_container_width=True, hide_index=True)
+        st.download_button(
+            "⬇️ Download CSV",
+            detail.to_csv(index=False).encode('utf-8'),
+            file_name="riwayat_penilaian.csv",
+            mime="text/csv"
+        )
@@ -0,0 +1,115 @@
+# pembaca_pdf.py
+# File ini berisi ekstraksi teks soal dari PDF.
+
+import atexit
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import List, Optional, Sequence
+
+# Jumlah hasil ekstraksi yang disimpan di memo (yang paling lama tidak dipakai dibuang lebih dulu)
+MAX_MEMO_PDF = 16
+# PDF dengan jumlah halaman terpilih sebanyak ini atau lebih diekstrak paralel
+BATAS_HALAMAN_PARALEL = 16
+MAX_PROSES_PDF = min(4, os.cpu_count() or 1)
+
+# (hash isi PDF, rentang halaman) -> teks soal
+_memo: OrderedDict = OrderedDict()
+_lock_memo = threading.Lock()
+_pool: Optional[ProcessPoolExecutor] = None
+_lock_pool = threading.Lock()
+
+
+def parse_rentang_halaman(teks: str, jumlah_halaman: int) -> List[int]:
+    """
+    Mengubah teks rentang halaman seperti "1-3, 5, 8-" menjadi daftar index halaman (dimulai 0).
+    Teks kosong berarti semua halaman. Halaman di luar dokumen diabaikan.
+    """
+    if not teks or not teks.strip():
+        return list(range(jumlah_halaman))
+    halaman = []
+    for bagian in teks.split(","):
+        bagian = bagian.strip()
+        if not bagian:
+            continue
+        awal, pisah, akhir = bagian.partition("-")
+        try:
+            awal_i = int(awal) if awal.strip() else 1
+            akhir_i = (int(akhir) if akhir.strip() else jumlah_halaman) if pisah else awal_i
+        except ValueError:
+            raise ValueError(f"Rentang halaman tidak valid: '{bagian}'")
+        for nomor in range(max(1, awal_i), min(jumlah_halaman, akhir_i) + 1):
+            if nomor - 1 not in halaman:
+                halaman.append(nomor - 1)
+    return halaman
+
+def _ekstrak_halaman(file_bytes: bytes, halaman: Sequence[int]) -> List[str]:
+    """Mengekstrak teks beberapa halaman. Halaman tanpa teks (hasil scan/gambar) menjadi string kosong."""
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(file_bytes))
+    return [reader.pages[i].extract_text() or "" for i in halaman]
+
+def _dapatkan_pool() -> ProcessPoolExecutor:
+    # pypdf murni Python (terikat GIL), jadi paralelisme butuh proses, bukan thread. Pool dibuat
+    # sekali dan dipakai ulang agar biaya start proses tidak dibayar setiap kali PDF dibaca.
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROSES_PDF, mp_context=get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+def _ekstrak_paralel(file_bytes: bytes, halaman: List[int]) -> List[str]:
+    ukuran = -(-len(halaman) // MAX_PROSES_PDF)
+    potongan = [halaman[i:i + ukuran] for i in range(0, len(halaman), ukuran)]
+    futures = [_dapatkan_pool().submit(_ekstrak_halaman, file_bytes, p) for p in potongan]
+    teks = []
+    for future in futures:
+        teks.extend(future.result())
+    return teks
+
+def baca_pdf(file_bytes: bytes, rentang_halaman: str = "", paralel: bool = True) -> str:
+    """
+    Membaca teks dari PDF. Hasil disimpan di memo berdasarkan hash isi file dan halaman terpilih,
+    sehingga PDF yang sama (mis. pada setiap rerun Streamlit) tidak di-parse ulang. PDF panjang
+    diekstrak paralel di beberapa proses; jika gagal, diekstrak berurutan.
+    Melempar ValueError jika `rentang_halaman` tidak valid.
+    """
+    # Memo dicek sebelum PDF dibuka sama sekali
+    kunci = (hashlib.sha256(file_bytes).hexdigest(), "".join((rentang_halaman or "").split()))
+    with _lock_memo:
+        if kunci in _memo:
+            _memo.move_to_end(kunci)
+            return _memo[kunci]
+
+    # pypdf baru di-import saat PDF pertama dibaca (CLI dengan soal teks tidak memerlukannya)
+    from pypdf import PdfReader
+
+    reader = PdfReader(io.BytesIO(file_bytes))
+    halaman = parse_rentang_halaman(rentang_halaman, len(reader.pages))
+
+    teks_halaman = None
+    if paralel and MAX_PROSES_PDF > 1 and len(halaman) >= BATAS_HALAMAN_PARALEL:
+        try:
+            teks_halaman = _ekstrak_paralel(file_bytes, halaman)
+        except Exception as e:
+            print(f"Ekstraksi PDF paralel gagal, dilanjutkan berurutan: {e}")
+    if teks_halaman is None:
+        teks_halaman = [reader.pages[i].extract_text() or "" for i in halaman]
+    teks = "\n".join(teks_halaman)
+
+    with _lock_memo:
+        _memo[kunci] = teks
+        _memo.move_to_end(kunci)
+        while len(_memo) > MAX_MEMO_PDF:
+            _memo.popitem(last=False)
+    return teks
+
+def kosongkan_memo() -> None:
+    with _lock_memo:
+        _memo.clear()
@@ -0,0 +1,232 @@
+# pembaca_zip.py
+# File ini berisi pembacaan arsip ZIP tugas dengan aman.
+
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from contextlib import contextmanager
+from typing import BinaryIO, Dict, Generator, List, Optional, Tuple, Union
+
+# Upload lebih besar dari ini ditulis ke file sementara di disk, bukan disimpan di memori
+BATAS_SPOOL_MEMORI = 8 * 1024 * 1024
+# File kode yang lebih besar dari ini (mis. dataset) dilewati dan tidak dinilai
+BATAS_UKURAN_PER_FILE = 1 * 1024 * 1024
+# Total ukuran (setelah dekompresi) semua file yang akan dinilai
+BATAS_UKURAN_TOTAL = 256 * 1024 * 1024
+# Rasio kompresi di atas ini dianggap zip bomb (kode sungguhan jarang di atas 10-20)
+BATAS_RASIO_KOMPRESI = 200
+# ZIP per mahasiswa di dalam ZIP kelas dibaca ke memori, jadi ukurannya dibatasi
+BATAS_UKURAN_ZIP_BERSARANG = 32 * 1024 * 1024
+
+EKSTENSI_BINER = {
+    '.png', '.jpg', '.jpeg', '.gif', '.bmp', '.ico', '.webp', '.tiff',
+    '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx',
+    '.pyc', '.pyo', '.class', '.jar', '.o', '.obj', '.exe', '.dll', '.so', '.dylib',
+    '.zip', '.rar', '.7z', '.gz', '.tar', '.bz2', '.xz',
+    '.mp3', '.mp4', '.wav', '.avi', '.mov', '.mkv',
+    '.db', '.sqlite', '.sqlite3', '.pkl', '.pickle', '.npy', '.npz', '.h5', '.parquet',
+}
+
+# Tanda tangan (magic bytes) format biner yang umum ada di folder tugas. Magic 2 byte seperti
+# b'BM' (bitmap) dan b'MZ' (exe) tidak dipakai karena bisa menjadi awal kode biasa (mis. "BMI = ...");
+# format itu sudah tertangkap dari ekstensinya atau dari byte NUL
+MAGIC_BINER = (
+    b'\x89PNG', b'\xff\xd8\xff', b'GIF8', b'%PDF', b'PK\x03\x04',
+    b'\xca\xfe\xba\xbe', b'\x7fELF', b'\x1f\x8b', b'7z\xbc\xaf',
+    b'Rar!', b'SQLite format 3',
+)
+
+SumberArsip = Union[bytes, str, os.PathLike, BinaryIO]
+# (nama mahasiswa, member ZIP bersarang atau None, daftar file kode milik mahasiswa tersebut).
+# Jika ZIP bersarang tidak None, path file relatif terhadap isi ZIP bersarang itu.
+Submission = Tuple[str, Optional[str], List[str]]
+
+
+class ArsipTidakAman(ValueError):
+    """Arsip melebihi batas ukuran atau terindikasi zip bomb."""
+
+
+def adalah_biner(awal_file: bytes, nama_file: str = "") -> bool:
+    """
+    Mendeteksi file biner dari ekstensi dan beberapa byte pertamanya.
+    File dianggap biner jika ekstensinya dikenal, diawali magic bytes, atau mengandung byte NUL.
+    """
+    if os.path.splitext(nama_file)[1].lower() in EKSTENSI_BINER:
+        return True
+    if awal_file.startswith(MAGIC_BINER):
+        return True
+    # UTF-16 dengan BOM memang mengandung NUL tetapi tetap teks
+    if awal_file.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return False
+    return b'\x00' in awal_file
+
+def decode_teks(data: bytes) -> str:
+    """Decode bytes menjadi teks dalam satu kali baca: UTF-8 (dengan/tanpa BOM), UTF-16 ber-BOM, lalu latin-1."""
+    if data.startswith((b'\xff\xfe', b'\xfe\xff')):
+        return data.decode('utf-16', errors='replace')
+    try:
+        return data.decode('utf-8-sig')
+    except UnicodeDecodeError:
+        return data.decode('latin-1', errors='ignore')
+
+def siapkan_arsip(sumber: SumberArsip) -> BinaryIO:
+    """
+    Mengubah sumber arsip menjadi file yang bisa di-seek untuk ZipFile.
+
+    - bytes: dibungkus BytesIO (tanpa salinan tambahan).
+    - path: dibuka langsung dari disk.
+    - file-like (mis. UploadedFile Streamlit): disalin per blok ke SpooledTemporaryFile, sehingga
+      upload besar pindah ke disk dan ZipFile membaca member secara lazy dari sana.
+    """
+    if isinstance(sumber, (bytes, bytearray, memoryview)):
+        return io.BytesIO(sumber)
+    if isinstance(sumber, (str, os.PathLike)):
+        return open(sumber, 'rb')
+    if hasattr(sumber, 'seek'):
+        sumber.seek(0)
+    spool = tempfile.SpooledTemporaryFile(max_size=BATAS_SPOOL_MEMORI, suffix='.zip')
+    shutil.copyfileobj(sumber, spool, length=1024 * 1024)
+    spool.seek(0)
+    return spool
+
+@contextmanager
+def buka_arsip(sumber: SumberArsip) -> Generator[zipfile.ZipFile, None, None]:
+    """Context manager yang membuka arsip dari sumber apa pun dan menutup file sementaranya."""
+    berkas = siapkan_arsip(sumber)
+    try:
+        with zipfile.ZipFile(berkas, 'r') as zip_ref:
+            yield zip_ref
+    finally:
+        berkas.close()
+
+def daftar_file_kode(
+    zip_ref: zipfile.ZipFile,
+    batas_per_file: int = BATAS_UKURAN_PER_FILE,
+    batas_total: int = BATAS_UKURAN_TOTAL
+) -> List[str]:
+    """
+    Mengembalikan nama member yang akan dinilai: bukan folder, bukan __MACOSX, bukan file biner,
+    tidak melebihi batas ukuran per file, dan rasio kompresinya wajar. Melempar ArsipTidakAman
+    jika total ukuran file yang akan dinilai melebihi `batas_total`.
+    """
+    file_list = []
+    total = 0
+    for info in zip_ref.infolist():
+        nama = info.filename
+        if info.is_dir() or nama.startswith('__MACOSX') or os.path.basename(nama).startswith('._'):
+            continue
+        # Dicek untuk setiap member sebelum batas ukuran, karena header ukuran bisa berbohong
+        if info.file_size > BATAS_RASIO_KOMPRESI * max(info.compress_size, 1):
+            print(f"Melewati {nama}: rasio kompresi tidak wajar (kemungkinan zip bomb).")
+            continue
+        if info.file_size > batas_per_file:
+            print(f"Melewati {nama}: ukuran {info.file_size} byte melebihi batas {batas_per_file} byte.")
+            continue
+        if os.path.splitext(nama)[1].lower() in EKSTENSI_BINER:
+            print(f"Melewati {nama}: file biner.")
+            continue
+        with zip_ref.open(info) as file:
+            if adalah_biner(file.read(1024), nama):
+                print(f"Melewati {nama}: file biner.")
+                continue
+        total += info.file_size
+        if total > batas_total:
+            raise ArsipTidakAman(
+                f"Total ukuran file di dalam zip melebihi batas {batas_total // (1024 * 1024)} MB."
+            )
+        file_list.append(nama)
+    return file_list
+
+def baca_teks(
+    zip_ref: zipfile.ZipFile,
+    nama_file: str,
+    batas: int = BATAS_UKURAN_PER_FILE
+) -> str:
+    """
+    Membaca satu member sebagai teks dalam satu kali baca. Ukuran sebenarnya dibatasi `batas`
+    (header ZIP bisa berbohong soal ukuran), jika terlampaui dilempar ArsipTidakAman.
+    """
+    with zip_ref.open(nama_file) as file:
+        data = file.read(batas + 1)
+    if len(data) > batas:
+        raise ArsipTidakAman(f"File {nama_file} melebihi batas {batas} byte setelah didekompresi.")
+    return decode_teks(data)
+
+@contextmanager
+def buka_zip_bersarang(
+    zip_ref: zipfile.ZipFile,
+    nama: str,
+    batas: int = BATAS_UKURAN_ZIP_BERSARANG
+) -> Generator[zipfile.ZipFile, None, None]:
+    """Membuka member .zip (mis. ZIP per mahasiswa) di dalam arsip; ukurannya dibatasi `batas`."""
+    with zip_ref.open(nama) as file:
+        data = file.read(batas + 1)
+    if len(data) > batas:
+        raise ArsipTidakAman(f"ZIP {nama} melebihi batas {batas // (1024 * 1024)} MB.")
+    with zipfile.ZipFile(io.BytesIO(data), 'r') as zip_dalam:
+        yield zip_dalam
+
+def _zip_bersarang(zip_ref: zipfile.ZipFile) -> List[str]:
+    """Member .zip yang bukan folder/metadata macOS."""
+    return [
+        info.filename for info in zip_ref.infolist()
+        if not info.is_dir() and info.filename.lower().endswith('.zip')
+        and not info.filename.startswith('__MACOSX') and not os.path.basename(info.filename).startswith('._')
+    ]
+
+def _awalan_bersama(nama_nama: List[str]) -> str:
+    """
+    Folder pembungkus yang menaungi semua entri (mis. "kelas_A/" pada "kelas_A/nim1/main.py"),
+    hanya dibuang jika setelahnya masih ada folder/ZIP per mahasiswa.
+    """
+    awalan = ""
+    while nama_nama:
+        bagian = [nama[len(awalan):].split('/', 1) for nama in nama_nama]
+        pertama = {b[0] for b in bagian}
+        if len(pertama) != 1 or any(len(b) == 1 for b in bagian):
+            break
+        calon = awalan + bagian[0][0] + '/'
+        sisa = [nama[len(calon):] for nama in nama_nama]
+        if not any('/' in s or s.lower().endswith('.zip') for s in sisa):
+            break
+        awalan = calon
+    return awalan
+
+def daftar_submission(zip_ref: zipfile.ZipFile) -> List[Submission]:
+    """
+    Mengelompokkan isi ZIP kelas per mahasiswa:
+    - "nim1/main.py", "nim1/utils.py" -> mahasiswa "nim1" (folder pembungkus bersama diabaikan);
+    - "nim2.zip" -> mahasiswa "nim2", berisi file kode di dalam ZIP tersebut;
+    - file lepas di luar folder -> satu submission per file.
+    Urutan mengikuti kemunculan pertama di arsip. Mahasiswa tanpa file kode tidak disertakan.
+    """
+    file_kode = daftar_file_kode(zip_ref)
+    zip_dalam = _zip_bersarang(zip_ref)
+    awalan = _awalan_bersama(file_kode + zip_dalam)
+
+    submission: Dict[str, Submission] = {}
+    for nama in file_kode:
+        relatif = nama[len(awalan):]
+        mahasiswa = relatif.split('/', 1)[0] if '/' in relatif else relatif
+        submission.setdefault(mahasiswa, (mahasiswa, None, []))[2].append(nama)
+
+    for nama in zip_dalam:
+        relatif = nama[len(awalan):]
+        mahasiswa = os.path.splitext(relatif)[0] if '/' not in relatif else relatif.split('/', 1)[0]
+        try:
+            with buka_zip_bersarang(zip_ref, nama) as zip_mhs:
+                anggota = daftar_file_kode(zip_mhs)
+        except (zipfile.BadZipFile, ArsipTidakAman) as e:
+            print(f"Melewati {nama}: {e}")
+            continue
+        if not anggota:
+            continue
+        if mahasiswa in submission:
+            # Nama bentrok dengan folder (mis. nim1/ dan nim1.zip): ZIP dinilai terpisah
+            mahasiswa = relatif
+        submission[mahasiswa] = (mahasiswa, nama, anggota)
+
+    posisi = {nama: i for i, nama in enumerate(zip_ref.namelist())}
+    return sorted(submission.values(), key=lambda s: posisi[s[1] or s[2][0]])
@@ -0,0 +1,254 @@
+# pengurai_json.py
+# File ini berisi pengurai dan validasi output JSON dari model.
+
+import json
+from typing import Any, Callable, Dict, List, Optional
+
+# Field wajib pada satu hasil penilaian
+FIELD_HASIL = ("nama_file", "nilai", "kesalahan", "feedback")
+
+# strict=False: model sering menulis newline/tab mentah di dalam string
+_decoder = json.JSONDecoder(strict=False)
+_GAGAL = object()
+_PENUTUP = {"{": "}", "[": "]"}
+_LITERAL_PYTHON = {"True": "true", "False": "false", "None": "null"}
+
+
+def validasi_hasil(data: Any, nama_file: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Memastikan hasil dari AI memiliki semua field dengan tipe yang benar.
+    `nilai` diubah menjadi integer 0-100; `kesalahan`/`feedback` menjadi string. Jika `nama_file`
+    diberikan, field itu diisi otomatis saat tidak ada. Melempar ValueError/TypeError jika tidak valid.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("Hasil penilaian harus berupa objek JSON.")
+    if nama_file is not None:
+        data.setdefault("nama_file", nama_file)
+    if not all(k in data for k in FIELD_HASIL):
+        raise ValueError("JSON tidak memiliki field yang dibutuhkan.")
+    nilai = data["nilai"]
+    if isinstance(nilai, str):
+        nilai = nilai.strip().split("/")[0]
+    if isinstance(nilai, bool):
+        raise TypeError("Field 'nilai' harus berupa angka (integer).")
+    try:
+        nilai = round(float(nilai))
+    except (ValueError, TypeError, OverflowError):
+        raise TypeError("Field 'nilai' harus berupa angka (integer).")
+    data["nilai"] = max(0, min(100, nilai))
+    for kolom in ("kesalahan", "feedback"):
+        isi = data[kolom]
+        if isinstance(isi, list):
+            data[kolom] = "; ".join(str(x) for x in isi)
+        elif not isinstance(isi, str):
+            data[kolom] = "" if isi is None else str(isi)
+    if not isinstance(data["nama_file"], str):
+        raise TypeError("Field 'nama_file' harus berupa string.")
+    return data
+
+def _cari_penutup(teks: str, awal: int) -> Optional[int]:
+    """Posisi setelah kurung penutup yang sepasang dengan kurung di `awal`, atau None jika belum ditutup."""
+    kedalaman = 0
+    dalam_string = False
+    escape = False
+    for i in range(awal, len(teks)):
+        c = teks[i]
+        if dalam_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                dalam_string = False
+        elif c == '"':
+            dalam_string = True
+        elif c in "{[":
+            kedalaman += 1
+        elif c in "}]":
+            kedalaman -= 1
+            if kedalaman == 0:
+                return i + 1
+    return None
+
+def perbaiki_json(teks: str) -> str:
+    """
+    Perbaikan lokal untuk kesalahan JSON yang umum dari model, tanpa request ulang:
+    koma yang hilang di antara field, koma berlebih sebelum penutup, literal Python
+    (True/False/None), tanda kutip miring, serta output terpotong (string dan kurung ditutup).
+    """
+    teks = teks.replace("“", '"').replace("”", '"')
+    hasil: List[str] = []
+    tumpukan: List[str] = []
+    dalam_string = False
+    escape = False
+    i = 0
+
+    def terakhir() -> str:
+        # Karakter signifikan terakhir di luar spasi
+        for potongan in reversed(hasil):
+            bersih = potongan.rstrip()
+            if bersih:
+                return bersih[-1]
+        return ""
+
+    while i < len(teks):
+        c = teks[i]
+        if dalam_string:
+            hasil.append(c)
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                dalam_string = False
+            i += 1
+            continue
+        if c in '"{[' or c.isdigit() or c == "-":
+            # Nilai baru langsung setelah nilai sebelumnya: koma hilang
+            if terakhir() in ('"', "}", "]") or (terakhir().isdigit() and c == '"'):
+                hasil.append(",")
+        if c == '"':
+            dalam_string = True
+        elif c in "{[":
+            tumpukan.append(_PENUTUP[c])
+        elif c in "}]":
+            if terakhir() == ",":
+                # Koma berlebih sebelum penutup
+                for j in range(len(hasil) - 1, -1, -1):
+                    if hasil[j].strip():
+                        hasil[j] = ""
+                        break
+            if tumpukan:
+                tumpukan.pop()
+        elif c.isalpha():
+            kata = c
+            while i + 1 < len(teks) and teks[i + 1].isalpha():
+                i += 1
+                kata += teks[i]
+            hasil.append(_LITERAL_PYTHON.get(kata, kata))
+            i += 1
+            continue
+        hasil.append(c)
+        i += 1
+
+    # Output terpotong: tutup string dan kurung yang masih terbuka
+    if dalam_string:
+        if escape:
+            hasil.append("\\")
+        hasil.append('"')
+    if tumpukan:
+        if terakhir() == ",":
+            for j in range(len(hasil) - 1, -1, -1):
+                if hasil[j].strip():
+                    hasil[j] = ""
+                    break
+        elif terakhir() == ":":
+            hasil.append(" null")
+        hasil.extend(reversed(tumpukan))
+    return "".join(hasil)
+
+def _decode(teks: str, awal: int) -> Any:
+    """raw_decode dari posisi `awal`; mencoba perbaikan lokal jika gagal."""
+    try:
+        return _decoder.raw_decode(teks, awal)[0]
+    except json.JSONDecodeError:
+        pass
+    akhir = _cari_penutup(teks, awal)
+    try:
+        return _decoder.raw_decode(perbaiki_json(teks[awal:akhir]))[0]
+    except json.JSONDecodeError:
+        return _GAGAL
+
+
+class ParserJSONBertahap:
+    """
+    Memindai teks (boleh datang bertahap, mis. dari streaming) dan mengeluarkan setiap objek
+    JSON yang lolos `validasi` segera setelah objeknya lengkap, di kedalaman mana pun: objek
+    tunggal, elemen array, atau elemen array di dalam objek pembungkus seperti {"hasil": [...]}.
+
+    Objek yang tidak lolos validasi "dimasuki" sehingga objek di dalamnya tetap ditemukan.
+    Teks di luar JSON (prosa, blok ```json) diabaikan. Saat `akhiri()` dipanggil, objek yang
+    terpotong di akhir output diperbaiki lokal (string dan kurung ditutup) lalu divalidasi.
+    """
+
+    def __init__(self, validasi: Callable[[Any], Any] = validasi_hasil):
+        self.validasi = validasi
+        self.teks = ""
+        self._posisi = 0
+        # Posisi awal -> akhir objek yang sudah dikeluarkan (dilompati saat memindai ulang)
+        self._keluar: Dict[int, int] = {}
+
+    def tambah(self, potongan: str) -> List[Any]:
+        """Menambahkan potongan teks; mengembalikan objek valid yang baru lengkap."""
+        self.teks += potongan
+        return self._pindai(final=False)
+
+    def akhiri(self) -> List[Any]:
+        """Menandai teks sudah lengkap; objek yang masih terbuka dicoba diperbaiki."""
+        return self._pindai(final=True)
+
+    def parsial(self) -> Optional[Dict[str, Any]]:
+        """
+        Isi sementara objek yang sedang ditulis (mis. feedback yang baru sebagian), diperoleh
+        dengan perbaikan lokal atas teks yang belum lengkap. None jika belum ada yang bisa dibaca.
+        """
+        awal = self.teks.find("{", self._posisi)
+        # Angka yang terpotong (mis. "nilai": 8 dari 85) jangan ditampilkan dulu
+        if awal < 0 or self.teks.rstrip()[-1:].isdigit():
+            return None
+        try:
+            data = _decoder.raw_decode(perbaiki_json(self.teks[awal:]))[0]
+        except json.JSONDecodeError:
+            return None
+        if not isinstance(data, dict):
+            return None
+        # Nilai null berasal dari perbaikan key yang isinya belum ditulis
+        return {k: v for k, v in data.items() if v is not None} or None
+
+    def _pindai(self, final: bool) -> List[Any]:
+        teks = self.teks
+        keluar: List[Any] = []
+        tertunda: Optional[int] = None
+        posisi = self._posisi
+        while True:
+            posisi = teks.find("{", posisi)
+            if posisi < 0:
+                break
+            if posisi in self._keluar:
+                posisi = self._keluar[posisi]
+                continue
+            akhir = _cari_penutup(teks, posisi)
+            if akhir is None and not final:
+                # Belum lengkap: cari objek lengkap di dalamnya, lalu tunggu potongan berikutnya
+                if tertunda is None:
+                    tertunda = posisi
+                posisi += 1
+                continue
+            nilai = _decode(teks, posisi)
+            if nilai is not _GAGAL:
+                try:
+                    nilai = self.validasi(nilai)
+                except (ValueError, TypeError):
+                    nilai = _GAGAL
+            if nilai is _GAGAL:
+                posisi += 1
+                continue
+            keluar.append(nilai)
+            self._keluar[posisi] = akhir if akhir is not None else len(teks)
+            posisi = self._keluar[posisi]
+        self._posisi = tertunda if tertunda is not None else len(teks)
+        return keluar
+
+
+def urai_hasil(teks: str, nama_file: Optional[str] = None) -> Dict[str, Any]:
+    """Mengambil objek hasil penilaian valid pertama dari output model. Melempar ValueError jika tidak ada."""
+    parser = ParserJSONBertahap(lambda data: validasi_hasil(data, nama_file))
+    hasil = parser.tambah(teks or "") + parser.akhiri()
+    if not hasil:
+        raise ValueError("Objek JSON hasil penilaian yang valid tidak ditemukan.")
+    return hasil[0]
+
+def urai_hasil_batch(teks: str) -> List[Dict[str, Any]]:
+    """Mengambil semua objek hasil penilaian valid dari output mode batch (array atau objek pembungkus)."""
+    parser = ParserJSONBertahap()
+    return parser.tambah(teks or "") + parser.akhiri()
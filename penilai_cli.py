@@ -0,0 +1,375 @@
+# penilai_cli.py
+# File ini adalah entry point command-line untuk menilai banyak file ZIP tanpa UI.
+
+import argparse
+import csv
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from dotenv import load_dotenv
+from groq import Groq
+
+from cache_penilaian import CachePenilaian
+from ekspor_hasil import FORMAT_EKSPOR, PenulisCSVBerjalan, ekspor_bytes
+from klien_groq import MAX_KONEKSI, KumpulanKlien, dapatkan_kumpulan_klien, kunci_dari_env
+from metrik_penilaian import KOLOM_METRIK, MetrikBerjalan
+from penilai_otomatis import (BATAS_KEYAKINAN, RENTANG_NILAI_RAGU, STRATEGI_FILE_BESAR, baca_soal_pdf,
+                              proses_file_zip_realtime)
+from penjadwal_api import PenjadwalAPI
+from riwayat_penilaian import RiwayatPenilaian
+from saringan_awal import MODE_SARINGAN
+from statistik_penilaian import RENTANG_GRADE, StatistikBerjalan
+
+MODEL_DEFAULT = "openai/gpt-oss-120b"
+TEMPERATURE = 0.1
+NAMA_CHECKPOINT = "checkpoint.jsonl"
+NAMA_RINGKASAN = "ringkasan"
+NAMA_METRIK = "metrik.prom"
+# Kolom CSV yang ditulis selama arsip dinilai (kolom yang belum diketahui di awal diabaikan)
+KOLOM_CSV_BERJALAN = (
+    "daftar_file", "duplikat", "saringan", "keyakinan", "model_penilai", "eskalasi", "jumlah_token", "waktu_baca"
+) + KOLOM_METRIK
+
+
+class Checkpoint:
+    """
+    Log JSONL append-only berisi setiap hasil yang sudah didapat, satu baris per file:
+    {"arsip": ..., "index": ..., "hasil": {...}}, dan satu baris {"arsip": ..., "selesai": true}
+    setelah satu arsip tuntas. Baris terakhir yang terpotong (proses dihentikan saat menulis)
+    diabaikan saat dimuat.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hasil: Dict[str, Dict[int, Dict[str, Any]]] = {}
+        self.selesai: Set[str] = set()
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            self._muat()
+        self._file = open(path, "a", encoding="utf-8")
+        if self._file.tell() and not self._berakhir_newline():
+            # Pisahkan dari baris terpotong agar entri baru tidak ikut rusak
+            self._file.write("\n")
+
+    def _berakhir_newline(self) -> bool:
+        with open(self.path, "rb") as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b"\n"
+
+    def _muat(self) -> None:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for baris in f:
+                try:
+                    entri = json.loads(baris)
+                except ValueError:
+                    continue
+                if entri.get("selesai"):
+                    self.selesai.add(entri["arsip"])
+                elif "hasil" in entri:
+                    self.hasil.setdefault(entri["arsip"], {})[entri["index"]] = entri["hasil"]
+
+    def sudah_dinilai(self, arsip: str) -> Set[str]:
+        """Nama file di arsip yang sudah berhasil dinilai. Hasil 'GAGAL proses' akan dicoba lagi."""
+        return {
+            hasil["nama_file"] for hasil in self.hasil.get(arsip, {}).values()
+            if hasil.get("kesalahan") != "GAGAL proses"
+        }
+
+    def _tulis(self, entri: Dict[str, Any]) -> None:
+        with self._lock:
+            self._file.write(json.dumps(entri, ensure_ascii=False) + "\n")
+            self._file.flush()
+
+    def catat_hasil(self, arsip: str, index: int, hasil: Dict[str, Any]) -> None:
+        with self._lock:
+            self.hasil.setdefault(arsip, {})[index] = hasil
+        self._tulis({"arsip": arsip, "index": index, "hasil": hasil})
+
+    def tandai_selesai(self, arsip: str) -> None:
+        with self._lock:
+            self.selesai.add(arsip)
+        self._tulis({"arsip": arsip, "selesai": True})
+
+    def tutup(self) -> None:
+        self._file.close()
+
+
+def baca_teks_soal(path: str, rentang_halaman: str = "") -> str:
+    """Membaca soal dari file PDF (opsional hanya halaman tertentu) atau file teks biasa."""
+    with open(path, "rb") as f:
+        data = f.read()
+    if path.lower().endswith(".pdf"):
+        return baca_soal_pdf(data, rentang_halaman)
+    return data.decode("utf-8-sig", errors="replace")
+
+def _nilai_arsip(
+    path_zip: str,
+    args: argparse.Namespace,
+    client: Groq,
+    soal_text: str,
+    kriteria_text: str,
+    checkpoint: Checkpoint,
+    penjadwal: PenjadwalAPI,
+    cache: Optional[CachePenilaian],
+    riwayat: Optional[RiwayatPenilaian]
+) -> Tuple[Dict[str, Any], StatistikBerjalan, MetrikBerjalan]:
+    """
+    Menilai satu arsip (melanjutkan dari checkpoint), menulis file hasilnya, dan mengembalikan
+    (ringkasan, statistik nilai, metrik waktu/token) arsip tersebut.
+    """
+    arsip = os.path.basename(path_zip)
+    metrik = MetrikBerjalan()
+    error = None
+    ekstensi, _ = FORMAT_EKSPOR[args.format]
+    path_hasil = os.path.join(args.output, os.path.splitext(arsip)[0] + ekstensi)
+    penulis = None
+    if arsip not in checkpoint.selesai:
+        sudah = checkpoint.sudah_dinilai(arsip)
+        if sudah:
+            print(f"[{arsip}] melanjutkan dari checkpoint: {len(sudah)} file sudah dinilai.")
+        if args.format == "csv":
+            # CSV ditulis per hasil begitu datang (urutan selesai, kolom 'index' untuk urutan asli);
+            # hasil dari checkpoint ditulis lebih dulu saat melanjutkan
+            penulis = PenulisCSVBerjalan(path_hasil, KOLOM_CSV_BERJALAN)
+            for index, hasil in sorted(checkpoint.hasil.get(arsip, {}).items()):
+                if hasil.get("kesalahan") != "GAGAL proses":
+                    penulis.tulis(hasil, index)
+        try:
+            for event in proses_file_zip_realtime(
+                client,
+                path_zip,
+                soal_text,
+                kriteria_text,
+                model=args.model,
+                temperature=args.temperature,
+                max_workers=args.konkurensi,
+                cache=cache,
+                penjadwal=penjadwal,
+                deteksi_duplikat=args.deteksi_duplikat,
+                token_per_batch=args.token_per_batch,
+                minifikasi=args.minifikasi,
+                strategi_file_besar=args.strategi_file_besar,
+                per_mahasiswa=args.per_mahasiswa,
+                saringan_awal=args.saringan_awal,
+                model_eskalasi=args.model_eskalasi,
+                rentang_nilai_ragu=tuple(args.nilai_ragu),
+                batas_keyakinan=args.batas_keyakinan,
+                riwayat=riwayat,
+                nama_tugas=args.nama_tugas,
+                lewati_file=sudah
+            ):
+                if event['type'] == 'result':
+                    checkpoint.catat_hasil(arsip, event['index'], event['data'])
+                    if penulis is not None:
+                        penulis.tulis(event['data'], event['index'])
+                elif event['type'] == 'progress' and event['current'] % 50 == 0:
+                    print(f"[{arsip}] {event['current']}/{event['total']} file")
+                elif event['type'] == 'error':
+                    error = event['message']
+                    print(f"[{arsip}] ERROR: {error}")
+        finally:
+            if penulis is not None:
+                penulis.tutup()
+        if error is None:
+            checkpoint.tandai_selesai(arsip)
+
+    hasil_list = [hasil for _, hasil in sorted(checkpoint.hasil.get(arsip, {}).items())]
+    statistik = StatistikBerjalan()
+    gagal = 0
+    for hasil in hasil_list:
+        statistik.tambah(hasil.get("nilai"))
+        metrik.tambah(hasil)
+        gagal += hasil.get("kesalahan") == "GAGAL proses"
+    metrik.selesai = time.time()
+
+    if hasil_list and penulis is None:
+        with open(path_hasil, "wb") as f:
+            f.write(ekspor_bytes(hasil_list, args.format))
+
+    print(
+        f"[{arsip}] selesai: {statistik.jumlah} file, rata-rata {statistik.rata_rata:.1f}, "
+        f"{gagal} gagal" + (f", error: {error}" if error else "")
+    )
+    ringkasan = {
+        "arsip": arsip, **statistik.ringkasan(), "gagal": gagal, "error": error, "metrik": metrik.ringkasan()
+    }
+    return ringkasan, statistik, metrik
+
+def tulis_ringkasan(
+    output: str,
+    ringkasan: List[Dict[str, Any]],
+    semua: StatistikBerjalan,
+    metrik: MetrikBerjalan
+) -> None:
+    """
+    Ringkasan gabungan semua arsip: JSON lengkap, tabel (CSV) satu baris per arsip, dan metrik
+    waktu/token dalam format teks Prometheus.
+    """
+    with open(os.path.join(output, NAMA_RINGKASAN + ".json"), "w", encoding="utf-8") as f:
+        json.dump(
+            {"total": semua.ringkasan(), "metrik": metrik.ringkasan(), "arsip": ringkasan},
+            f, ensure_ascii=False, indent=2
+        )
+    with open(os.path.join(output, NAMA_METRIK), "w", encoding="utf-8") as f:
+        f.write(metrik.ke_prometheus())
+    kolom = ["arsip", "jumlah", "rata_rata", "tertinggi", "terendah", "gagal"]
+    kolom += [label for label, _ in RENTANG_GRADE] + ["error"]
+    with open(os.path.join(output, NAMA_RINGKASAN + ".csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=kolom, extrasaction="ignore")
+        writer.writeheader()
+        for r in ringkasan:
+            writer.writerow({**r, **r["distribusi"]})
+
+def buat_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Menilai semua file ZIP di sebuah folder tanpa UI (Groq API)."
+    )
+    parser.add_argument("folder_zip", help="Folder berisi file .zip tugas mahasiswa")
+    parser.add_argument("--soal", required=True, help="File soal (.pdf atau teks)")
+    parser.add_argument("--halaman-soal", default="", help='Halaman PDF soal yang dibaca, mis. "1-3, 5" (default: semua)')
+    parser.add_argument("--kriteria", help="File teks berisi kriteria penilaian tambahan")
+    parser.add_argument("--output", default="hasil_penilaian", help="Folder hasil (default: hasil_penilaian)")
+    parser.add_argument("--model", default=MODEL_DEFAULT, help=f"Model Groq (default: {MODEL_DEFAULT})")
+    parser.add_argument("--temperature", type=float, default=TEMPERATURE)
+    parser.add_argument(
+        "--model-eskalasi",
+        help="Aktifkan mode kaskade: --model (model kecil) menilai dulu, model ini hanya menilai ulang "
+             "hasil yang gagal, nilainya meragukan, atau keyakinannya rendah"
+    )
+    parser.add_argument(
+        "--nilai-ragu", type=int, nargs=2, metavar=("MIN", "MAKS"), default=list(RENTANG_NILAI_RAGU),
+        help=f"Rentang nilai yang dieskalasi pada mode kaskade (default: {RENTANG_NILAI_RAGU[0]} {RENTANG_NILAI_RAGU[1]})"
+    )
+    parser.add_argument(
+        "--batas-keyakinan", type=int, default=BATAS_KEYAKINAN,
+        help=f"Keyakinan model kecil di bawah nilai ini dieskalasi (default: {BATAS_KEYAKINAN})"
+    )
+    parser.add_argument(
+        "--konkurensi", type=int, default=8,
+        help="Batas global request API yang berjalan bersamaan untuk semua arsip (default: 8)"
+    )
+    parser.add_argument(
+        "--arsip-paralel", type=int, default=4,
+        help="Jumlah arsip yang diproses bersamaan (default: 4)"
+    )
+    parser.add_argument("--format", choices=sorted(FORMAT_EKSPOR), default="csv", help="Format file hasil per arsip")
+    parser.add_argument("--token-per-batch", type=int, default=0, help="Aktifkan mode batch (0 = nonaktif)")
+    parser.add_argument("--minifikasi", action="store_true", help="Minifikasi kode sebelum dikirim")
+    parser.add_argument("--deteksi-duplikat", action="store_true", help="Deteksi submission duplikat per arsip")
+    parser.add_argument("--strategi-file-besar", choices=STRATEGI_FILE_BESAR, default="potong")
+    parser.add_argument(
+        "--per-mahasiswa", action="store_true",
+        help="Nilai semua file satu mahasiswa (folder nim/ atau nim.zip di dalam arsip) dalam satu request"
+    )
+    parser.add_argument(
+        "--saringan-awal", choices=MODE_SARINGAN, default="diagnostik",
+        help="Cek lokal sebelum API: diagnostik (hasil cek sintaks masuk prompt) atau otomatis "
+             "(file kosong/tidak bisa dikompilasi langsung diberi nilai 0) (default: diagnostik)"
+    )
+    parser.add_argument("--tanpa-cache", action="store_true", help="Jangan gunakan cache hasil penilaian")
+    parser.add_argument(
+        "--nama-tugas",
+        help="Nama tugas di riwayat penilaian (default: nama file soal tanpa ekstensi)"
+    )
+    parser.add_argument("--tanpa-riwayat", action="store_true", help="Jangan simpan hasil ke riwayat penilaian")
+    parser.add_argument("--ulang", action="store_true", help="Abaikan checkpoint lama dan nilai ulang semuanya")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = buat_parser().parse_args(argv)
+    load_dotenv()
+    daftar_kunci = kunci_dari_env()
+    if not daftar_kunci:
+        print("GROQ_API_KEY (atau GROQ_API_KEYS) tidak ditemukan. Tambahkan ke file .env atau environment.",
+              file=sys.stderr)
+        return 2
+
+    daftar_zip = sorted(
+        os.path.join(args.folder_zip, nama) for nama in os.listdir(args.folder_zip)
+        if nama.lower().endswith(".zip")
+    )
+    if not daftar_zip:
+        print(f"Tidak ada file .zip di {args.folder_zip}.", file=sys.stderr)
+        return 1
+
+    try:
+        soal_text = baca_teks_soal(args.soal, args.halaman_soal)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    kriteria_text = ""
+    if args.kriteria:
+        with open(args.kriteria, "r", encoding="utf-8-sig") as f:
+            kriteria_text = f.read()
+
+    os.makedirs(args.output, exist_ok=True)
+    path_checkpoint = os.path.join(args.output, NAMA_CHECKPOINT)
+    if args.ulang and os.path.exists(path_checkpoint):
+        os.remove(path_checkpoint)
+    checkpoint = Checkpoint(path_checkpoint)
+
+    client = dapatkan_kumpulan_klien(daftar_kunci, max_koneksi=max(MAX_KONEKSI, args.konkurensi))
+    # Satu penjadwal untuk semua arsip: konkurensi dan kuota rate limit dibagi bersama
+    penjadwal = PenjadwalAPI(
+        max_konkurensi=args.konkurensi,
+        jumlah_akun=len(client.anggota) if isinstance(client, KumpulanKlien) else 1
+    )
+    cache = None if args.tanpa_cache else CachePenilaian()
+    riwayat = None if args.tanpa_riwayat else RiwayatPenilaian()
+    args.nama_tugas = args.nama_tugas or os.path.splitext(os.path.basename(args.soal))[0]
+
+    print(f"Menilai {len(daftar_zip)} arsip dengan model {args.model} (konkurensi API {args.konkurensi}).")
+    start_time = time.time()
+    ringkasan: Dict[str, Dict[str, Any]] = {}
+    semua = StatistikBerjalan()
+    metrik_semua = MetrikBerjalan(mulai=start_time)
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, args.arsip_paralel)) as executor:
+            futures = {
+                executor.submit(
+                    _nilai_arsip, path_zip, args, client, soal_text, kriteria_text, checkpoint, penjadwal,
+                    cache, riwayat
+                ): path_zip
+                for path_zip in daftar_zip
+            }
+            for future in as_completed(futures):
+                r, statistik, metrik = future.result()
+                ringkasan[r["arsip"]] = r
+                semua.gabung(statistik)
+                metrik_semua.gabung(metrik)
+    finally:
+        checkpoint.tutup()
+
+    urutan = [ringkasan[os.path.basename(p)] for p in daftar_zip]
+    metrik_semua.selesai = time.time()
+    tulis_ringkasan(args.output, urutan, semua, metrik_semua)
+
+    statistik_api = penjadwal.statistik()
+    total_time = time.time() - start_time
+    print(
+        f"Selesai dalam {total_time:.1f} detik. API: {statistik_api['panggilan']} panggilan, "
+        f"{statistik_api['retry']} retry, {statistik_api['throttled']} kali kena rate limit."
+    )
+    ringkasan_metrik = metrik_semua.ringkasan()
+    if ringkasan_metrik.get("jumlah_kaskade"):
+        print(
+            f"Kaskade: {ringkasan_metrik['jumlah_eskalasi']}/{ringkasan_metrik['jumlah_kaskade']} file "
+            f"({ringkasan_metrik['fraksi_eskalasi']:.0%}) dieskalasi ke {args.model_eskalasi}."
+        )
+    if isinstance(client, KumpulanKlien):
+        for info_key in client.statistik():
+            print(
+                f"  Key {info_key['key']}: {info_key['panggilan']} panggilan, {info_key['gagal']} gagal, "
+                f"{info_key['token']} token ({info_key['status']})"
+            )
+    print(f"Hasil disimpan di {os.path.abspath(args.output)}")
+    return 1 if any(r["error"] for r in urutan) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,24 +1,43 @@
 # penilai_otomatis.py
 # File ini berisi semua fungsi inti untuk proses penilaian otomatis.
 
-import io
-import json
-import re
+import queue
 import time
+import types
+import uuid
 import zipfile
-from typing import Dict, List, Optional, Any, Generator
+from concurrent.futures import FIRST_COMPLETED, Executor, ThreadPoolExecutor, wait
+from contextlib import nullcontext
+from typing import Dict, List, Optional, Any, Callable, Container, Generator, Iterable, Tuple
 
-import pandas as pd
+import groq
+import httpx
 from groq import Groq
-from pypdf import PdfReader
 
+from anggaran_token import (MAX_TOKENS_OUTPUT, anggaran_kode, estimasi_token, minifikasi_kode,
+                            pecah_kode, potong_kode)
+from cache_penilaian import CachePenilaian, buat_kunci_cache
+from deteksi_duplikat import HasilDuplikat, kelompokkan_duplikat
+from metrik_penilaian import KOLOM_METRIK, bulatkan, catat_usage, metrik_kosong
+from pembaca_pdf import baca_pdf
+from pembaca_zip import (ArsipTidakAman, SumberArsip, Submission, baca_teks, buka_arsip, buka_zip_bersarang,
+                         daftar_file_kode, daftar_submission)
+from pengurai_json import ParserJSONBertahap, urai_hasil, urai_hasil_batch, validasi_hasil
+from penjadwal_api import ErrorAPISementara, PenjadwalAPI
+from riwayat_penilaian import RiwayatPenilaian, buat_hash_prompt, mahasiswa_dari_nama, peta_mahasiswa
+from saringan_awal import MODE_SARINGAN, hasil_saringan, saring_kelompok
 
-def baca_soal_pdf(file_bytes: bytes) -> str:
-    """Membaca teks dari file PDF yang diupload."""
+
+def baca_soal_pdf(file_bytes: bytes, rentang_halaman: str = "") -> str:
+    """
+    Membaca teks dari file PDF yang diupload. `rentang_halaman` opsional, mis. "1-3, 5".
+    Hasil di-memo berdasarkan hash isi file sehingga aman dipanggil pada setiap rerun Streamlit.
+    Melempar ValueError jika rentang halaman tidak valid.
+    """
     try:
-        reader = PdfReader(io.BytesIO(file_bytes))
-        full_text = "".join(page.extract_text() for page in reader.pages)
-        return full_text
+        return baca_pdf(file_bytes, rentang_halaman)
+    except ValueError:
+        raise
     except Exception as e:
         print(f"Error saat membaca PDF: {e}")
         return ""
@@ -49,69 +68,371 @@ Hasil penilaian HARUS diberikan dalam format JSON yang valid dengan struktur seb
 {{
   "nama_file": "[nama file yang dinilai]",
   "nilai": [nilai akhir dalam format ANGKA 0-100, bukan string],
-  "kesalahan": "[kesalahan yang terdapat pada program (jika ada salah)]"
+  "kesalahan": "[kesalahan yang terdapat pada program (jika ada salah)]",
   "feedback": "[feedback singkat, jelas, dan konstruktif mengenai penilaian (jika ada salah) maksimal 3 kalimat]"
 }}
 """
     return prompt.strip()
 
-def bersihkan_json(text: str) -> Optional[str]:
+# Batas jumlah file dalam satu request mode batch (output JSON array ikut membesar per file)
+MAX_FILE_PER_BATCH = 10
+# Perkiraan token output untuk satu objek hasil penilaian
+TOKEN_OUTPUT_PER_FILE = 350
+
+PROMPT_BATCH = """
+Mode Batch
+Anda akan menerima BEBERAPA file sekaligus, masing-masing diawali baris "=== Nama File: <nama file> ===". Nilai setiap file secara terpisah dan independen menggunakan aturan di atas.
+Kembalikan SATU objek JSON {"hasil": [...]} dengan "hasil" berisi satu objek dengan struktur di atas untuk setiap file, dalam urutan yang sama dengan input. Field "nama_file" harus sama persis dengan nama file yang diberikan. JANGAN tambahkan teks atau penjelasan lain di luar objek JSON.
+"""
+
+PROMPT_PER_MAHASISWA = """
+Mode Per Mahasiswa
+Setiap submission adalah tugas SATU mahasiswa yang dapat terdiri dari beberapa file, masing-masing diawali baris "### File: <path>". Nilai semua file tersebut sebagai satu program utuh (file boleh saling import atau memanggil) dan berikan SATU penilaian untuk mahasiswa tersebut. Field "nama_file" diisi dengan nama submission (identitas mahasiswa) yang diberikan.
+"""
+
+# Mode kaskade: model kecil menilai dulu, model besar hanya dipanggil untuk hasil yang meragukan
+# Nilai di dalam rentang ini (inklusif) dianggap "di perbatasan" dan dinilai ulang
+RENTANG_NILAI_RAGU = (50, 75)
+# Keyakinan model kecil (0-100) di bawah nilai ini juga dinilai ulang
+BATAS_KEYAKINAN = 70
+
+PROMPT_KEYAKINAN = """
+Tambahkan field "keyakinan" pada objek JSON: seberapa yakin Anda terhadap nilai yang diberikan, berupa ANGKA 0-100 (rendah jika soal atau kode ambigu, atau Anda tidak yakin kodenya benar).
+"""
+
+def buat_prompt_per_mahasiswa(system_prompt: str) -> str:
+    """Menambahkan instruksi penilaian per mahasiswa (beberapa file dinilai bersama) ke system prompt."""
+    return system_prompt + "\n\n" + PROMPT_PER_MAHASISWA.strip()
+
+def buat_prompt_kaskade(system_prompt: str) -> str:
+    """Menambahkan permintaan field "keyakinan" (mode kaskade) ke system prompt; aman dipanggil berulang."""
+    if PROMPT_KEYAKINAN.strip() in system_prompt:
+        return system_prompt
+    return system_prompt + "\n\n" + PROMPT_KEYAKINAN.strip()
+
+def alasan_eskalasi(
+    hasil: Dict[str, Any],
+    rentang_nilai_ragu: Tuple[int, int] = RENTANG_NILAI_RAGU,
+    batas_keyakinan: int = BATAS_KEYAKINAN
+) -> Optional[str]:
     """
-    Membersihkan teks output dari LLM untuk mendapatkan string JSON yang valid.
-    Fungsi ini akan mencari blok JSON yang diapit oleh ```json ... ``` atau langsung oleh { ... }.
+    Alasan hasil model kecil perlu dinilai ulang oleh model besar: "gagal" (output tidak valid
+    atau error API), "nilai_ragu" (nilai di dalam `rentang_nilai_ragu`), atau "keyakinan"
+    (keyakinan yang dilaporkan model di bawah `batas_keyakinan`). None jika hasilnya dipakai.
     """
-    match = re.search(r'\{.*\}', text, re.DOTALL)
-    if match:
-        return match.group(0)
+    if hasil.get("kesalahan") == "GAGAL proses":
+        return "gagal"
+    if rentang_nilai_ragu[0] <= hasil["nilai"] <= rentang_nilai_ragu[1]:
+        return "nilai_ragu"
+    try:
+        keyakinan = float(hasil.get("keyakinan", 100))
+    except (TypeError, ValueError):
+        return "keyakinan"
+    if keyakinan < batas_keyakinan:
+        return "keyakinan"
     return None
 
+def buat_prompt_batch(system_prompt: str) -> str:
+    """Menambahkan instruksi mode batch (banyak file, output JSON array) ke system prompt."""
+    return system_prompt + "\n\n" + PROMPT_BATCH.strip()
+
+# Model yang ternyata menolak response_format (diisi otomatis dari error 400 server)
+_model_tanpa_json_mode: set = set()
+
+def dukung_json_mode(model: str) -> bool:
+    """True jika request ke `model` boleh memakai response_format json_object (JSON mode)."""
+    return model not in _model_tanpa_json_mode
+
+def _completion_dari_teks(teks: str) -> Any:
+    """Objek berbentuk completion dengan isi `teks` (untuk output yang dikembalikan lewat error)."""
+    pesan = types.SimpleNamespace(content=teks)
+    return types.SimpleNamespace(choices=[types.SimpleNamespace(message=pesan)], usage=None)
+
+def _panggil_api(
+    client: Groq,
+    penjadwal: Optional[PenjadwalAPI],
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    metrik: Optional[Dict[str, Any]] = None,
+    json_mode: bool = False
+) -> Any:
+    """
+    Memanggil chat completion, lewat penjadwal rate limit jika ada. Jika `metrik` diberikan,
+    latensi, jumlah retry, dan pemakaian token (completion.usage) ditambahkan ke dalamnya.
+
+    Dengan `json_mode`, request memakai response_format json_object bila model mendukungnya.
+    Jika server menolak output model karena bukan JSON valid (json_validate_failed), output
+    mentahnya dikembalikan apa adanya agar bisa diperbaiki lokal tanpa request ulang. Model yang
+    tidak mendukung JSON mode dicatat dan request diulang sekali tanpa response_format.
+    """
+    kwargs: Dict[str, Any] = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens}
+    if json_mode and dukung_json_mode(model):
+        kwargs["response_format"] = {"type": "json_object"}
+    info: Dict[str, int] = {}
+    mulai = time.perf_counter()
+    try:
+        if penjadwal is not None:
+            estimasi = sum(estimasi_token(m["content"]) for m in messages) + max_tokens
+            completion = penjadwal.jalankan(client, model, estimasi, info=info, **kwargs)
+        else:
+            completion = client.chat.completions.create(model=model, **kwargs)
+    except groq.BadRequestError as e:
+        if "response_format" not in kwargs:
+            raise
+        error = e.body.get("error", e.body) if isinstance(e.body, dict) else {}
+        if error.get("code") == "json_validate_failed":
+            completion = _completion_dari_teks(error.get("failed_generation") or "")
+        elif "response_format" in str(error.get("message", e)) or "json mode" in str(e).lower():
+            print(f"Model {model} tidak mendukung JSON mode, dilanjutkan tanpa response_format.")
+            _model_tanpa_json_mode.add(model)
+            completion = None
+        else:
+            raise
+    finally:
+        if metrik is not None:
+            metrik["latensi_api"] += time.perf_counter() - mulai
+            metrik["jumlah_retry"] += info.get("retry", 0)
+    if completion is None:
+        return _panggil_api(client, penjadwal, model, messages, temperature, max_tokens, metrik)
+    if metrik is not None:
+        catat_usage(metrik, completion)
+    return completion
+
+# Jarak minimal antar event hasil sementara untuk satu file saat streaming (detik)
+INTERVAL_PARSIAL = 0.25
+
+def _panggil_api_stream(
+    client: Groq,
+    penjadwal: Optional[PenjadwalAPI],
+    model: str,
+    messages: List[Dict[str, str]],
+    temperature: float,
+    max_tokens: int,
+    metrik: Dict[str, Any],
+    nama_file: str,
+    saat_parsial: Optional[Callable[[str, Dict[str, Any]], None]] = None
+) -> str:
+    """
+    Seperti _panggil_api, tetapi memakai `stream=True` dan mengembalikan teks output model.
+    Setiap potongan token diumpankan ke pengurai bertahap: isi sementara (mis. feedback yang baru
+    sebagian) dikirim ke `saat_parsial(nama_file, data)`, dan stream ditutup begitu objek hasil
+    yang valid lengkap sehingga token sisa (penutup, prosa tambahan) tidak ditunggu.
+    JSON mode tidak dipakai di sini karena response_format tidak bisa digabung dengan streaming.
+    """
+    pengurai = ParserJSONBertahap(lambda data: validasi_hasil(data, nama_file))
+    info: Dict[str, int] = {}
+    usage = None
+    mulai = time.perf_counter()
+    try:
+        kwargs = {"messages": messages, "temperature": temperature, "max_tokens": max_tokens, "stream": True}
+        if penjadwal is not None:
+            estimasi = sum(estimasi_token(m["content"]) for m in messages) + max_tokens
+            stream = penjadwal.jalankan(client, model, estimasi, info=info, **kwargs)
+        else:
+            stream = client.chat.completions.create(model=model, **kwargs)
+        if hasattr(stream, "choices"):
+            # Client yang tidak mendukung streaming mengembalikan completion biasa
+            catat_usage(metrik, stream)
+            return stream.choices[0].message.content or ""
+        terakhir_kirim = 0.0
+        try:
+            for chunk in stream:
+                # Groq mengirim usage di chunk terakhir (x_groq.usage)
+                usage = getattr(getattr(chunk, "x_groq", None), "usage", None) or usage
+                if not chunk.choices or not chunk.choices[0].delta.content:
+                    continue
+                if pengurai.tambah(chunk.choices[0].delta.content):
+                    break
+                if saat_parsial is not None and time.perf_counter() - terakhir_kirim >= INTERVAL_PARSIAL:
+                    data = pengurai.parsial()
+                    if data:
+                        saat_parsial(nama_file, dict(data, nama_file=nama_file))
+                        terakhir_kirim = time.perf_counter()
+        finally:
+            stream.close()
+    except httpx.HTTPError as e:
+        raise ErrorAPISementara(f"Streaming terputus: {e}") from e
+    finally:
+        metrik["latensi_api"] += time.perf_counter() - mulai
+        metrik["jumlah_retry"] += info.get("retry", 0)
+    if usage is not None:
+        catat_usage(metrik, types.SimpleNamespace(usage=usage))
+    else:
+        # Stream ditutup lebih awal sehingga usage dari server tidak diterima; pakai perkiraan
+        metrik["token_prompt"] += sum(estimasi_token(m["content"]) for m in messages)
+        metrik["token_completion"] += estimasi_token(pengurai.teks)
+    return pengurai.teks
+
+# Strategi untuk kode yang melebihi konteks model
+STRATEGI_FILE_BESAR = ("potong", "ringkas")
+# Batas jumlah potongan yang diringkas untuk satu file (sisanya dipotong lebih dulu)
+MAX_POTONGAN_RINGKASAN = 8
+TOKEN_RINGKASAN = 512
+
+PROMPT_RINGKAS = """
+Anda membantu menilai tugas pemrograman yang sangat panjang. Ringkas potongan kode berikut untuk penilai: sebutkan fungsi/kelas yang ada, alur logika utama, serta kesalahan atau keanehan yang terlihat. Jawab dalam teks biasa, maksimal 200 kata.
+""".strip()
+
+def _ringkas_kode_besar(
+    client: Groq,
+    penjadwal: Optional[PenjadwalAPI],
+    model: str,
+    nama_file: str,
+    kode: str,
+    anggaran: int,
+    metrik: Optional[Dict[str, Any]] = None
+) -> str:
+    """Strategi summary-then-grade: kode dipecah, tiap potongan diringkas, ringkasannya yang dinilai."""
+    batas_potongan = anggaran_kode(model, PROMPT_RINGKAS, TOKEN_RINGKASAN)
+    kode = potong_kode(kode, batas_potongan * MAX_POTONGAN_RINGKASAN)
+    potongan = pecah_kode(kode, batas_potongan)
+    ringkasan = []
+    for nomor, isi in enumerate(potongan, 1):
+        completion = _panggil_api(
+            client, penjadwal, model,
+            [
+                {"role": "system", "content": PROMPT_RINGKAS},
+                {"role": "user", "content": f"Nama File: {nama_file} (bagian {nomor}/{len(potongan)})\n\n```\n{isi}\n```"}
+            ],
+            temperature=0.0,
+            max_tokens=TOKEN_RINGKASAN,
+            metrik=metrik,
+        )
+        ringkasan.append(f"[Bagian {nomor}/{len(potongan)}]\n{(completion.choices[0].message.content or '').strip()}")
+    teks = (
+        f"Catatan: file ini terlalu panjang ({estimasi_token(kode)} token) sehingga yang dinilai "
+        f"adalah ringkasan per bagian berikut.\n\n" + "\n\n".join(ringkasan)
+    )
+    return potong_kode(teks, anggaran)
+
 def dapatkan_penilaian(
     client: Groq, 
     system_prompt: str, 
     nama_file: str, 
     kode: str,
     model: str = "llama-3.3-70b-versatile",
-    temperature: float = 0.1
+    temperature: float = 0.1,
+    penjadwal: Optional[PenjadwalAPI] = None,
+    strategi_file_besar: str = "potong",
+    streaming: bool = False,
+    saat_parsial: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    diagnostik: str = "",
+    model_eskalasi: Optional[str] = None,
+    rentang_nilai_ragu: Tuple[int, int] = RENTANG_NILAI_RAGU,
+    batas_keyakinan: int = BATAS_KEYAKINAN,
+    max_percobaan: int = 3
 ) -> Dict[str, Any]:
-    """Memanggil API Groq untuk mendapatkan penilaian dan memastikan outputnya adalah JSON valid."""
-    max_retries = 3
+    """
+    Memanggil API Groq untuk mendapatkan penilaian dan memastikan outputnya adalah JSON valid.
+
+    Jika `penjadwal` diberikan, panggilan API melewati penjadwal sehingga 429, timeout, dan 5xx
+    di-retry dengan backoff sesuai rate limit. Error API yang tidak bisa dipulihkan (kecuali API key
+    tidak valid) dikembalikan sebagai hasil "GAGAL proses" agar tidak menghentikan seluruh batch.
+
+    Kode yang melebihi konteks model ditangani sesuai `strategi_file_besar`: "potong" (bagian
+    tengah dibuang) atau "ringkas" (dipecah, tiap potongan diringkas, lalu ringkasannya dinilai).
+
+    Setiap hasil dilengkapi metrik: latensi_api, waktu_parse, jumlah_retry (API dan parsing),
+    token_prompt, dan token_completion (dari completion.usage). waktu_baca diisi oleh pemanggil.
+
+    Dengan `streaming`, output diterima per token (lihat _panggil_api_stream): hasil sementara
+    dikirim ke `saat_parsial(nama_file, data)` dan request dihentikan begitu JSON hasilnya lengkap.
+
+    `diagnostik` (hasil saringan_awal, opsional) ditambahkan setelah kode sebagai fakta pendukung
+    agar model tidak perlu menebak apakah kode valid secara sintaks.
+
+    Mode kaskade (`model_eskalasi` diberikan): `model` (model kecil yang cepat) menilai dulu, diminta
+    melaporkan "keyakinan". Hanya jika outputnya gagal, nilainya di dalam `rentang_nilai_ragu`, atau
+    keyakinannya di bawah `batas_keyakinan` (lihat alasan_eskalasi), file dinilai ulang oleh
+    `model_eskalasi`. Hasil mendapat kolom 'model_penilai' dan 'eskalasi' (alasan, atau "" jika tidak
+    dieskalasi); metrik kedua panggilan dijumlahkan.
+
+    Output yang bukan JSON valid diminta ulang hingga `max_percobaan` kali.
+    """
+    if model_eskalasi and model_eskalasi != model:
+        system_prompt = buat_prompt_kaskade(system_prompt)
+        hasil = dapatkan_penilaian(
+            client, system_prompt, nama_file, kode, model=model, temperature=temperature,
+            penjadwal=penjadwal, strategi_file_besar=strategi_file_besar, streaming=streaming,
+            saat_parsial=saat_parsial, diagnostik=diagnostik,
+            # Output rusak dari model kecil langsung dieskalasi, tidak diminta ulang
+            max_percobaan=1
+        )
+        return eskalasi_jika_perlu(
+            client, system_prompt, nama_file, kode, hasil, model, model_eskalasi,
+            rentang_nilai_ragu, batas_keyakinan, temperature=temperature, penjadwal=penjadwal,
+            strategi_file_besar=strategi_file_besar, streaming=streaming, saat_parsial=saat_parsial,
+            diagnostik=diagnostik
+        )
+
+    max_retries = max_percobaan
     retry_count = 0
     raw_output = ""
+    max_tokens = MAX_TOKENS_OUTPUT
+    metrik = metrik_kosong()
+
+    anggaran = anggaran_kode(model, system_prompt, max_tokens)
+    if estimasi_token(kode) > anggaran:
+        print(f"{nama_file} terlalu panjang ({estimasi_token(kode)} token, anggaran {anggaran}); strategi: {strategi_file_besar}")
+        try:
+            if strategi_file_besar == "ringkas":
+                kode = _ringkas_kode_besar(client, penjadwal, model, nama_file, kode, anggaran, metrik)
+            else:
+                kode = potong_kode(kode, anggaran)
+        except groq.AuthenticationError:
+            raise
+        except (ErrorAPISementara, groq.APIError) as e:
+            print(f"Gagal meringkas {nama_file}, kode dipotong saja. Error: {e}")
+            kode = potong_kode(kode, anggaran)
+
+    user_content = f"Nama File: {nama_file}\n\nKode Program:\n```\n{kode}\n```"
+    if diagnostik:
+        user_content += f"\n\nHasil pemeriksaan otomatis (lokal):\n{diagnostik}"
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_content}
+    ]
     
     while retry_count < max_retries:
         try:
-            user_content = f"Nama File: {nama_file}\n\nKode Program:\n```\n{kode}\n```"
-            
-            completion = client.chat.completions.create(
-                model=model,  # Menggunakan model dari parameter
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_content}
-                ],
-                temperature=temperature,  # Menggunakan temperature dari parameter
-                max_tokens=1024,
-            )
-            
-            raw_output = completion.choices[0].message.content
-            
-            json_string = bersihkan_json(raw_output)
-            
-            if not json_string:
-                raise json.JSONDecodeError("Blok JSON tidak ditemukan.", raw_output, 0)
-
-            parsed_json = json.loads(json_string)
-            
-            if not all(k in parsed_json for k in ["nama_file", "nilai", "kesalahan", "feedback"]):
-                 raise ValueError("JSON tidak memiliki field yang dibutuhkan.")
-            if not isinstance(parsed_json["nilai"], int):
-                try:
-                    parsed_json["nilai"] = int(parsed_json["nilai"])
-                except (ValueError, TypeError):
-                    raise TypeError("Field 'nilai' harus berupa angka (integer).")
-            
-            return parsed_json
+            if streaming:
+                raw_output = _panggil_api_stream(
+                    client, penjadwal, model, messages, temperature, max_tokens, metrik,
+                    nama_file, saat_parsial
+                )
+            else:
+                completion = _panggil_api(
+                    client, penjadwal, model, messages, temperature, max_tokens, metrik, json_mode=True
+                )
+                raw_output = completion.choices[0].message.content or ""
+        except groq.AuthenticationError:
+            # API key salah: tidak ada gunanya melanjutkan batch
+            raise
+        except (ErrorAPISementara, groq.APIError) as e:
+            print(f"Gagal memanggil API untuk {nama_file}: {e}")
+            return {
+                "nama_file": nama_file,
+                "nilai": 0,
+                "kesalahan": "GAGAL proses",
+                "feedback": f"GAGAL DIPROSES: Error dari API ({e}).",
+                **bulatkan(metrik)
+            }
 
-        except (json.JSONDecodeError, ValueError, TypeError) as e:
+        mulai_parse = time.perf_counter()
+        try:
+            # raw_decode + perbaikan lokal; request ulang hanya jika tetap tidak ada objek valid
+            hasil = urai_hasil(raw_output, nama_file)
+            # Nama file yang ditulis model bisa berbeda (mis. tanpa folder); checkpoint dan resume
+            # mencocokkan hasil dengan nama file di arsip
+            hasil["nama_file"] = nama_file
+            metrik["waktu_parse"] += time.perf_counter() - mulai_parse
+            hasil.update(bulatkan(metrik))
+            return hasil
+
+        except (ValueError, TypeError) as e:
+            metrik["waktu_parse"] += time.perf_counter() - mulai_parse
             retry_count += 1
             print(f"Percobaan {retry_count}/{max_retries}: Gagal mem-parsing JSON untuk {nama_file}. Error: {e}")
             if retry_count >= max_retries:
@@ -119,97 +440,713 @@ def dapatkan_penilaian(
                     "nama_file": nama_file,
                     "nilai": 0,
                     "kesalahan": "GAGAL proses",
-                    "feedback": f"GAGAL DIPROSES: Output dari AI bukan JSON yang valid setelah {max_retries} percobaan. Output mentah: {raw_output[:200]}..."
+                    "feedback": f"GAGAL DIPROSES: Output dari AI bukan JSON yang valid setelah {max_retries} percobaan. Output mentah: {(raw_output or '')[:200]}...",
+                    **bulatkan(metrik)
                 }
-            time.sleep(2)
+            # Output rusak bukan masalah rate limit, jadi request ulang tidak perlu menunggu
+            metrik["jumlah_retry"] += 1
     return {}
 
+def eskalasi_jika_perlu(
+    client: Groq,
+    system_prompt: str,
+    nama_file: str,
+    kode: str,
+    hasil: Dict[str, Any],
+    model: str,
+    model_eskalasi: str,
+    rentang_nilai_ragu: Tuple[int, int] = RENTANG_NILAI_RAGU,
+    batas_keyakinan: int = BATAS_KEYAKINAN,
+    **opsi: Any
+) -> Dict[str, Any]:
+    """
+    Menilai ulang `hasil` dari model kecil dengan `model_eskalasi` jika alasan_eskalasi
+    mengembalikan alasan. `opsi` diteruskan ke dapatkan_penilaian. Metrik model kecil ditambahkan
+    ke hasil model besar sehingga biaya kaskade tercatat penuh.
+    """
+    alasan = alasan_eskalasi(hasil, rentang_nilai_ragu, batas_keyakinan)
+    if alasan is None:
+        hasil.update({"model_penilai": model, "eskalasi": ""})
+        return hasil
+    print(f"{nama_file} dieskalasi ke {model_eskalasi} ({alasan})")
+    hasil_besar = dapatkan_penilaian(client, system_prompt, nama_file, kode, model=model_eskalasi, **opsi)
+    for kolom, nilai in metrik_kosong().items():
+        hasil_besar[kolom] = hasil_besar.get(kolom, nilai) + hasil.get(kolom, nilai)
+    hasil_besar.update({"model_penilai": model_eskalasi, "eskalasi": alasan})
+    return bulatkan(hasil_besar)
+
+def dapatkan_penilaian_batch(
+    client: Groq,
+    system_prompt: str,
+    daftar_file: List[Tuple[str, str]],
+    model: str = "llama-3.3-70b-versatile",
+    temperature: float = 0.1,
+    penjadwal: Optional[PenjadwalAPI] = None,
+    strategi_file_besar: str = "potong",
+    diagnostik: Optional[Dict[str, str]] = None,
+    max_percobaan: int = 3
+) -> Tuple[Dict[str, Dict[str, Any]], Dict[str, Any]]:
+    """
+    Menilai beberapa file (nama_file, kode) dalam satu request dan mengharapkan JSON array.
+
+    File yang hasilnya tidak ada atau tidak valid di dalam array (atau jika array-nya rusak)
+    dinilai ulang satu per satu dengan dapatkan_penilaian.
+
+    Metrik request batch (latensi_api, retry) dicatat penuh untuk setiap file di dalamnya, sedangkan
+    waktu parse dan token dibagi rata; file fallback juga mendapat metrik penilaian ulangnya.
+    `diagnostik` memetakan nama file ke hasil saringan_awal yang disertakan setelah kodenya.
+    `max_percobaan` diteruskan ke dapatkan_penilaian untuk file fallback.
+
+    Returns:
+        (hasil per nama file, info batch) dengan info berisi jumlah_file, token_estimasi,
+        jumlah_request, dan jumlah_fallback.
+    """
+    prompt_batch = buat_prompt_batch(system_prompt)
+    diagnostik = diagnostik or {}
+    user_content = "\n\n".join(
+        f"=== Nama File: {nama_file} ===\n```\n{kode}\n```"
+        + (f"\nHasil pemeriksaan otomatis (lokal):\n{diagnostik[nama_file]}" if diagnostik.get(nama_file) else "")
+        for nama_file, kode in daftar_file
+    )
+    max_tokens = min(8192, TOKEN_OUTPUT_PER_FILE * len(daftar_file))
+    token_input = estimasi_token(prompt_batch) + estimasi_token(user_content)
+    messages = [
+        {"role": "system", "content": prompt_batch},
+        {"role": "user", "content": user_content}
+    ]
+
+    hasil: Dict[str, Dict[str, Any]] = {}
+    metrik = metrik_kosong()
+    mulai_parse = None
+    try:
+        completion = _panggil_api(
+            client, penjadwal, model, messages, temperature, max_tokens, metrik, json_mode=True
+        )
+        mulai_parse = time.perf_counter()
+        raw_output = completion.choices[0].message.content or ""
+        # Objek valid diambil dari array atau pembungkus {"hasil": [...]}; objek yang rusak dilewati
+        daftar_hasil = urai_hasil_batch(raw_output)
+        if not daftar_hasil:
+            raise ValueError("Tidak ada hasil penilaian valid di output mode batch.")
+
+        nama_valid = {nama_file for nama_file, _ in daftar_file}
+        for posisi, item in enumerate(daftar_hasil):
+            nama_file = item.get("nama_file")
+            # Model kadang mengubah nama file; gunakan urutan jika jumlah hasil sesuai
+            if nama_file not in nama_valid and len(daftar_hasil) == len(daftar_file):
+                nama_file = daftar_file[posisi][0]
+            if nama_file in nama_valid and nama_file not in hasil:
+                item["nama_file"] = nama_file
+                hasil[nama_file] = item
+    except groq.AuthenticationError:
+        raise
+    except (ErrorAPISementara, groq.APIError, ValueError) as e:
+        print(f"Batch {len(daftar_file)} file gagal, dinilai ulang per file. Error: {e}")
+    if mulai_parse is not None:
+        metrik["waktu_parse"] += time.perf_counter() - mulai_parse
+
+    fallback = [(nama_file, kode) for nama_file, kode in daftar_file if nama_file not in hasil]
+    for nama_file, kode in fallback:
+        hasil[nama_file] = dapatkan_penilaian(
+            client, system_prompt, nama_file, kode,
+            model=model, temperature=temperature, penjadwal=penjadwal,
+            strategi_file_besar=strategi_file_besar, diagnostik=diagnostik.get(nama_file, ""),
+            max_percobaan=max_percobaan
+        )
+
+    jumlah = len(daftar_file)
+    for nama_file, _ in daftar_file:
+        item = hasil[nama_file]
+        for kolom, nilai in metrik_kosong().items():
+            item.setdefault(kolom, nilai)
+        item["latensi_api"] += metrik["latensi_api"]
+        item["jumlah_retry"] += metrik["jumlah_retry"]
+        item["waktu_parse"] += metrik["waktu_parse"] / jumlah
+        item["token_prompt"] += metrik["token_prompt"] // jumlah
+        item["token_completion"] += metrik["token_completion"] // jumlah
+        bulatkan(item)
+
+    info = {
+        'jumlah_file': len(daftar_file),
+        'token_estimasi': token_input,
+        'jumlah_request': 1 + len(fallback),
+        'jumlah_fallback': len(fallback),
+    }
+    return hasil, info
+
+def kemas_batch(
+    tugas: Iterable[Tuple[int, str, Optional[str]]],
+    token_per_batch: int,
+    max_file: int = MAX_FILE_PER_BATCH
+) -> Generator[List[Tuple[int, str, Optional[str]]], None, None]:
+    """
+    Mengelompokkan tugas (index, nama, kode) secara berurutan ke dalam batch yang total estimasi
+    token kodenya tidak melebihi `token_per_batch`. File yang sendirian sudah melebihi anggaran
+    menjadi batch berisi satu file. Jika `token_per_batch` <= 0 setiap file menjadi batch sendiri.
+    """
+    batch: List[Tuple[int, str, Optional[str]]] = []
+    token_batch = 0
+    for item in tugas:
+        if token_per_batch <= 0:
+            yield [item]
+            continue
+        token_item = estimasi_token(item[2] or "") + estimasi_token(item[1]) + 10
+        if batch and (token_batch + token_item > token_per_batch or len(batch) >= max_file):
+            yield batch
+            batch, token_batch = [], 0
+        batch.append(item)
+        token_batch += token_item
+    if batch:
+        yield batch
+
+def _hasil_gagal_baca(file_name: str) -> Dict[str, Any]:
+    """Hasil default untuk file yang tidak bisa dibaca dari zip."""
+    return {
+        "nama_file": file_name,
+        "nilai": 0,
+        "kesalahan": "GAGAL proses",
+        "feedback": f"ERROR: Tidak dapat membaca file. Mungkin file corrupt atau format tidak didukung."
+    }
+
+def _baca_kode(zip_ref: zipfile.ZipFile, file_name: str) -> Optional[str]:
+    """Membaca isi satu file dari zip sebagai teks. Mengembalikan None jika gagal."""
+    try:
+        return baca_teks(zip_ref, file_name)
+    except Exception as e:
+        print(f"Gagal membaca file {file_name} dari zip: {e}")
+        return None
+
+def _nama_dalam_submission(submission: Submission, nama_file: str) -> str:
+    """Path file relatif terhadap folder/ZIP mahasiswanya (untuk header dan kolom daftar_file)."""
+    mahasiswa, zip_bersarang, _ = submission
+    if zip_bersarang is not None:
+        return nama_file
+    bagian = ("/" + nama_file).split("/" + mahasiswa + "/", 1)
+    return bagian[1] if len(bagian) == 2 else nama_file.rsplit("/", 1)[-1]
+
+def _baca_submission(zip_ref: zipfile.ZipFile, submission: Submission, minifikasi: bool = False) -> Optional[str]:
+    """
+    Menggabungkan semua file kode satu mahasiswa menjadi satu teks, masing-masing diawali
+    "### File: <path>". File yang gagal dibaca dilewati; None jika tidak ada yang terbaca.
+    """
+    _, zip_bersarang, anggota = submission
+    bagian = []
+    try:
+        with buka_zip_bersarang(zip_ref, zip_bersarang) if zip_bersarang else nullcontext(zip_ref) as ref:
+            for nama_file in anggota:
+                kode = _baca_kode(ref, nama_file)
+                if kode is None:
+                    continue
+                if minifikasi:
+                    kode = minifikasi_kode(kode, nama_file)
+                bagian.append(f"### File: {_nama_dalam_submission(submission, nama_file)}\n{kode}")
+    except (zipfile.BadZipFile, ArsipTidakAman) as e:
+        print(f"Gagal membaca {zip_bersarang}: {e}")
+    return "\n\n".join(bagian) if bagian else None
+
+def _nilai_kelompok(
+    client: Groq,
+    system_prompt: str,
+    kelompok: List[Tuple[int, str, Optional[str]]],
+    model: str,
+    temperature: float,
+    cache: Optional[CachePenilaian] = None,
+    penjadwal: Optional[PenjadwalAPI] = None,
+    strategi_file_besar: str = "potong",
+    saat_parsial: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+    saringan_awal: str = "nonaktif",
+    kaskade: Optional[Dict[str, Any]] = None
+) -> Tuple[List[Tuple[int, str, Dict[str, Any]]], Optional[Dict[str, Any]]]:
+    """
+    Menilai satu kelompok file yang sudah dibaca; dipakai oleh mode sekuensial maupun paralel.
+    File yang ada di cache tidak dikirim ulang. Sisa file dinilai satu per satu, atau dalam satu
+    request batch jika lebih dari satu. Setiap hasil dicatat perkiraan jumlah token kodenya
+    (`jumlah_token`). Mengembalikan (hasil per file, info batch atau None).
+    Jika `saat_parsial` diberikan, file yang dinilai sendiri (bukan batch) memakai streaming.
+    File yang tidak ada di cache disaring dulu sesuai `saringan_awal` (lihat saringan_awal.py).
+    `kaskade` (model_eskalasi, rentang_nilai_ragu, batas_keyakinan) mengaktifkan mode kaskade;
+    hasil batch dari model kecil dieskalasi per file.
+    """
+    kaskade = kaskade or {}
+    # Hasil kaskade bergantung pada model besar dan ambangnya, jadi ikut membedakan cache
+    model_cache = f"{model}>{sorted(kaskade.items())}" if kaskade else model
+    # Setelan pemotongan/peringkasan file besar dan saringan menentukan apa yang dikirim ke model
+    pengaturan_cache = {
+        'strategi_file_besar': strategi_file_besar,
+        'anggaran_kode': anggaran_kode(model, system_prompt),
+        'token_ringkasan': TOKEN_RINGKASAN if strategi_file_besar == "ringkas" else None,
+        'saringan_awal': saringan_awal,
+    }
+    if kaskade.get('model_eskalasi'):
+        pengaturan_cache['anggaran_kode_eskalasi'] = anggaran_kode(kaskade['model_eskalasi'], system_prompt)
+    hasil_per_nama: Dict[str, Dict[str, Any]] = {}
+    kunci_per_nama: Dict[str, str] = {}
+    perlu_dinilai: List[Tuple[str, str]] = []
+
+    for _, file_name, kode_program in kelompok:
+        if kode_program is None:
+            hasil_per_nama[file_name] = _hasil_gagal_baca(file_name)
+            continue
+        if cache is not None:
+            kunci = buat_kunci_cache(system_prompt, model_cache, temperature, kode_program, pengaturan_cache)
+            hasil_cache = cache.ambil(kunci)
+            if hasil_cache is not None:
+                # Kode yang sama bisa berasal dari file dengan nama berbeda
+                hasil_cache["nama_file"] = file_name
+                hasil_per_nama[file_name] = hasil_cache
+                continue
+            kunci_per_nama[file_name] = kunci
+        perlu_dinilai.append((file_name, kode_program))
+
+    diagnostik: Dict[str, str] = {}
+    if saringan_awal != "nonaktif" and perlu_dinilai:
+        lolos = []
+        for (file_name, kode_program), (kategori, catatan) in zip(perlu_dinilai, saring_kelompok(perlu_dinilai)):
+            if kategori is not None and saringan_awal == "otomatis":
+                # Hasil deterministik tidak disimpan di cache: saringannya sendiri sudah murah
+                hasil_per_nama[file_name] = hasil_saringan(file_name, kategori, catatan)
+                kunci_per_nama.pop(file_name, None)
+                continue
+            diagnostik[file_name] = catatan
+            lolos.append((file_name, kode_program))
+        perlu_dinilai = lolos
+
+    info_batch = None
+    if len(perlu_dinilai) == 1:
+        file_name, kode_program = perlu_dinilai[0]
+        hasil_per_nama[file_name] = dapatkan_penilaian(
+            client,
+            system_prompt,
+            file_name,
+            kode_program,
+            model=model,
+            temperature=temperature,
+            penjadwal=penjadwal,
+            strategi_file_besar=strategi_file_besar,
+            streaming=saat_parsial is not None,
+            saat_parsial=saat_parsial,
+            diagnostik=diagnostik.get(file_name, ""),
+            **kaskade
+        )
+    elif perlu_dinilai:
+        hasil_batch, info_batch = dapatkan_penilaian_batch(
+            client, system_prompt, perlu_dinilai, model=model, temperature=temperature,
+            penjadwal=penjadwal, strategi_file_besar=strategi_file_besar, diagnostik=diagnostik,
+            # Pada mode kaskade output rusak model kecil langsung dieskalasi, tidak diminta ulang
+            max_percobaan=1 if kaskade else 3
+        )
+        if kaskade:
+            for file_name, kode_program in perlu_dinilai:
+                hasil_batch[file_name] = eskalasi_jika_perlu(
+                    client, system_prompt, file_name, kode_program, hasil_batch[file_name], model,
+                    **kaskade, temperature=temperature, penjadwal=penjadwal,
+                    strategi_file_besar=strategi_file_besar, diagnostik=diagnostik.get(file_name, "")
+                )
+        hasil_per_nama.update(hasil_batch)
+
+    # Hasil gagal tidak disimpan supaya dicoba lagi pada run berikutnya
+    # Metrik tidak ikut disimpan: hasil dari cache tidak memakai waktu API maupun token
+    for file_name, kunci in kunci_per_nama.items():
+        hasil = hasil_per_nama[file_name]
+        if hasil.get("kesalahan") != "GAGAL proses":
+            cache.simpan(kunci, {k: v for k, v in hasil.items() if k not in KOLOM_METRIK})
+
+    hasil_kelompok = []
+    for i, file_name, kode_program in kelompok:
+        hasil = hasil_per_nama[file_name]
+        for kolom, nilai in metrik_kosong().items():
+            hasil.setdefault(kolom, nilai)
+        hasil["jumlah_token"] = estimasi_token(kode_program or "")
+        hasil_kelompok.append((i, file_name, hasil))
+    return hasil_kelompok, info_batch
+
 def proses_file_zip_realtime(
     client: Groq, 
-    zip_file_bytes: bytes, 
+    zip_file_bytes: SumberArsip, 
     soal_text: str, 
     kriteria_text: str,
     model: str = "llama-3.3-70b-versatile",
-    temperature: float = 0.1
+    temperature: float = 0.1,
+    max_workers: int = 1,
+    cache: Optional[CachePenilaian] = None,
+    penjadwal: Optional[PenjadwalAPI] = None,
+    deteksi_duplikat: bool = False,
+    token_per_batch: int = 0,
+    minifikasi: bool = False,
+    strategi_file_besar: str = "potong",
+    lewati_file: Optional[Container[str]] = None,
+    executor: Optional[Executor] = None,
+    streaming: bool = False,
+    per_mahasiswa: bool = False,
+    saringan_awal: str = "nonaktif",
+    model_eskalasi: Optional[str] = None,
+    rentang_nilai_ragu: Tuple[int, int] = RENTANG_NILAI_RAGU,
+    batas_keyakinan: int = BATAS_KEYAKINAN,
+    riwayat: Optional[RiwayatPenilaian] = None,
+    nama_tugas: Optional[str] = None,
+    id_run: Optional[str] = None
 ) -> Generator[Dict[str, Any], None, None]:
     """
-    Mengekstrak file dari zip, menilai satu per satu, dan yield hasilnya secara real-time.
+    Mengekstrak file dari zip, menilai setiap file, dan yield hasilnya secara real-time.
     
     Args:
         client: Groq client instance
-        zip_file_bytes: Bytes dari file ZIP
+        zip_file_bytes: Arsip ZIP berupa bytes, path file, atau file-like object (mis. UploadedFile).
+            File-like object di-spool ke disk sehingga arsip besar tidak disimpan di memori.
         soal_text: Teks soal
         kriteria_text: Kriteria penilaian tambahan
         model: Model Groq yang akan digunakan
         temperature: Temperature untuk model (0-1)
+        max_workers: Jumlah maksimal file yang dinilai bersamaan. Nilai 1 berarti
+            sekuensial (satu per satu); nilai > 1 memakai thread pool dan hasil
+            di-yield sesuai urutan selesainya.
+        cache: Cache hasil penilaian (opsional). File yang prompt, model, temperature, setelan
+            file besar/saringan, dan kodenya sama dengan run sebelumnya tidak dikirim ulang ke API.
+        penjadwal: Penjadwal rate limit (opsional). Jika tidak diberikan, dibuat penjadwal baru
+            dengan konkurensi maksimal `max_workers`. Berikan instance yang sama untuk beberapa
+            batch agar kuota API dibagi bersama.
+        deteksi_duplikat: Jika True, semua file dibaca lebih dulu lalu dikelompokkan. File yang
+            identik (abaikan spasi/komentar) hanya dinilai sekali dan hasilnya disalin ke semua
+            anggotanya; setiap hasil mendapat kolom 'duplikat' berisi file identik/mirip.
+        token_per_batch: Jika > 0, beberapa file dikemas dalam satu request selama total estimasi
+            token kodenya tidak melebihi nilai ini (mode batch). System prompt yang panjang cukup
+            dikirim sekali untuk beberapa file. 0 berarti satu request per file. Anggaran otomatis
+            dibatasi oleh panjang konteks model.
+        minifikasi: Jika True, baris kosong dan spasi di akhir baris dibuang, dan notebook (.ipynb)
+            diringkas menjadi cell kode saja sebelum dikirim.
+        strategi_file_besar: "potong" atau "ringkas" untuk file yang melebihi konteks model
+            (lihat dapatkan_penilaian).
+        lewati_file: Nama file yang sudah dinilai sebelumnya (mis. dari checkpoint) dan tidak perlu
+            dibaca maupun dinilai lagi. File ini tetap dihitung dalam 'total' dan 'current' progress,
+            tetapi tidak menghasilkan event 'result'.
+        executor: Thread pool bersama (opsional) untuk menilai file, mis. milik manajer job yang
+            menjalankan beberapa penilaian sekaligus. Jika tidak diberikan dan max_workers > 1,
+            dibuat thread pool sendiri selama penilaian berjalan.
+        streaming: Jika True, file yang dinilai sendiri (bukan batch) diminta dengan stream=True.
+            Hasil sementara dikirim sebagai event 'partial' selama model masih menulis, dan
+            request dihentikan begitu JSON hasilnya lengkap. Penilaian selalu berjalan di thread
+            pool (juga saat max_workers = 1) agar event bisa di-yield saat file masih dinilai.
+        per_mahasiswa: Jika True, file dikelompokkan per mahasiswa (folder "nim/..." atau ZIP
+            "nim.zip" di dalam arsip, lihat pembaca_zip.daftar_submission). Semua file satu
+            mahasiswa digabung dan dinilai dalam satu request dengan anggaran token gabungan;
+            hasilnya satu baris per mahasiswa ('nama_file' = nama mahasiswa, ditambah kolom
+            'daftar_file'). Progress, lewati_file, dan index memakai satuan mahasiswa.
+        saringan_awal: Penyaringan lokal sebelum memanggil API (lihat saringan_awal.py).
+            "nonaktif"; "diagnostik" (cek sintaks dan struktur kode disertakan di prompt); atau
+            "otomatis" (seperti diagnostik, tetapi file kosong, trivial, tidak bisa dikompilasi,
+            atau bahasanya tidak sesuai ekstensi langsung diberi nilai 0 tanpa API dengan kolom
+            'saringan' berisi kategorinya). Pada mode per mahasiswa, submission baru dianggap
+            gagal jika semua filenya gagal.
+        model_eskalasi: Jika diberikan (dan berbeda dari `model`), penilaian memakai mode kaskade:
+            `model` (model kecil) menilai semua file, dan hanya file dengan output gagal, nilai di
+            dalam `rentang_nilai_ragu`, atau keyakinan di bawah `batas_keyakinan` yang dinilai ulang
+            oleh `model_eskalasi`. Setiap hasil mendapat kolom 'model_penilai' dan 'eskalasi'.
+        riwayat: Riwayat penilaian (opsional). Setiap hasil yang di-yield juga disimpan ke riwayat
+            beserta tugas, mahasiswa (lihat riwayat_penilaian.peta_mahasiswa), model penilai, hash
+            system prompt, dan pemakaian tokennya.
+        nama_tugas: Nama tugas di riwayat. Default "tugas-" + hash prompt, sehingga run dengan soal
+            dan kriteria yang sama tetap terkumpul di satu tugas.
+        id_run: ID run di riwayat (mis. ID job, agar run yang dilanjutkan tetap satu run).
+            Default ID acak baru.
     
     Yields:
         Dict dengan format:
         - {'type': 'progress', 'current': int, 'total': int, 'file_name': str} untuk update progress
-        - {'type': 'result', 'data': dict} untuk hasil penilaian
+        - {'type': 'result', 'index': int, 'data': dict} untuk hasil penilaian
+          (index = posisi file di dalam zip, dimulai dari 1)
+        - {'type': 'partial', 'index': int, 'data': dict} untuk hasil sementara (hanya mode
+          streaming); field yang belum ditulis model belum ada, dan 'feedback' bisa belum lengkap
+        - {'type': 'batch', 'jumlah_file': int, 'token_estimasi': int, 'jumlah_request': int,
+          'jumlah_fallback': int} setiap kali satu request batch selesai (hanya mode batch)
         - {'type': 'error', 'message': str} untuk error
     """
+    if saringan_awal not in MODE_SARINGAN:
+        raise ValueError(f"Mode saringan awal tidak dikenal: {saringan_awal}")
     system_prompt = buat_prompt_penilaian(soal_text, kriteria_text)
+    if per_mahasiswa:
+        system_prompt = buat_prompt_per_mahasiswa(system_prompt)
+    kaskade = None
+    if model_eskalasi and model_eskalasi != model:
+        system_prompt = buat_prompt_kaskade(system_prompt)
+        kaskade = {
+            'model_eskalasi': model_eskalasi,
+            'rentang_nilai_ragu': tuple(rentang_nilai_ragu),
+            'batas_keyakinan': batas_keyakinan,
+        }
+    if penjadwal is None:
+        penjadwal = PenjadwalAPI(max_konkurensi=max_workers)
+    hash_prompt = buat_hash_prompt(system_prompt)
+    nama_tugas = nama_tugas or f"tugas-{hash_prompt[:8]}"
+    id_run = id_run or uuid.uuid4().hex[:12]
+    # Di riwayat, "hasil terbaru" dihitung per model run; pada kaskade nilainya dari salah satu model
+    model_run = f"{model}>{model_eskalasi}" if kaskade else model
+
+    # Hasil sementara dari thread penilai, di-yield oleh generator ini di sela hasil akhir
+    antrian_parsial: Optional["queue.Queue[Tuple[int, str, Dict[str, Any]]]"] = (
+        queue.Queue() if streaming else None
+    )
+
+    def nilai(kelompok: List[Tuple[int, str, Optional[str]]]):
+        saat_parsial = None
+        if antrian_parsial is not None:
+            index_file = {file_name: i for i, file_name, _ in kelompok}
+
+            def saat_parsial(file_name: str, data: Dict[str, Any]) -> None:
+                antrian_parsial.put((index_file[file_name], file_name, data))
+        return _nilai_kelompok(
+            client, system_prompt, kelompok, model, temperature, cache, penjadwal, strategi_file_besar,
+            saat_parsial, saringan_awal, kaskade
+        )
+
+    # Waktu baca/decode per file, dipasang ke hasilnya saat hasil di-yield
+    waktu_baca: Dict[str, float] = {}
+    # Mode per mahasiswa: nama mahasiswa -> file-filenya
+    submission: Optional[Dict[str, Submission]] = None
+
+    def baca(zip_ref, file_name: str) -> Optional[str]:
+        mulai = time.perf_counter()
+        if submission is not None:
+            kode_program = _baca_submission(zip_ref, submission[file_name], minifikasi)
+        else:
+            kode_program = _baca_kode(zip_ref, file_name)
+            if minifikasi and kode_program is not None:
+                kode_program = minifikasi_kode(kode_program, file_name)
+        waktu_baca[file_name] = time.perf_counter() - mulai
+        return kode_program
+
+    if token_per_batch > 0:
+        token_per_batch = min(
+            token_per_batch,
+            anggaran_kode(model, buat_prompt_batch(system_prompt), TOKEN_OUTPUT_PER_FILE * MAX_FILE_PER_BATCH)
+        )
 
     try:
-        with zipfile.ZipFile(io.BytesIO(zip_file_bytes), 'r') as zip_ref:
-            # Filter file yang valid (bukan folder dan bukan __MACOSX)
-            file_list = [f for f in zip_ref.namelist() if not f.endswith('/') and not f.startswith('__MACOSX')]
+        with buka_arsip(zip_file_bytes) as zip_ref:
+            if per_mahasiswa:
+                submission = {s[0]: s for s in daftar_submission(zip_ref)}
+                file_list = list(submission)
+            else:
+                # Filter file yang valid (bukan folder, bukan __MACOSX, bukan biner, tidak terlalu besar)
+                file_list = daftar_file_kode(zip_ref)
             total_files = len(file_list)
-            
-            for i, file_name in enumerate(file_list, 1):
-                # Yield progress info
-                yield {
-                    'type': 'progress',
-                    'current': i,
-                    'total': total_files,
-                    'file_name': file_name
-                }
-                
-                try:
-                    with zip_ref.open(file_name) as file:
-                        try:
-                            kode_program = file.read().decode('utf-8')
-                        except UnicodeDecodeError:
-                            file.seek(0)
-                            kode_program = file.read().decode('latin-1', errors='ignore')
+            lewati_file = lewati_file or ()
+            mahasiswa = (
+                {nama: mahasiswa_dari_nama(nama) for nama in file_list} if per_mahasiswa
+                else peta_mahasiswa(file_list)
+            )
 
-                except Exception as e:
-                    print(f"Gagal membaca file {file_name} dari zip: {e}")
-                    hasil = {
-                        "nama_file": file_name,
-                        "nilai": 0,
-                        "kesalahan": "GAGAL proses",
-                        "feedback": f"ERROR: Tidak dapat membaca file. Mungkin file corrupt atau format tidak didukung."
+            # Tugas dibaca secara lazy kecuali ada tahap yang perlu melihat semua file
+            tugas = (
+                (i, f, baca(zip_ref, f)) for i, f in enumerate(file_list, 1) if f not in lewati_file
+            )
+
+            salinan: Dict[int, List[Tuple[int, str]]] = {}
+            duplikat = None
+            if deteksi_duplikat:
+                tugas, salinan, duplikat = _saring_duplikat(list(tugas))
+
+            selesai = sum(1 for f in file_list if f in lewati_file)
+            diumumkan = None
+            kelompok_tugas = kemas_batch(tugas, token_per_batch)
+            for jenis, i, file_name, hasil in _jalankan_tugas(
+                kelompok_tugas, nilai, max_workers, executor, antrian_parsial
+            ):
+                if jenis == 'batch':
+                    yield {'type': 'batch', **hasil}
+                    continue
+                if jenis == 'parsial':
+                    yield {'type': 'partial', 'index': i, 'data': hasil}
+                    continue
+                if jenis == 'mulai':
+                    # Yield progress info sebelum file dinilai (mode sekuensial)
+                    diumumkan = i
+                    yield {
+                        'type': 'progress',
+                        'current': selesai + 1,
+                        'total': total_files,
+                        'file_name': file_name
                     }
-                    # Yield hasil error
-                    yield {'type': 'result', 'data': hasil}
                     continue
 
-                # Proses penilaian dengan model dan temperature yang diberikan
-                hasil = dapatkan_penilaian(
-                    client, 
-                    system_prompt, 
-                    file_name, 
-                    kode_program,
-                    model=model,
-                    temperature=temperature
-                )
-                
-                # Yield hasil penilaian
-                yield {'type': 'result', 'data': hasil}
+                for j, nama_j, hasil_j in _sebarkan_hasil(i, file_name, hasil, salinan, duplikat):
+                    hasil_j["waktu_baca"] = round(waktu_baca.pop(nama_j, 0.0), 4)
+                    if submission is not None:
+                        hasil_j["daftar_file"] = ", ".join(
+                            _nama_dalam_submission(submission[nama_j], f) for f in submission[nama_j][2]
+                        )
+                    selesai += 1
+                    if j != diumumkan:
+                        yield {
+                            'type': 'progress',
+                            'current': selesai,
+                            'total': total_files,
+                            'file_name': nama_j
+                        }
+                    if riwayat is not None:
+                        try:
+                            riwayat.catat(
+                                id_run, nama_tugas, mahasiswa[nama_j], hasil_j.get("model_penilai") or model,
+                                hash_prompt, hasil_j, model_run=model_run
+                            )
+                        except Exception as e:
+                            # Riwayat hanya pelengkap; kegagalan menyimpan tidak menghentikan penilaian
+                            print(f"Gagal menyimpan riwayat {nama_j}: {e}")
+                    # Yield hasil penilaian
+                    yield {'type': 'result', 'index': j, 'data': hasil_j}
                 
     except zipfile.BadZipFile:
         yield {
             'type': 'error',
             'message': "File yang diupload bukan format .zip yang valid."
         }
+    except ArsipTidakAman as e:
+        yield {
+            'type': 'error',
+            'message': f"File ZIP ditolak: {e}"
+        }
     except Exception as e:
         yield {
             'type': 'error',
             'message': f"Terjadi error tak terduga: {e}"
         }
 
+def _saring_duplikat(
+    tugas: List[Tuple[int, str, Optional[str]]]
+) -> Tuple[List[Tuple[int, str, Optional[str]]], Dict[int, List[Tuple[int, str]]], HasilDuplikat]:
+    """
+    Menyisakan satu wakil untuk setiap kelompok file identik.
+    Mengembalikan (tugas unik, {index wakil: [(index, nama) salinan]}, hasil pengelompokan).
+    """
+    duplikat = kelompokkan_duplikat([(nama, kode) for _, nama, kode in tugas if kode is not None])
+    index_wakil: Dict[str, int] = {}
+    salinan: Dict[int, List[Tuple[int, str]]] = {}
+    tugas_unik = []
+    for i, nama, kode in tugas:
+        wakil = duplikat.wakil.get(nama, nama)
+        if wakil != nama:
+            salinan.setdefault(index_wakil[wakil], []).append((i, nama))
+        else:
+            index_wakil[nama] = i
+            tugas_unik.append((i, nama, kode))
+    return tugas_unik, salinan, duplikat
+
+def _sebarkan_hasil(
+    i: int,
+    file_name: str,
+    hasil: Dict[str, Any],
+    salinan: Dict[int, List[Tuple[int, str]]],
+    duplikat: Optional[HasilDuplikat]
+) -> Generator[Tuple[int, str, Dict[str, Any]], None, None]:
+    """Menghasilkan hasil untuk file wakil beserta salinan hasilnya untuk semua file identik."""
+    if duplikat is not None:
+        hasil["duplikat"] = duplikat.keterangan(file_name)
+    yield i, file_name, hasil
+    for j, nama in salinan.get(i, []):
+        # Salinan tidak memakai API sehingga metrik API/token-nya nol
+        hasil_salinan = dict(hasil, nama_file=nama, **metrik_kosong())
+        hasil_salinan["duplikat"] = duplikat.keterangan(nama)
+        yield j, nama, hasil_salinan
+
+def _jalankan_tugas(
+    kelompok_tugas: Iterable[List[Tuple[int, str, Optional[str]]]],
+    nilai: Callable[
+        [List[Tuple[int, str, Optional[str]]]],
+        Tuple[List[Tuple[int, str, Dict[str, Any]]], Optional[Dict[str, Any]]]
+    ],
+    max_workers: int,
+    executor: Optional[Executor] = None,
+    antrian_parsial: Optional["queue.Queue[Tuple[int, str, Dict[str, Any]]]"] = None
+) -> Generator[Tuple[str, Optional[int], Optional[str], Any], None, None]:
+    """
+    Menjalankan `nilai` untuk setiap kelompok tugas (list of (index, nama file, kode)).
+
+    Yield ('mulai', index, nama, None) sebelum sebuah kelompok dinilai (hanya mode sekuensial),
+    ('hasil', index, nama, hasil) untuk setiap file setelah kelompoknya selesai, dan
+    ('batch', None, None, info) jika kelompok dinilai sebagai satu request batch.
+    Dengan max_workers > 1, kelompok dinilai bersamaan memakai thread pool dan hasil
+    di-yield sesuai urutan selesai. Jika `executor` diberikan, pool tersebut yang dipakai (dibagi
+    dengan pemanggil lain) dan maksimal 2 x max_workers kelompok dari pemanggil ini yang diantrekan.
+
+    Jika `antrian_parsial` diberikan, isinya di-yield sebagai ('parsial', index, nama, data) sambil
+    menunggu kelompok selesai; kelompok selalu dinilai di thread pool agar hal itu mungkin.
+    """
+    if max_workers <= 1 and executor is None and antrian_parsial is None:
+        for kelompok in kelompok_tugas:
+            i, file_name, _ = kelompok[0]
+            yield 'mulai', i, file_name, None
+            # Proses penilaian dengan model dan temperature yang diberikan
+            hasil_kelompok, info_batch = nilai(kelompok)
+            if info_batch:
+                yield 'batch', None, None, info_batch
+            for i, file_name, hasil in hasil_kelompok:
+                yield 'hasil', i, file_name, hasil
+        return
+
+    # Pembacaan zip (iterasi `kelompok_tugas`) tetap dilakukan di thread pemanggil karena ZipFile
+    # tidak dirancang untuk dibaca dari banyak thread, dan hanya sekitar 2 x max_workers kelompok
+    # yang dibaca ke memori pada satu waktu.
+    antrian = iter(kelompok_tugas)
+    batas_antrian = max(1, max_workers) * 2
+    pending = {}
+    milik_sendiri = executor is None
+    if milik_sendiri:
+        executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="penilai")
+
+    def isi_antrian():
+        while len(pending) < batas_antrian:
+            kelompok = next(antrian, None)
+            if kelompok is None:
+                return
+            pending[executor.submit(nilai, kelompok)] = kelompok
+
+    def kuras_parsial():
+        while antrian_parsial is not None:
+            try:
+                i, file_name, data = antrian_parsial.get_nowait()
+            except queue.Empty:
+                return
+            yield 'parsial', i, file_name, data
+
+    try:
+        isi_antrian()
+        while pending:
+            done, _ = wait(
+                pending,
+                timeout=INTERVAL_PARSIAL if antrian_parsial is not None else None,
+                return_when=FIRST_COMPLETED
+            )
+            # Hasil sementara dikirim sebelum hasil akhir file yang sama
+            yield from kuras_parsial()
+            for future in done:
+                kelompok = pending.pop(future)
+                try:
+                    hasil_kelompok, info_batch = future.result()
+                except groq.AuthenticationError:
+                    # Sama seperti mode sekuensial: API key salah menghentikan seluruh run
+                    raise
+                except Exception as e:
+                    print(f"Gagal menilai {', '.join(nama for _, nama, _ in kelompok)}: {e}")
+                    hasil_kelompok, info_batch = [
+                        (i, file_name, {
+                            "nama_file": file_name,
+                            "nilai": 0,
+                            "kesalahan": "GAGAL proses",
+                            "feedback": f"ERROR: {e}"
+                        })
+                        for i, file_name, _ in kelompok
+                    ], None
+                if info_batch:
+                    yield 'batch', None, None, info_batch
+                for i, file_name, hasil in hasil_kelompok:
+                    yield 'hasil', i, file_name, hasil
+            isi_antrian()
+    finally:
+        # Jika generator dihentikan lebih awal, batalkan kelompok yang belum mulai dinilai
+        for future in pending:
+            future.cancel()
+        if milik_sendiri:
+            executor.shutdown(wait=True)
+
 
 # Fungsi lama untuk backward compatibility (opsional, bisa dihapus jika tidak diperlukan)
 def proses_file_zip(
@@ -0,0 +1,309 @@
+# penjadwal_api.py
+# File ini berisi penjadwal panggilan API yang sadar rate limit.
+
+import email.utils
+import random
+import re
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+
+import groq
+
+
+# Batas default (requests per menit, tokens per menit) per model.
+# Nilai ini sengaja konservatif (mengikuti free tier Groq) dan akan dikoreksi
+# otomatis dari header x-ratelimit-* yang dikirim server.
+BATAS_MODEL: Dict[str, Tuple[int, int]] = {
+    "openai/gpt-oss-120b": (30, 8000),
+    "llama-3.3-70b-versatile": (30, 12000),
+    "llama-3.2-90b-text-preview": (30, 7000),
+    "llama-3.1-70b-versatile": (30, 6000),
+    "mixtral-8x7b-32768": (30, 5000),
+    "gemma2-9b-it": (30, 15000),
+    "gemma-7b-it": (30, 15000),
+}
+BATAS_DEFAULT: Tuple[int, int] = (30, 6000)
+
+
+class ErrorAPISementara(Exception):
+    """Error API yang tetap gagal setelah semua percobaan ulang habis."""
+
+
+def hitung_backoff(percobaan: int, dasar: float = 1.0, maksimum: float = 60.0) -> float:
+    """Backoff eksponensial dengan full jitter: acak di antara 0 dan dasar * 2^percobaan."""
+    return random.uniform(0, min(maksimum, dasar * (2 ** percobaan)))
+
+def parse_durasi(nilai: Optional[str]) -> Optional[float]:
+    """
+    Mengubah durasi gaya Groq (mis. "7.66s", "2m59.56s", "1h2m", "150ms") menjadi detik.
+    Mengembalikan None jika format tidak dikenali.
+    """
+    if not nilai:
+        return None
+    nilai = nilai.strip()
+    try:
+        return float(nilai)
+    except ValueError:
+        pass
+    bagian = re.findall(r'(\d+(?:\.\d+)?)(ms|h|m|s)', nilai)
+    if not bagian:
+        return None
+    faktor = {'h': 3600.0, 'm': 60.0, 's': 1.0, 'ms': 0.001}
+    return sum(float(angka) * faktor[satuan] for angka, satuan in bagian)
+
+def parse_retry_after(headers: Any) -> Optional[float]:
+    """Membaca header retry-after-ms / retry-after (detik atau tanggal HTTP)."""
+    if headers is None:
+        return None
+    try:
+        return float(headers.get("retry-after-ms")) / 1000
+    except (TypeError, ValueError):
+        pass
+    retry_after = headers.get("retry-after")
+    if retry_after is None:
+        return None
+    try:
+        return float(retry_after)
+    except ValueError:
+        pass
+    tanggal = email.utils.parsedate_tz(retry_after)
+    if tanggal is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(tanggal) - time.time())
+
+
+class EmberToken:
+    """Token bucket thread-safe: kapasitas `kapasitas`, terisi ulang penuh dalam 60 detik."""
+
+    def __init__(self, kapasitas: float):
+        self.kapasitas = float(kapasitas)
+        self._isi = float(kapasitas)
+        self._terakhir = time.monotonic()
+        self._tahan_sampai = 0.0
+        self._lock = threading.Lock()
+
+    def _isi_ulang(self, sekarang: float) -> None:
+        laju = self.kapasitas / 60.0
+        self._isi = min(self.kapasitas, self._isi + (sekarang - self._terakhir) * laju)
+        self._terakhir = sekarang
+
+    def ambil(self, jumlah: float = 1.0) -> None:
+        """Memblokir sampai `jumlah` token tersedia, lalu mengambilnya."""
+        # Permintaan yang lebih besar dari kapasitas tetap dilayani ketika ember penuh
+        jumlah = min(float(jumlah), self.kapasitas)
+        while True:
+            with self._lock:
+                sekarang = time.monotonic()
+                self._isi_ulang(sekarang)
+                if sekarang >= self._tahan_sampai and self._isi >= jumlah:
+                    self._isi -= jumlah
+                    return
+                tunggu = max(
+                    self._tahan_sampai - sekarang,
+                    (jumlah - self._isi) / (self.kapasitas / 60.0)
+                )
+            time.sleep(min(max(tunggu, 0.01), 5.0))
+
+    def sinkronkan(self, sisa: Optional[float] = None, kapasitas: Optional[float] = None) -> None:
+        """Menyelaraskan isi ember dengan sisa kuota yang dilaporkan server."""
+        with self._lock:
+            self._isi_ulang(time.monotonic())
+            if kapasitas:
+                self.kapasitas = float(kapasitas)
+            if sisa is not None:
+                self._isi = min(self._isi, float(sisa))
+
+    def tahan(self, detik: float) -> None:
+        """Menahan semua pengambilan token selama `detik` (mis. setelah menerima 429)."""
+        with self._lock:
+            self._tahan_sampai = max(self._tahan_sampai, time.monotonic() + detik)
+            self._isi = 0.0
+
+
+class BatasKonkurensiAIMD:
+    """
+    Semaphore dengan batas yang berubah secara AIMD (additive increase, multiplicative decrease):
+    setiap panggilan sukses menaikkan batas sebesar 1/batas, setiap throttling membaginya dua.
+    """
+
+    def __init__(self, maksimum: int, minimum: int = 1):
+        self.maksimum = max(1, maksimum)
+        self.minimum = max(1, min(minimum, self.maksimum))
+        self.batas = float(self.maksimum)
+        self.aktif = 0
+        self._terakhir_turun = 0.0
+        self._cond = threading.Condition()
+
+    def masuk(self) -> None:
+        with self._cond:
+            while self.aktif >= int(self.batas):
+                self._cond.wait()
+            self.aktif += 1
+
+    def keluar(self) -> None:
+        with self._cond:
+            self.aktif -= 1
+            self._cond.notify_all()
+
+    def sukses(self) -> None:
+        with self._cond:
+            self.batas = min(float(self.maksimum), self.batas + 1.0 / self.batas)
+            self._cond.notify_all()
+
+    def throttled(self) -> None:
+        with self._cond:
+            # Satu gelombang 429 dari request yang berjalan bersamaan cukup menurunkan batas sekali
+            sekarang = time.monotonic()
+            if sekarang - self._terakhir_turun < 1.0:
+                return
+            self._terakhir_turun = sekarang
+            self.batas = max(float(self.minimum), self.batas / 2)
+
+
+class PenjadwalAPI:
+    """
+    Menjalankan panggilan `chat.completions.create` dengan memperhatikan rate limit.
+
+    - Token bucket RPM dan TPM per model, disinkronkan dari header x-ratelimit-*.
+    - Retry dengan backoff eksponensial + jitter untuk 429, timeout, error koneksi, dan 5xx;
+      header retry-after selalu dihormati.
+    - Konkurensi diatur otomatis dengan AIMD agar berjalan dekat batas kuota tanpa throttling.
+
+    Satu instance bisa dipakai bersama oleh banyak thread (dan banyak batch).
+    Untuk client berisi beberapa API key (klien_groq.KumpulanKlien), berikan `jumlah_akun` agar
+    batas RPM/TPM awal dikalikan jumlah key; header rate limit dari kumpulan sudah berupa jumlahnya.
+    """
+
+    def __init__(
+        self,
+        max_konkurensi: int = 4,
+        max_percobaan: int = 6,
+        batas_model: Optional[Dict[str, Tuple[int, int]]] = None,
+        jumlah_akun: int = 1
+    ):
+        self.max_percobaan = max_percobaan
+        self.batas_model = dict(BATAS_MODEL)
+        if batas_model:
+            self.batas_model.update(batas_model)
+        self.jumlah_akun = max(1, jumlah_akun)
+        self.konkurensi = BatasKonkurensiAIMD(max_konkurensi)
+        self._ember: Dict[str, Tuple[EmberToken, EmberToken]] = {}
+        self._lock = threading.Lock()
+        self.jumlah_panggilan = 0
+        self.jumlah_retry = 0
+        self.jumlah_throttled = 0
+
+    def _ember_model(self, model: str) -> Tuple[EmberToken, EmberToken]:
+        with self._lock:
+            if model not in self._ember:
+                rpm, tpm = self.batas_model.get(model, BATAS_DEFAULT)
+                self._ember[model] = (EmberToken(rpm * self.jumlah_akun), EmberToken(tpm * self.jumlah_akun))
+            return self._ember[model]
+
+    def _sinkronkan_header(self, model: str, headers: Any) -> None:
+        if headers is None:
+            return
+        _, ember_tpm = self._ember_model(model)
+        try:
+            sisa_token = headers.get("x-ratelimit-remaining-tokens")
+            limit_token = headers.get("x-ratelimit-limit-tokens")
+            ember_tpm.sinkronkan(
+                sisa=float(sisa_token) if sisa_token is not None else None,
+                kapasitas=float(limit_token) if limit_token is not None else None
+            )
+            # Pada Groq, kuota request di header adalah kuota harian; hanya dipakai saat habis
+            sisa_request = headers.get("x-ratelimit-remaining-requests")
+            if sisa_request is not None and float(sisa_request) <= 0:
+                reset = parse_durasi(headers.get("x-ratelimit-reset-requests"))
+                if reset:
+                    self._ember_model(model)[0].tahan(reset)
+        except (TypeError, ValueError):
+            pass
+
+    @staticmethod
+    def _jenis_error(e: Exception) -> Optional[str]:
+        """Mengelompokkan error: 'rate_limit', 'sementara', atau None (tidak perlu diulang)."""
+        if isinstance(e, groq.APIConnectionError):  # termasuk APITimeoutError
+            return 'sementara'
+        status = getattr(e, 'status_code', None)
+        if status == 429:
+            return 'rate_limit'
+        if status is not None and (status >= 500 or status in (408, 409)):
+            return 'sementara'
+        return None
+
+    def jalankan(
+        self,
+        client: Any,
+        model: str,
+        estimasi_token: int = 0,
+        info: Optional[Dict[str, int]] = None,
+        **kwargs: Any
+    ) -> Any:
+        """
+        Memanggil `client.chat.completions.create(model=model, **kwargs)` dengan rate limiting.
+        Melempar ErrorAPISementara jika semua percobaan gagal; error lain (mis. 400/401) langsung diteruskan.
+        Jika `info` diberikan, info['retry'] ditambah sejumlah retry untuk panggilan ini.
+        """
+        ember_rpm, ember_tpm = self._ember_model(model)
+        completions = client.chat.completions
+        # with_raw_response memberi akses ke header rate limit pada respons yang sukses
+        raw = getattr(completions, 'with_raw_response', None)
+
+        for percobaan in range(self.max_percobaan):
+            ember_rpm.ambil(1)
+            ember_tpm.ambil(estimasi_token)
+            self.konkurensi.masuk()
+            try:
+                with self._lock:
+                    self.jumlah_panggilan += 1
+                if raw is not None:
+                    respons = raw.create(model=model, **kwargs)
+                    self._sinkronkan_header(model, respons.headers)
+                    hasil = respons.parse()
+                else:
+                    hasil = completions.create(model=model, **kwargs)
+                self.konkurensi.sukses()
+                return hasil
+            except Exception as e:
+                jenis = self._jenis_error(e)
+                if jenis is None:
+                    raise
+                error_terakhir = e
+            finally:
+                self.konkurensi.keluar()
+
+            # Menunggu di luar slot konkurensi supaya thread lain tetap bisa jalan
+            respons_error = getattr(error_terakhir, 'response', None)
+            headers = getattr(respons_error, 'headers', None)
+            tunggu = hitung_backoff(percobaan)
+            if jenis == 'rate_limit':
+                with self._lock:
+                    self.jumlah_throttled += 1
+                self.konkurensi.throttled()
+                self._sinkronkan_header(model, headers)
+                retry_after = parse_retry_after(headers)
+                if retry_after is not None:
+                    tunggu = retry_after + random.uniform(0, 0.5)
+                    ember_rpm.tahan(tunggu)
+            if percobaan + 1 >= self.max_percobaan:
+                raise ErrorAPISementara(
+                    f"API gagal setelah {self.max_percobaan} percobaan: {error_terakhir}"
+                ) from error_terakhir
+            with self._lock:
+                self.jumlah_retry += 1
+            if info is not None:
+                info['retry'] = info.get('retry', 0) + 1
+            print(f"Percobaan {percobaan + 1}/{self.max_percobaan} ({model}) gagal: {error_terakhir}. Menunggu {tunggu:.1f} detik...")
+            time.sleep(tunggu)
+        raise ErrorAPISementara(f"API gagal setelah {self.max_percobaan} percobaan.")
+
+    def statistik(self) -> Dict[str, Any]:
+        """Ringkasan aktivitas penjadwal untuk ditampilkan di UI."""
+        return {
+            'panggilan': self.jumlah_panggilan,
+            'retry': self.jumlah_retry,
+            'throttled': self.jumlah_throttled,
+            'konkurensi': int(self.konkurensi.batas),
+        }
@@ -0,0 +1,342 @@
+# riwayat_penilaian.py
+# File ini berisi riwayat semua hasil penilaian yang disimpan di disk (SQLite).
+
+import hashlib
+import json
+import math
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+# Kolom pengelompokan yang boleh dipakai agregat(): nama -> ekspresi SQL
+KELOMPOK = {
+    "tugas": "tugas",
+    "mahasiswa": "mahasiswa",
+    "model": "model",
+    "prompt": "hash_prompt",
+    "hari": "date(waktu, 'unixepoch', 'localtime')",
+}
+# Lebar kelas default untuk distribusi nilai (0-9, 10-19, ..., 90-100)
+LEBAR_KELAS_NILAI = 10
+
+
+def buat_hash_prompt(system_prompt: str) -> str:
+    """Hash pendek system prompt; run dengan soal, kriteria, dan mode yang sama punya hash yang sama."""
+    return hashlib.sha256(system_prompt.encode('utf-8')).hexdigest()[:16]
+
+def mahasiswa_dari_nama(nama: str) -> str:
+    """
+    Identitas mahasiswa dari nama file/submission relatif terhadap folder bersama arsip:
+    folder teratas ("nim1/main.py" -> "nim1"), atau nama file tanpa ekstensi ("nim2.py" -> "nim2").
+    """
+    if '/' in nama:
+        return nama.split('/', 1)[0]
+    return os.path.splitext(nama)[0] or nama
+
+def peta_mahasiswa(nama_nama: List[str]) -> Dict[str, str]:
+    """
+    Nama file di arsip -> identitas mahasiswa (mode satu file per hasil). Folder yang menaungi semua
+    file (mis. "Tugas1/") dibuang lebih dulu. Nama file tanpa ekstensi dipakai sebagai identitas
+    ("Tugas1/sub/nim2.py" -> "nim2"), kecuali nama yang sama muncul di beberapa folder
+    ("nim1/main.py", "nim3/main.py"): folder teratas seperti itu dianggap folder mahasiswa dan
+    dipakai untuk semua file di dalamnya.
+    """
+    folder = [nama.split('/')[:-1] for nama in nama_nama]
+    bersama = 0
+    if folder:
+        while all(len(f) > bersama and f[bersama] == folder[0][bersama] for f in folder):
+            bersama += 1
+    relatif = {nama: '/'.join(nama.split('/')[bersama:]) for nama in nama_nama}
+    jumlah_dasar: Dict[str, int] = {}
+    for r in relatif.values():
+        dasar = mahasiswa_dari_nama(r.rsplit('/', 1)[-1])
+        jumlah_dasar[dasar] = jumlah_dasar.get(dasar, 0) + 1
+    folder_mahasiswa = {
+        r.split('/', 1)[0] for r in relatif.values()
+        if '/' in r and jumlah_dasar[mahasiswa_dari_nama(r.rsplit('/', 1)[-1])] > 1
+    }
+    return {
+        nama: r.split('/', 1)[0] if r.split('/', 1)[0] in folder_mahasiswa and '/' in r
+        else mahasiswa_dari_nama(r.rsplit('/', 1)[-1])
+        for nama, r in relatif.items()
+    }
+
+
+class RiwayatPenilaian:
+    """
+    Riwayat hasil penilaian berbasis SQLite yang aman dipakai dari banyak thread.
+
+    Berbeda dengan CachePenilaian, entri tidak pernah dihapus otomatis: setiap hasil dari setiap run
+    disimpan (satu baris per hasil) sehingga nilai mahasiswa bisa dibandingkan antar tugas, model,
+    dan versi prompt. Agregat dihitung oleh SQLite, bukan dengan memuat semua baris ke memori.
+    """
+
+    def __init__(self, path: str = ".riwayat_penilaian/riwayat.sqlite3"):
+        self.path = path
+        self._lock = threading.Lock()
+
+        folder = os.path.dirname(path)
+        if folder:
+            os.makedirs(folder, exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS hasil (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                waktu REAL NOT NULL,
+                id_run TEXT NOT NULL,
+                tugas TEXT NOT NULL,
+                mahasiswa TEXT NOT NULL,
+                nama_file TEXT NOT NULL,
+                model TEXT NOT NULL,
+                model_run TEXT,
+                hash_prompt TEXT NOT NULL,
+                nilai REAL,
+                gagal INTEGER NOT NULL DEFAULT 0,
+                token_prompt INTEGER NOT NULL DEFAULT 0,
+                token_completion INTEGER NOT NULL DEFAULT 0,
+                latensi_api REAL NOT NULL DEFAULT 0,
+                jumlah_retry INTEGER NOT NULL DEFAULT 0,
+                hasil TEXT NOT NULL
+            )
+            """
+        )
+        # Riwayat lama belum punya model_run: anggap model penilainya adalah model run
+        if "model_run" not in {row["name"] for row in self._conn.execute("PRAGMA table_info(hasil)")}:
+            self._conn.execute("ALTER TABLE hasil ADD COLUMN model_run TEXT")
+            self._conn.execute("UPDATE hasil SET model_run = model")
+        for nama, kolom in (
+            ("idx_hasil_tugas", "tugas, mahasiswa, model"),
+            ("idx_hasil_terakhir", "tugas, mahasiswa, nama_file, model_run"),
+            ("idx_hasil_mahasiswa", "mahasiswa, waktu"),
+            ("idx_hasil_model", "model, waktu"),
+            ("idx_hasil_waktu", "waktu"),
+            ("idx_hasil_prompt", "hash_prompt"),
+            ("idx_hasil_run", "id_run"),
+        ):
+            self._conn.execute(f"CREATE INDEX IF NOT EXISTS {nama} ON hasil ({kolom})")
+        self._conn.commit()
+
+    def catat(
+        self,
+        id_run: str,
+        tugas: str,
+        mahasiswa: str,
+        model: str,
+        hash_prompt: str,
+        hasil: Dict[str, Any],
+        waktu: Optional[float] = None,
+        model_run: Optional[str] = None
+    ) -> None:
+        """
+        Menyimpan satu hasil penilaian (langsung di-commit agar aman jika proses crash). `model` adalah
+        model yang menghasilkan nilai ini; `model_run` model yang dipilih untuk run (default `model`),
+        mis. "kecil>besar" pada mode kaskade, yang hasilnya bisa berasal dari salah satu model.
+        """
+        nilai = hasil.get("nilai")
+        try:
+            nilai = float(nilai) if nilai is not None else None
+        except (TypeError, ValueError):
+            nilai = None
+        baris = (
+            time.time() if waktu is None else waktu,
+            id_run,
+            tugas,
+            mahasiswa,
+            str(hasil.get("nama_file", "")),
+            model,
+            model_run or model,
+            hash_prompt,
+            nilai,
+            int(hasil.get("kesalahan") == "GAGAL proses"),
+            int(hasil.get("token_prompt") or 0),
+            int(hasil.get("token_completion") or 0),
+            float(hasil.get("latensi_api") or 0),
+            int(hasil.get("jumlah_retry") or 0),
+            json.dumps(hasil, ensure_ascii=False, default=str),
+        )
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO hasil (
+                    waktu, id_run, tugas, mahasiswa, nama_file, model, model_run, hash_prompt, nilai,
+                    gagal, token_prompt, token_completion, latensi_api, jumlah_retry, hasil
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                baris
+            )
+            self._conn.commit()
+
+    @staticmethod
+    def _filter(
+        tugas: Optional[str] = None,
+        mahasiswa: Optional[str] = None,
+        model: Optional[str] = None,
+        hash_prompt: Optional[str] = None,
+        sejak: Optional[float] = None,
+        sampai: Optional[float] = None,
+        hanya_terakhir: bool = False
+    ) -> Tuple[str, List[Any]]:
+        """
+        Klausa WHERE dan parameternya. `hanya_terakhir` menyisakan hasil terbaru per tugas, mahasiswa,
+        file, dan model run: file lain milik mahasiswa yang sama tetap dihitung, sedangkan hasil kaskade
+        dari model kecil dan model eskalasi tidak terhitung dua kali.
+        """
+        syarat, parameter = [], []
+        for kolom, nilai in (
+            ("tugas", tugas), ("mahasiswa", mahasiswa), ("model", model), ("hash_prompt", hash_prompt)
+        ):
+            if nilai is not None:
+                syarat.append(f"{kolom} = ?")
+                parameter.append(nilai)
+        if sejak is not None:
+            syarat.append("waktu >= ?")
+            parameter.append(sejak)
+        if sampai is not None:
+            syarat.append("waktu < ?")
+            parameter.append(sampai)
+        if hanya_terakhir:
+            syarat.append("id IN (SELECT MAX(id) FROM hasil GROUP BY tugas, mahasiswa, nama_file, model_run)")
+        return ("WHERE " + " AND ".join(syarat)) if syarat else "", parameter
+
+    def cari(self, batas: int = 1000, **filter: Any) -> List[Dict[str, Any]]:
+        """
+        Hasil penilaian terbaru lebih dulu (maksimal `batas` baris). Filter: tugas, mahasiswa, model,
+        hash_prompt, sejak/sampai (epoch detik), hanya_terakhir.
+        """
+        where, parameter = self._filter(**filter)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT id, waktu, id_run, tugas, mahasiswa, model, model_run, hash_prompt, hasil
+                FROM hasil {where} ORDER BY waktu DESC, id DESC LIMIT ?
+                """,
+                parameter + [batas]
+            ).fetchall()
+        daftar = []
+        for row in rows:
+            data = {k: row[k] for k in row.keys() if k != "hasil"}
+            data.update(json.loads(row["hasil"]))
+            daftar.append(data)
+        return daftar
+
+    def agregat(self, kelompok: Optional[str] = "model", **filter: Any) -> List[Dict[str, Any]]:
+        """
+        Ringkasan per `kelompok` (lihat KELOMPOK; None berarti satu baris untuk semua hasil yang cocok):
+        jumlah hasil, jumlah mahasiswa, rata-rata, simpangan baku, min/maks nilai, jumlah gagal,
+        total token, dan rata-rata latensi API. Hasil gagal tidak ikut dihitung dalam statistik nilai.
+        """
+        if kelompok is not None and kelompok not in KELOMPOK:
+            raise ValueError(f"Kelompok tidak dikenal: {kelompok} (pilih {', '.join(KELOMPOK)})")
+        ekspresi = KELOMPOK[kelompok] if kelompok else "NULL"
+        where, parameter = self._filter(**filter)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT
+                    {ekspresi} AS kunci,
+                    COUNT(*) AS jumlah,
+                    COUNT(DISTINCT mahasiswa) AS jumlah_mahasiswa,
+                    AVG(CASE WHEN gagal = 0 THEN nilai END) AS rata_rata,
+                    AVG(CASE WHEN gagal = 0 THEN nilai * nilai END) AS rata_kuadrat,
+                    MIN(CASE WHEN gagal = 0 THEN nilai END) AS min,
+                    MAX(CASE WHEN gagal = 0 THEN nilai END) AS maks,
+                    SUM(gagal) AS gagal,
+                    SUM(token_prompt) AS token_prompt,
+                    SUM(token_completion) AS token_completion,
+                    AVG(latensi_api) AS rata_latensi_api,
+                    MIN(waktu) AS pertama,
+                    MAX(waktu) AS terakhir
+                FROM hasil {where}
+                GROUP BY kunci ORDER BY kunci
+                """,
+                parameter
+            ).fetchall()
+        daftar = []
+        for row in rows:
+            data = dict(row)
+            rata_kuadrat = data.pop("rata_kuadrat")
+            kunci = data.pop("kunci")
+            if kelompok:
+                data[kelompok] = kunci
+            data["simpangan_baku"] = (
+                math.sqrt(max(rata_kuadrat - data["rata_rata"] ** 2, 0.0))
+                if data["rata_rata"] is not None else None
+            )
+            daftar.append(data)
+        return daftar
+
+    def distribusi_nilai(
+        self, kelompok: str = "model", lebar: int = LEBAR_KELAS_NILAI, **filter: Any
+    ) -> List[Dict[str, Any]]:
+        """
+        Jumlah hasil per kelas nilai (0-9, 10-19, ...; nilai 100 masuk kelas teratas) untuk setiap
+        `kelompok`. Mengembalikan list of {kelompok, 'kelas', 'jumlah'} urut per kelompok lalu kelas.
+        """
+        if kelompok not in KELOMPOK:
+            raise ValueError(f"Kelompok tidak dikenal: {kelompok} (pilih {', '.join(KELOMPOK)})")
+        lebar = max(1, int(lebar))
+        where, parameter = self._filter(**filter)
+        where = (where + " AND" if where else "WHERE") + " gagal = 0 AND nilai IS NOT NULL"
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT {KELOMPOK[kelompok]} AS kunci,
+                       MIN(CAST(nilai / ? AS INTEGER) * ?, ?) AS kelas,
+                       COUNT(*) AS jumlah
+                FROM hasil {where}
+                GROUP BY kunci, kelas ORDER BY kunci, kelas
+                """,
+                [lebar, lebar, (100 - 1) // lebar * lebar] + parameter
+            ).fetchall()
+        return [{kelompok: row["kunci"], "kelas": row["kelas"], "jumlah": row["jumlah"]} for row in rows]
+
+    def nilai_mahasiswa(self, mahasiswa: Optional[str] = None, **filter: Any) -> List[Dict[str, Any]]:
+        """
+        Nilai terbaru setiap file mahasiswa per tugas (dan model run), tanpa feedback lengkap: cocok untuk
+        rekap "bagaimana nilai mahasiswa ini di semua tugas".
+        """
+        where, parameter = self._filter(mahasiswa=mahasiswa, hanya_terakhir=True, **filter)
+        with self._lock:
+            rows = self._conn.execute(
+                f"""
+                SELECT mahasiswa, tugas, model, model_run, nilai, gagal, waktu, nama_file
+                FROM hasil {where} ORDER BY mahasiswa, waktu
+                """,
+                parameter
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def daftar_nilai(self, kolom: str, **filter: Any) -> List[str]:
+        """Nilai unik kolom `kolom` ('tugas', 'mahasiswa', 'model', atau 'prompt'), untuk pilihan filter."""
+        if kolom not in KELOMPOK or kolom == "hari":
+            raise ValueError(f"Kolom tidak dikenal: {kolom}")
+        where, parameter = self._filter(**filter)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT DISTINCT {KELOMPOK[kolom]} FROM hasil {where} ORDER BY 1", parameter
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def hapus(self, **filter: Any) -> int:
+        """Menghapus hasil yang cocok dengan filter (tanpa filter: semua). Mengembalikan jumlah baris."""
+        where, parameter = self._filter(**filter)
+        with self._lock:
+            dihapus = self._conn.execute(f"DELETE FROM hasil {where}", parameter).rowcount
+            self._conn.commit()
+        return dihapus
+
+    def statistik(self) -> Dict[str, int]:
+        """Jumlah hasil, run, tugas, dan mahasiswa yang tersimpan."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT COUNT(*), COUNT(DISTINCT id_run), COUNT(DISTINCT tugas), COUNT(DISTINCT mahasiswa)
+                FROM hasil
+                """
+            ).fetchone()
+        return {'hasil': row[0], 'run': row[1], 'tugas': row[2], 'mahasiswa': row[3]}
@@ -0,0 +1,251 @@
+# saringan_awal.py
+# File ini berisi penyaringan awal lokal (tanpa API) sebelum file dinilai AI.
+
+import ast
+import atexit
+import os
+import re
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from typing import Callable, Dict, List, Optional, Tuple
+
+from anggaran_token import kode_dari_notebook
+
+# "nonaktif": tidak ada penyaringan; "diagnostik": hasil pemeriksaan hanya ditambahkan ke prompt;
+# "otomatis": file yang gagal langsung diberi hasil deterministik tanpa memanggil API
+MODE_SARINGAN = ("nonaktif", "diagnostik", "otomatis")
+
+KETERANGAN_KATEGORI = {
+    "kosong": "File kosong",
+    "trivial": "Tidak ada kode yang berarti (hanya komentar/pass/template)",
+    "sintaks": "Kode tidak bisa dikompilasi",
+    "bahasa": "Isi file tidak sesuai dengan ekstensi/bahasanya",
+}
+# Nilai untuk hasil deterministik mode "otomatis"
+NILAI_GAGAL_SARINGAN = 0
+# Kode non-Python dengan karakter (di luar spasi dan komentar) lebih sedikit dari ini dianggap trivial
+MIN_KARAKTER_BERARTI = 20
+MAX_PROSES_SARINGAN = min(4, os.cpu_count() or 1)
+
+# Header pemisah file pada submission gabungan mode per mahasiswa
+_POLA_HEADER_FILE = re.compile(r'^### File: (.+)$', re.MULTILINE)
+_POLA_KOMENTAR = re.compile(r'//[^\n]*|/\*.*?\*/|#[^\n]*|<!--.*?-->', re.DOTALL)
+
+BAHASA_EKSTENSI = {
+    '.py': 'Python', '.ipynb': 'Python', '.java': 'Java', '.c': 'C/C++', '.h': 'C/C++',
+    '.cpp': 'C/C++', '.cc': 'C/C++', '.hpp': 'C/C++', '.js': 'JavaScript', '.ts': 'JavaScript',
+    '.php': 'PHP', '.html': 'HTML', '.htm': 'HTML', '.go': 'Go',
+}
+# Ciri khas tiap bahasa; bahasa dianggap terdeteksi jika minimal dua ciri ditemukan
+CIRI_BAHASA = {
+    'Python': [r'^\s*def \w+\(.*\)\s*(->.*)?:\s*$', r'^\s*(from \w[\w.]* )?import \w', r'\bprint\(',
+               r'^\s*if __name__ == ', r'\belif\b', r'\binput\('],
+    'Java': [r'\bpublic\s+(static\s+)?class\s+\w+', r'public\s+static\s+void\s+main', r'System\.out\.print',
+             r'^\s*import java\.', r'new Scanner\('],
+    'C/C++': [r'^\s*#include\s*[<"]', r'\bint\s+main\s*\(', r'\bprintf\s*\(', r'\bstd::', r'\bcout\s*<<',
+              r'\bscanf\s*\('],
+    'JavaScript': [r'\bconsole\.log\(', r'\bfunction\s+\w+\s*\(', r'\b(const|let)\s+\w+\s*=', r'=>',
+                   r'\brequire\('],
+    'PHP': [r'<\?php', r'\$\w+\s*=', r'\becho\b'],
+    'HTML': [r'<!DOCTYPE html', r'<html\b', r'<body\b', r'<div\b'],
+    'Go': [r'^package \w+', r'\bfunc\s+\w+\(', r'\bfmt\.Print'],
+}
+# Bahasa yang wajar bercampur dalam satu file (PHP berisi HTML, HTML berisi <script>, ...)
+BAHASA_SERUMPUN = {
+    'PHP': {'PHP', 'HTML', 'JavaScript'},
+    'HTML': {'HTML', 'JavaScript', 'PHP'},
+    'JavaScript': {'JavaScript', 'HTML'},
+}
+_CIRI_TERKOMPILASI = {
+    bahasa: [re.compile(p, re.MULTILINE | re.IGNORECASE if bahasa == 'HTML' else re.MULTILINE) for p in pola]
+    for bahasa, pola in CIRI_BAHASA.items()
+}
+
+# Pemeriksa per ekstensi: fungsi(kode) -> (kategori gagal atau None, catatan diagnostik)
+Pemeriksa = Callable[[str], Tuple[Optional[str], List[str]]]
+PEMERIKSA: Dict[str, Pemeriksa] = {}
+
+_pool: Optional[ProcessPoolExecutor] = None
+_lock_pool = threading.Lock()
+
+
+def daftarkan_pemeriksa(*ekstensi: str) -> Callable[[Pemeriksa], Pemeriksa]:
+    """
+    Decorator untuk mendaftarkan pemeriksa bahasa lain, mis. @daftarkan_pemeriksa(".java").
+    Penyaringan berjalan di proses terpisah, jadi daftarkan di level modul (saat import),
+    bukan di dalam fungsi yang hanya dijalankan proses utama.
+    """
+    def daftar(fungsi: Pemeriksa) -> Pemeriksa:
+        for e in ekstensi:
+            PEMERIKSA[e.lower()] = fungsi
+        return fungsi
+    return daftar
+
+def _periksa_ast_python(kode: str) -> Tuple[Optional[str], List[str]]:
+    try:
+        pohon = ast.parse(kode)
+    except SyntaxError as e:
+        return "sintaks", [f"SyntaxError baris {e.lineno}: {e.msg}"]
+    except ValueError as e:
+        return "sintaks", [f"Kode tidak valid: {e}"]
+
+    pernyataan = [
+        node for node in pohon.body
+        if not isinstance(node, ast.Pass)
+        and not (isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant))
+    ]
+    if not pernyataan:
+        return "trivial", ["Tidak ada pernyataan selain komentar, docstring, atau pass."]
+
+    fungsi = [n for n in ast.walk(pohon) if isinstance(n, (ast.FunctionDef, ast.AsyncFunctionDef))]
+    kelas = [n.name for n in ast.walk(pohon) if isinstance(n, ast.ClassDef)]
+    modul = sorted({
+        (alias.name if isinstance(n, ast.Import) else n.module or "").split(".")[0]
+        for n in ast.walk(pohon) if isinstance(n, (ast.Import, ast.ImportFrom))
+        for alias in (n.names if isinstance(n, ast.Import) else [None])
+    } - {""})
+    panggilan = {
+        n.func.id for n in ast.walk(pohon) if isinstance(n, ast.Call) and isinstance(n.func, ast.Name)
+    }
+    rekursif = [
+        f.name for f in fungsi
+        if any(isinstance(n, ast.Call) and isinstance(n.func, ast.Name) and n.func.id == f.name
+               for n in ast.walk(f))
+    ]
+    ada_try = any(isinstance(n, ast.Try) for n in ast.walk(pohon))
+    baris_kode = sum(1 for b in kode.splitlines() if b.strip() and not b.strip().startswith("#"))
+
+    catatan = [f"Sintaks Python valid, {baris_kode} baris kode."]
+    catatan.append("Fungsi: " + (", ".join(f.name for f in fungsi) if fungsi else "tidak ada"))
+    if kelas:
+        catatan.append("Kelas: " + ", ".join(kelas))
+    if modul:
+        catatan.append("Import: " + ", ".join(modul))
+    catatan.append("Fungsi rekursif: " + (", ".join(rekursif) if rekursif else "tidak ada"))
+    catatan.append("Membaca input (input()): " + ("ya" if "input" in panggilan else "tidak"))
+    catatan.append("Penanganan error (try/except): " + ("ada" if ada_try else "tidak ada"))
+    return None, catatan
+
+@daftarkan_pemeriksa(".py")
+def periksa_python(kode: str) -> Tuple[Optional[str], List[str]]:
+    """Cek sintaks Python dengan ast, ditambah ringkasan struktur (fungsi, rekursi, input, try)."""
+    return _periksa_ast_python(kode)
+
+@daftarkan_pemeriksa(".ipynb")
+def periksa_notebook(kode: str) -> Tuple[Optional[str], List[str]]:
+    """Notebook diperiksa dari gabungan cell kodenya; magic IPython (%, !) diabaikan."""
+    sumber = kode_dari_notebook(kode)
+    if sumber is None:
+        return "sintaks", ["File .ipynb bukan notebook JSON yang valid."]
+    baris = [b for b in sumber.split("\n") if not b.lstrip().startswith(("%", "!"))]
+    return _periksa_ast_python("\n".join(baris))
+
+def skor_bahasa(kode: str) -> Dict[str, int]:
+    """Jumlah ciri (CIRI_BAHASA) tiap bahasa yang ditemukan di kode."""
+    return {
+        bahasa: sum(1 for pola in daftar_pola if pola.search(kode))
+        for bahasa, daftar_pola in _CIRI_TERKOMPILASI.items()
+    }
+
+def bahasa_asing(kode: str, bahasa_ekstensi: str) -> Optional[str]:
+    """
+    Bahasa lain yang jelas terdeteksi di kode padahal tidak ada satu pun ciri `bahasa_ekstensi`,
+    atau None. Bahasa serumpun (BAHASA_SERUMPUN) tidak dianggap asing karena wajar bercampur.
+    """
+    skor = skor_bahasa(kode)
+    if skor.get(bahasa_ekstensi, 0) > 0:
+        return None
+    serumpun = BAHASA_SERUMPUN.get(bahasa_ekstensi, {bahasa_ekstensi})
+    calon = [(n, b) for b, n in skor.items() if n >= 2 and b not in serumpun]
+    return max(calon)[1] if calon else None
+
+def periksa_file(nama_file: str, kode: str) -> Tuple[Optional[str], List[str]]:
+    """
+    Menyaring satu file. Mengembalikan (kategori gagal atau None, catatan diagnostik).
+    Kategori: "kosong", "trivial", "sintaks", atau "bahasa" (lihat KETERANGAN_KATEGORI).
+    """
+    if not kode.strip():
+        return "kosong", ["File tidak berisi apa pun."]
+    ekstensi = os.path.splitext(nama_file)[1].lower()
+    bahasa_ekstensi = BAHASA_EKSTENSI.get(ekstensi)
+
+    kategori, catatan = None, []
+    pemeriksa = PEMERIKSA.get(ekstensi)
+    if pemeriksa is not None:
+        kategori, catatan = pemeriksa(kode)
+        if kategori is None:
+            return None, catatan
+    elif len(re.sub(r'\s', '', _POLA_KOMENTAR.sub('', kode))) < MIN_KARAKTER_BERARTI:
+        return "trivial", ["Hampir tidak ada kode selain komentar dan spasi."]
+    else:
+        baris_kode = sum(1 for b in kode.splitlines() if b.strip())
+        catatan = [f"{baris_kode} baris kode; sintaks tidak diperiksa lokal (tidak ada pemeriksa untuk {ekstensi or 'file ini'})."]
+
+    # Kode yang lolos pemeriksa bahasanya pasti bahasa itu; sisanya dicek ciri bahasanya
+    bahasa_isi = bahasa_asing(kode, bahasa_ekstensi) if bahasa_ekstensi else None
+    if bahasa_isi:
+        return "bahasa", [f"Ekstensi {ekstensi} ({bahasa_ekstensi}) tetapi isinya tampak kode {bahasa_isi}."]
+    return kategori, catatan
+
+def _bagian_file(nama_file: str, kode: str) -> List[Tuple[str, str]]:
+    """Memecah submission gabungan ("### File: <path>" per file) menjadi (path, kode) per file."""
+    if not kode.startswith("### File: "):
+        return [(nama_file, kode)]
+    potongan = _POLA_HEADER_FILE.split(kode)
+    # split menghasilkan ["", path1, isi1, path2, isi2, ...]
+    return [(potongan[i].strip(), potongan[i + 1].strip("\n")) for i in range(1, len(potongan) - 1, 2)]
+
+def saring(nama_file: str, kode: str) -> Tuple[Optional[str], str]:
+    """
+    Menyaring satu submission (file tunggal atau gabungan per mahasiswa). Mengembalikan
+    (kategori gagal atau None, teks diagnostik untuk prompt). Submission gabungan dianggap gagal
+    hanya jika semua file di dalamnya gagal.
+    """
+    bagian = _bagian_file(nama_file, kode)
+    hasil = [(path, *periksa_file(path, isi)) for path, isi in bagian]
+    gagal = [kategori for _, kategori, _ in hasil if kategori]
+    kategori = gagal[0] if len(gagal) == len(hasil) else None
+    if len(hasil) == 1:
+        return kategori, "\n".join(f"- {c}" for c in hasil[0][2])
+    baris = []
+    for path, kategori_file, catatan in hasil:
+        status = f" [{KETERANGAN_KATEGORI[kategori_file]}]" if kategori_file else ""
+        baris.append(f"- {path}{status}: " + "; ".join(catatan))
+    return kategori, "\n".join(baris)
+
+def _saring_banyak(daftar: List[Tuple[str, str]]) -> List[Tuple[Optional[str], str]]:
+    return [saring(nama_file, kode) for nama_file, kode in daftar]
+
+def _dapatkan_pool() -> ProcessPoolExecutor:
+    # ast/regex terikat GIL, jadi penyaringan dijalankan di proses terpisah agar tidak
+    # menghambat thread yang sedang menunggu API. Pool dibuat sekali dan dipakai ulang.
+    global _pool
+    with _lock_pool:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=MAX_PROSES_SARINGAN, mp_context=get_context("spawn"))
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+def saring_kelompok(daftar: List[Tuple[str, str]], paralel: bool = True) -> List[Tuple[Optional[str], str]]:
+    """
+    Menyaring beberapa (nama_file, kode) sekaligus di process pool (satu round-trip per kelompok).
+    Jika process pool tidak bisa dipakai, penyaringan dijalankan di proses ini.
+    """
+    if paralel and MAX_PROSES_SARINGAN > 1:
+        try:
+            return _dapatkan_pool().submit(_saring_banyak, daftar).result()
+        except Exception as e:
+            print(f"Penyaringan di process pool gagal, dijalankan langsung: {e}")
+    return _saring_banyak(daftar)
+
+def hasil_saringan(nama_file: str, kategori: str, diagnostik: str) -> Dict[str, object]:
+    """Hasil penilaian deterministik (tanpa API) untuk submission yang gagal penyaringan."""
+    keterangan = KETERANGAN_KATEGORI[kategori]
+    return {
+        "nama_file": nama_file,
+        "nilai": NILAI_GAGAL_SARINGAN,
+        "kesalahan": f"{keterangan}. " + "; ".join(b.lstrip("- ") for b in diagnostik.splitlines()),
+        "feedback": f"Dinilai otomatis tanpa AI: {keterangan.lower()}. Perbaiki lalu kumpulkan ulang.",
+        "saringan": kategori,
+    }
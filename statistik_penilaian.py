@@ -0,0 +1,66 @@
+# statistik_penilaian.py
+# File ini berisi agregat statistik nilai yang diperbarui secara berjalan (O(1) per hasil).
+
+from typing import Any, Dict, Optional
+
+# Rentang grade: (label, batas bawah inklusif). Diurutkan dari nilai tertinggi.
+RENTANG_GRADE = (
+    ("A (85-100)", 85),
+    ("B (70-84)", 70),
+    ("C (50-69)", 50),
+    ("D (< 50)", float("-inf")),
+)
+
+
+def grade_nilai(nilai: float) -> str:
+    """Label grade untuk sebuah nilai sesuai RENTANG_GRADE."""
+    for label, batas_bawah in RENTANG_GRADE:
+        if nilai >= batas_bawah:
+            return label
+    return RENTANG_GRADE[-1][0]
+
+
+class StatistikBerjalan:
+    """Jumlah, rata-rata, nilai tertinggi/terendah, dan distribusi grade tanpa menyimpan semua nilai."""
+
+    def __init__(self):
+        self.jumlah = 0
+        self.total = 0.0
+        self.tertinggi: Optional[float] = None
+        self.terendah: Optional[float] = None
+        self.distribusi: Dict[str, int] = {label: 0 for label, _ in RENTANG_GRADE}
+
+    def tambah(self, nilai: Any) -> None:
+        """Memasukkan satu nilai. Nilai yang bukan angka diabaikan."""
+        if isinstance(nilai, bool) or not isinstance(nilai, (int, float)):
+            return
+        self.jumlah += 1
+        self.total += nilai
+        self.tertinggi = nilai if self.tertinggi is None else max(self.tertinggi, nilai)
+        self.terendah = nilai if self.terendah is None else min(self.terendah, nilai)
+        self.distribusi[grade_nilai(nilai)] += 1
+
+    def gabung(self, lain: "StatistikBerjalan") -> None:
+        """Menggabungkan statistik lain (mis. dari arsip lain) ke statistik ini."""
+        if not lain.jumlah:
+            return
+        self.jumlah += lain.jumlah
+        self.total += lain.total
+        self.tertinggi = lain.tertinggi if self.tertinggi is None else max(self.tertinggi, lain.tertinggi)
+        self.terendah = lain.terendah if self.terendah is None else min(self.terendah, lain.terendah)
+        for label, jumlah in lain.distribusi.items():
+            self.distribusi[label] += jumlah
+
+    @property
+    def rata_rata(self) -> float:
+        return self.total / self.jumlah if self.jumlah else 0.0
+
+    def ringkasan(self) -> Dict[str, Any]:
+        """Ringkasan dalam bentuk dict (untuk laporan/JSON)."""
+        return {
+            'jumlah': self.jumlah,
+            'rata_rata': round(self.rata_rata, 2),
+            'tertinggi': self.tertinggi,
+            'terendah': self.terendah,
+            'distribusi': dict(self.distribusi),
+        }
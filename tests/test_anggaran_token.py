@@ -0,0 +1,28 @@
+from anggaran_token import (KONTEKS_DEFAULT, MARGIN_TOKEN, MAX_TOKENS_OUTPUT, anggaran_kode, estimasi_token,
+                            pecah_kode, potong_kode)
+
+
+def test_anggaran_kode_dikurangi_prompt_dan_output():
+    assert anggaran_kode("model-tidak-dikenal", "") == KONTEKS_DEFAULT - MAX_TOKENS_OUTPUT - MARGIN_TOKEN
+    assert anggaran_kode("model-tidak-dikenal", "x" * 4000) == anggaran_kode("model-tidak-dikenal", "") - estimasi_token("x" * 4000)
+    assert anggaran_kode("llama-3.3-70b-versatile", "") > anggaran_kode("gemma2-9b-it", "")
+    # Prompt yang melebihi konteks tetap menyisakan anggaran minimal
+    assert anggaran_kode("gemma2-9b-it", "x" * 100000) == MARGIN_TOKEN
+
+
+def test_potong_kode_menyisakan_awal_dan_akhir():
+    kode = "\n".join(f"baris_{i} = {i}" for i in range(2000))
+    assert potong_kode(kode, 10 ** 6) == kode
+
+    hasil = potong_kode(kode, 500)
+    assert estimasi_token(hasil) <= 500
+    assert hasil.startswith("baris_0 = 0\n") and hasil.endswith("baris_1999 = 1999")
+    assert "baris dipotong karena file terlalu panjang" in hasil
+
+
+def test_pecah_kode_tidak_kehilangan_baris():
+    kode = "\n".join(f"baris_{i} = {i}" for i in range(2000))
+    potongan = pecah_kode(kode, 300)
+    assert len(potongan) > 1
+    assert all(estimasi_token(p) <= 300 for p in potongan)
+    assert "\n".join(potongan) == kode
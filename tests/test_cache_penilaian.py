@@ -0,0 +1,80 @@
+import io
+import zipfile
+
+from benchmark_penilaian import KlienGroqPalsu
+from cache_penilaian import CachePenilaian, buat_kunci_cache
+from penilai_otomatis import proses_file_zip_realtime
+
+
+def test_kunci_abaikan_line_ending_dan_spasi_akhir():
+    a = buat_kunci_cache("prompt", "model", 0.1, "print(1)\nprint(2)\n")
+    b = buat_kunci_cache("prompt", "model", 0.1, "\r\nprint(1)   \r\nprint(2)")
+    assert a == b
+
+
+def test_kunci_berbeda_untuk_setiap_bagian():
+    dasar = buat_kunci_cache("prompt", "model", 0.1, "x = 1")
+    assert dasar != buat_kunci_cache("prompt lain", "model", 0.1, "x = 1")
+    assert dasar != buat_kunci_cache("prompt", "model lain", 0.1, "x = 1")
+    assert dasar != buat_kunci_cache("prompt", "model", 0.2, "x = 1")
+    assert dasar != buat_kunci_cache("prompt", "model", 0.1, "x = 2")
+    assert dasar != buat_kunci_cache("prompt", "model", 0.1, "x = 1", {'strategi_file_besar': "ringkas"})
+
+
+def test_urutan_pengaturan_tidak_berpengaruh():
+    assert buat_kunci_cache("p", "m", 0.1, "k", {'a': 1, 'b': 2}) == buat_kunci_cache("p", "m", 0.1, "k", {'b': 2, 'a': 1})
+
+
+def test_simpan_dan_ambil(tmp_path):
+    cache = CachePenilaian(str(tmp_path / "cache.sqlite3"))
+    assert cache.ambil("kunci") is None
+    cache.simpan("kunci", {'nilai': 80, 'feedback': "Bagus"})
+    assert cache.ambil("kunci") == {'nilai': 80, 'feedback': "Bagus"}
+
+
+def _zip() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for i in range(3):
+            zf.writestr(f"mhs{i}/main.py", f"print({i})\n")
+    return buffer.getvalue()
+
+
+def _jalankan(klien, cache, **kwargs):
+    event = proses_file_zip_realtime(klien, _zip(), "Cetak angka", "", cache=cache, **kwargs)
+    return [e['data'] for e in event if e['type'] == 'result']
+
+
+def test_run_ulang_memakai_cache(tmp_path):
+    cache = CachePenilaian(str(tmp_path / "cache.sqlite3"))
+    klien = KlienGroqPalsu(latensi="tetap:0")
+
+    pertama = _jalankan(klien, cache)
+    assert klien.jumlah_panggilan == 3
+
+    kedua = _jalankan(klien, cache)
+    assert klien.jumlah_panggilan == 3
+    assert sorted(h['nilai'] for h in kedua) == sorted(h['nilai'] for h in pertama)
+
+
+def test_setelan_file_besar_berbeda_tidak_memakai_cache(tmp_path):
+    cache = CachePenilaian(str(tmp_path / "cache.sqlite3"))
+    klien = KlienGroqPalsu(latensi="tetap:0")
+    _jalankan(klien, cache)
+    assert klien.jumlah_panggilan == 3
+
+    _jalankan(klien, cache, strategi_file_besar="ringkas")
+    assert klien.jumlah_panggilan == 6
+    _jalankan(klien, cache, strategi_file_besar="ringkas")
+    assert klien.jumlah_panggilan == 6
+
+
+def test_mode_saringan_berbeda_tidak_memakai_cache(tmp_path):
+    # Mode "diagnostik" menambahkan hasil saringan ke prompt, jadi hasilnya tidak boleh tertukar
+    cache = CachePenilaian(str(tmp_path / "cache.sqlite3"))
+    klien = KlienGroqPalsu(latensi="tetap:0")
+    _jalankan(klien, cache, saringan_awal="nonaktif")
+    assert klien.jumlah_panggilan == 3
+
+    _jalankan(klien, cache, saringan_awal="diagnostik")
+    assert klien.jumlah_panggilan == 6
@@ -0,0 +1,62 @@
+from deteksi_duplikat import estimasi_jaccard, kelompokkan_duplikat, minhash, sidik_jari, token_ternormalisasi
+
+KODE = '''def luas(p, l):
+    # menghitung luas
+    return p * l
+
+for i in range(10):
+    print(luas(i, 2))
+'''
+
+
+def _sidik(kode, nama="a.py", **kwargs):
+    return sidik_jari(token_ternormalisasi(kode, nama, **kwargs))
+
+
+def test_python_abaikan_komentar_spasi_dan_line_ending():
+    lain = KODE.replace("# menghitung luas", "# hitung").replace("\n", "\r\n").replace("p * l", "p*l")
+    assert _sidik(lain) == _sidik(KODE)
+    assert _sidik(KODE.replace("range(10)", "range(11)")) != _sidik(KODE)
+
+
+def test_ganti_identifier_hanya_jika_diminta():
+    ganti_nama = KODE.replace("luas", "area").replace("p,", "x,").replace("p *", "x *")
+    assert _sidik(ganti_nama) != _sidik(KODE)
+    assert _sidik(ganti_nama, ganti_identifier=True) == _sidik(KODE, ganti_identifier=True)
+    # Builtin dan kata kunci tetap dipertahankan
+    assert "print" in token_ternormalisasi(KODE, "a.py", ganti_identifier=True)
+
+
+def test_bahasa_lain_abaikan_komentar_c():
+    a = 'int main() {\n  // komentar\n  printf("%d", 1); /* blok */\n  return 0;\n}\n'
+    b = 'int main(){ printf("%d", 1);\nreturn 0; }'
+    assert _sidik(a, "a.c") == _sidik(b, "b.c")
+
+
+def test_python_rusak_tetap_bisa_diproses():
+    assert token_ternormalisasi("def f(:\n  'tidak ditutup", "rusak.py")
+
+
+def test_minhash_jaccard():
+    tokens = token_ternormalisasi(KODE, "a.py", ganti_identifier=True)
+    assert estimasi_jaccard(minhash(tokens), minhash(tokens)) == 1.0
+    lain = token_ternormalisasi("import os\nprint(os.getcwd())\n", "b.py", ganti_identifier=True)
+    assert estimasi_jaccard(minhash(tokens), minhash(lain)) < 0.5
+
+
+def test_kelompok_identik_dan_mirip():
+    panjang = KODE + "".join(f"print(luas({i}, {i + 1}))\n" for i in range(30))
+    hasil = kelompokkan_duplikat([
+        ("a.py", panjang),
+        ("b.py", panjang.replace("# menghitung luas", "# salinan")),
+        ("c.py", panjang.replace("luas", "area") + "print('selesai')\n"),
+        ("d.py", "import os\nprint(os.getcwd())\n"),
+    ])
+    assert hasil.wakil == {"a.py": "a.py", "b.py": "a.py", "c.py": "c.py", "d.py": "d.py"}
+    assert hasil.anggota["a.py"] == ["a.py", "b.py"]
+    # Kemiripan ditemukan lewat LSH dan disebarkan ke semua anggota kelompok identik
+    assert hasil.mirip["c.py"] == ["a.py", "b.py"]
+    assert hasil.mirip["b.py"] == ["c.py"]
+    assert "d.py" not in hasil.mirip
+    assert hasil.keterangan("b.py") == "Identik dengan: a.py; Mirip dengan: c.py"
+    assert hasil.keterangan("d.py") == ""
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+
+import pytest
+
+from ekspor_hasil import FORMAT_EKSPOR, NAMA_SHEET, PenulisCSVBerjalan, ekspor_bytes, parquet_tersedia
+
+HASIL = [
+    {"nama_file": "nim1/main.py", "nilai": 90, "kesalahan": "", "feedback": "Bagus", "keyakinan": 0.9},
+    {"nama_file": "nim2/main.py", "nilai": 40, "kesalahan": "Salah rumus", "feedback": "Perbaiki",
+     "detail": {"baris": [3, 4]}, "jumlah_token": None},
+]
+
+
+def _baca(isi, format):
+    """Membaca kembali hasil ekspor sebagai daftar dict berisi string."""
+    if format == "csv":
+        return list(csv.DictReader(io.StringIO(isi.decode("utf-8"))))
+    if format == "jsonl":
+        return [json.loads(b) for b in isi.decode("utf-8").splitlines()]
+    if format == "xlsx":
+        from openpyxl import load_workbook
+        sheet = load_workbook(io.BytesIO(isi))[NAMA_SHEET]
+        kolom, *baris = sheet.iter_rows(values_only=True)
+        return [dict(zip(kolom, b)) for b in baris]
+    import pyarrow.parquet as pq
+    return pq.read_table(io.BytesIO(isi)).to_pylist()
+
+
+@pytest.mark.parametrize("format", sorted(FORMAT_EKSPOR))
+def test_ekspor_bytes_setiap_format(format):
+    if format == "parquet" and not parquet_tersedia():
+        pytest.skip("pyarrow tidak terpasang")
+    baris = _baca(ekspor_bytes(HASIL, format), format)
+
+    assert [b["nama_file"] for b in baris] == ["nim1/main.py", "nim2/main.py"]
+    assert str(baris[1]["nilai"]) == "40"
+    assert baris[0]["feedback"] == "Bagus"
+    if format == "jsonl":
+        assert baris[1]["detail"] == {"baris": [3, 4]}
+    else:
+        # Format tabular: kolom tambahan ikut diekspor, dict/list sebagai JSON
+        assert json.loads(baris[1]["detail"]) == {"baris": [3, 4]}
+        assert not baris[0]["detail"]
+
+
+def test_ekspor_bytes_format_tidak_dikenal():
+    with pytest.raises(ValueError):
+        ekspor_bytes(HASIL, "ods")
+
+
+def test_penulis_csv_berjalan(tmp_path):
+    path = str(tmp_path / "sub" / "hasil.csv")
+    with PenulisCSVBerjalan(path, ["keyakinan", "nilai"]) as penulis:
+        penulis.tulis(HASIL[1], 1)
+        # Baris sudah ada di disk sebelum file ditutup
+        with open(path, encoding="utf-8") as f:
+            assert len(f.read().splitlines()) == 2
+        penulis.tulis(HASIL[0], 0)
+    assert penulis.jumlah == 2
+
+    with open(path, encoding="utf-8", newline="") as f:
+        pembaca = csv.DictReader(f)
+        baris = list(pembaca)
+    assert pembaca.fieldnames == ["index", "nama_file", "nilai", "kesalahan", "feedback", "keyakinan"]
+    assert [(b["index"], b["nama_file"]) for b in baris] == [("1", "nim2/main.py"), ("0", "nim1/main.py")]
+    assert baris[1]["keyakinan"] == "0.9" and baris[0]["keyakinan"] == ""
@@ -0,0 +1,132 @@
+import types
+
+import groq
+import httpx
+import pytest
+
+from benchmark_penilaian import KlienGroqPalsu
+from klien_groq import KumpulanKlien, parse_daftar_kunci
+
+MODEL = "llama-3.3-70b-versatile"
+MESSAGES = [{"role": "user", "content": "Nama File: a.py"}]
+
+
+def _error(kelas, status, headers=None):
+    request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+    return kelas("error (palsu)", response=httpx.Response(status, headers=headers, request=request), body=None)
+
+
+class KlienGagal(KlienGroqPalsu):
+    """Melempar `error` pada setiap request; None berarti menjawab normal."""
+
+    def __init__(self, error=None):
+        super().__init__(latensi="tetap:0")
+        self.error = error
+
+    def _create(self, model, messages, **kwargs):
+        if self.error is not None:
+            with self._lock:
+                self.jumlah_panggilan += 1
+            raise self.error
+        return super()._create(model, messages, **kwargs)
+
+
+class KlienBerheader(KlienGroqPalsu):
+    """Mendukung with_raw_response dan mengirim header sisa kuota token."""
+
+    def __init__(self, sisa_token):
+        super().__init__(latensi="tetap:0")
+        self.sisa_token = sisa_token
+        self.chat.completions.with_raw_response = types.SimpleNamespace(create=self._create_raw)
+
+    def _create_raw(self, model, messages, **kwargs):
+        hasil = self._create(model, messages, **kwargs)
+        headers = httpx.Headers({
+            "x-ratelimit-limit-tokens": "60000",
+            "x-ratelimit-remaining-tokens": str(self.sisa_token),
+            "x-ratelimit-remaining-requests": "100",
+        })
+        return types.SimpleNamespace(headers=headers, parse=lambda: hasil)
+
+
+def _kumpulan(*klien):
+    kumpulan = KumpulanKlien([(f"gsk_kunci_palsu_nomor_{i}", None) for i in range(len(klien))])
+    for anggota, k in zip(kumpulan.anggota, klien):
+        anggota.klien = k
+    return kumpulan
+
+
+def _panggil(kumpulan):
+    return kumpulan.chat.completions.create(model=MODEL, messages=MESSAGES)
+
+
+def test_parse_daftar_kunci():
+    assert parse_daftar_kunci("k1, k2\nk3@https://proxy.local k1") == [
+        ("k1", None), ("k2", None), ("k3", "https://proxy.local")
+    ]
+    assert parse_daftar_kunci("") == []
+
+
+def test_key_ditolak_dinonaktifkan_dan_request_pindah_ke_key_lain():
+    salah, benar = KlienGagal(_error(groq.AuthenticationError, 401)), KlienGagal()
+    kumpulan = _kumpulan(salah, benar)
+
+    for _ in range(3):
+        assert _panggil(kumpulan).choices[0].message.content
+    assert salah.jumlah_panggilan == 1 and benar.jumlah_panggilan == 3
+    status = [s["status"] for s in kumpulan.statistik()]
+    assert status == ["nonaktif: ditolak server (401)", "aktif"]
+
+
+def test_key_kena_429_diistirahatkan():
+    penuh, cadangan = KlienGagal(_error(groq.RateLimitError, 429, {"retry-after": "30"})), KlienGagal()
+    kumpulan = _kumpulan(penuh, cadangan)
+
+    for _ in range(3):
+        _panggil(kumpulan)
+    assert penuh.jumlah_panggilan == 1 and cadangan.jumlah_panggilan == 3
+    assert kumpulan.statistik()[0]["status"].startswith("istirahat")
+    assert kumpulan.statistik()[0]["gagal"] == 1
+
+
+def test_error_diteruskan_jika_semua_key_gagal():
+    kumpulan = _kumpulan(
+        KlienGagal(_error(groq.RateLimitError, 429, {"retry-after": "30"})),
+        KlienGagal(_error(groq.AuthenticationError, 401)),
+    )
+    # 429 lebih diutamakan agar PenjadwalAPI menunggu, bukan menghentikan run
+    with pytest.raises(groq.RateLimitError):
+        _panggil(kumpulan)
+
+    kumpulan = _kumpulan(KlienGagal(_error(groq.AuthenticationError, 401)), KlienGagal(_error(groq.PermissionDeniedError, 403)))
+    with pytest.raises((groq.AuthenticationError, groq.PermissionDeniedError)):
+        _panggil(kumpulan)
+    with pytest.raises(ValueError):
+        _panggil(kumpulan)
+
+
+def test_error_server_tidak_dipindah_ke_key_lain():
+    rusak, cadangan = KlienGagal(_error(groq.InternalServerError, 503)), KlienGagal()
+    kumpulan = _kumpulan(rusak, cadangan)
+    # Retry 5xx ditangani PenjadwalAPI
+    with pytest.raises(groq.InternalServerError):
+        _panggil(kumpulan)
+    assert cadangan.jumlah_panggilan == 0
+
+
+def test_request_dikirim_ke_key_dengan_sisa_kuota_terbesar():
+    hemat, longgar = KlienBerheader(sisa_token=1000), KlienBerheader(sisa_token=50000)
+    kumpulan = _kumpulan(hemat, longgar)
+    mentah = kumpulan.chat.completions.with_raw_response
+
+    # Sebelum header pertama diterima kedua key dianggap sama; setelahnya key longgar dipilih
+    mentah.create(model=MODEL, messages=MESSAGES)
+    mentah.create(model=MODEL, messages=MESSAGES)
+    assert (hemat.jumlah_panggilan, longgar.jumlah_panggilan) == (1, 1)
+    for _ in range(4):
+        respons = mentah.create(model=MODEL, messages=MESSAGES)
+    assert (hemat.jumlah_panggilan, longgar.jumlah_panggilan) == (1, 5)
+    # Header yang diteruskan ke penjadwal berisi kuota gabungan
+    assert int(respons.headers["x-ratelimit-remaining-tokens"]) >= 51000
+    assert respons.headers["x-ratelimit-limit-tokens"] == "120000"
+    assert respons.parse().choices[0].message.content
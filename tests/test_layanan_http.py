@@ -0,0 +1,141 @@
+import io
+import json
+import threading
+import time
+import zipfile
+
+import pytest
+from starlette.testclient import TestClient
+
+import layanan_http
+from benchmark_penilaian import KlienGroqPalsu
+from layanan_http import buat_aplikasi
+from manajer_job import STATUS_AKTIF, STATUS_DIBATALKAN, STATUS_SELESAI, ManajerJob
+
+TOKEN = "rahasia"
+HEADER = {"Authorization": f"Bearer {TOKEN}"}
+
+
+class KlienTertahan(KlienGroqPalsu):
+    """Request menunggu sampai `lepas` di-set, agar job bisa diperiksa saat masih berjalan."""
+
+    def __init__(self):
+        super().__init__(latensi="tetap:0")
+        self.lepas = threading.Event()
+
+    def _create(self, model, messages, **kwargs):
+        self.lepas.wait(30)
+        return super()._create(model, messages, **kwargs)
+
+
+def _zip() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for nim in ("nim1", "nim2", "nim3"):
+            zf.writestr(f"{nim}/main.py", f"print('{nim}')\n")
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def layanan(tmp_path, monkeypatch):
+    monkeypatch.setattr(layanan_http, "INTERVAL_EVENT", 0.01)
+    klien = KlienTertahan()
+    manajer = ManajerJob(klien, folder=str(tmp_path / "job"))
+    with TestClient(buat_aplikasi(manajer, TOKEN)) as client:
+        yield client, klien
+    klien.lepas.set()
+
+
+def _kirim_job(client, **form):
+    data = {"soal_text": "Cetak NIM", "saringan_awal": "nonaktif", "max_workers": "1", **form}
+    return client.post("/jobs", headers=HEADER, data=data, files={"arsip": ("kelas.zip", _zip(), "application/zip")})
+
+
+def _tunggu_selesai(client, id):
+    batas = time.time() + 30
+    while client.get(f"/jobs/{id}", headers=HEADER).json()["status"] in STATUS_AKTIF:
+        assert time.time() < batas, "job tidak selesai"
+        time.sleep(0.02)
+
+
+def test_token_wajib(layanan):
+    client, _ = layanan
+    assert client.get("/jobs").status_code == 401
+    assert client.get("/jobs", headers={"Authorization": "Bearer salah"}).status_code == 401
+    assert client.get("/jobs", headers=HEADER).json() == []
+
+
+def test_job_dan_riwayat_tidak_ditemukan(layanan):
+    client, _ = layanan
+    for metode, path in (("GET", "/jobs/tidakada"), ("DELETE", "/jobs/tidakada"), ("GET", "/jobs/tidakada/hasil"),
+                         ("GET", "/jobs/tidakada/events"), ("GET", "/riwayat")):
+        respons = client.request(metode, path, headers=HEADER)
+        assert respons.status_code == 404, path
+        assert "error" in respons.json()
+
+
+def test_input_tidak_valid(layanan):
+    client, _ = layanan
+    assert client.post("/jobs", headers=HEADER, data={"soal_text": "x"}).status_code == 400
+    assert _kirim_job(client, soal_text="").status_code == 400
+    assert _kirim_job(client, saringan_awal="tebak").status_code == 400
+    assert _kirim_job(client, max_workers="banyak").status_code == 400
+
+
+def test_hasil_job_berjalan_409_lalu_tersedia(layanan):
+    client, klien = layanan
+    respons = _kirim_job(client)
+    assert respons.status_code == 202
+    id = respons.json()["id"]
+
+    assert client.get(f"/jobs/{id}/hasil", headers=HEADER).status_code == 409
+    klien.lepas.set()
+    _tunggu_selesai(client, id)
+
+    hasil = client.get(f"/jobs/{id}/hasil", headers=HEADER).json()
+    assert hasil["status"] == STATUS_SELESAI
+    assert sorted(h["nama_file"] for h in hasil["hasil"]) == ["nim1/main.py", "nim2/main.py", "nim3/main.py"]
+    csv = client.get(f"/jobs/{id}/hasil?format=csv", headers=HEADER)
+    assert csv.headers["content-type"].startswith("text/csv")
+    assert csv.headers["content-disposition"] == f'attachment; filename="hasil_{id}.csv"'
+    assert client.get(f"/jobs/{id}/hasil?format=doc", headers=HEADER).status_code == 400
+    # Job yang sudah selesai tidak bisa dibatalkan
+    assert client.delete(f"/jobs/{id}", headers=HEADER).status_code == 409
+
+
+def test_batalkan_job(layanan):
+    client, klien = layanan
+    id = _kirim_job(client).json()["id"]
+    assert client.delete(f"/jobs/{id}", headers=HEADER).json() == {"id": id, "dibatalkan": True}
+    klien.lepas.set()
+    _tunggu_selesai(client, id)
+    assert client.get(f"/jobs/{id}", headers=HEADER).json()["status"] == STATUS_DIBATALKAN
+
+
+def _baca_sse(teks):
+    event = []
+    for blok in teks.split("\n\n"):
+        baris = dict(b.split(": ", 1) for b in blok.splitlines() if b and not b.startswith(":"))
+        if baris:
+            event.append((baris["event"], json.loads(baris["data"])))
+    return event
+
+
+def test_event_sse_diakhiri_selesai(layanan):
+    client, klien = layanan
+    id = _kirim_job(client).json()["id"]
+    klien.lepas.set()
+
+    with client.stream("GET", f"/jobs/{id}/events", headers=HEADER) as respons:
+        assert respons.headers["content-type"].startswith("text/event-stream")
+        event = _baca_sse(respons.read().decode("utf-8"))
+
+    jenis = [j for j, _ in event]
+    assert jenis[-1] == "selesai" and jenis.count("selesai") == 1
+    assert event[-1][1]["status"] == STATUS_SELESAI
+    assert sorted(data["index"] for j, data in event if j == "result") == [1, 2, 3]
+    assert "progress" in jenis
+
+    # Klien yang tersambung ulang setelah job selesai menerima semua hasil lagi
+    ulang = _baca_sse(client.get(f"/jobs/{id}/events", headers=HEADER).text)
+    assert [j for j, _ in ulang].count("result") == 3 and ulang[-1][0] == "selesai"
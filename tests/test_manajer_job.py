@@ -0,0 +1,87 @@
+import io
+import json
+import os
+import time
+import zipfile
+
+from benchmark_penilaian import KlienGroqPalsu
+from manajer_job import STATUS_BERJALAN, STATUS_SELESAI, Job, ManajerJob
+
+
+def _event_hasil(index, nilai):
+    return {'type': 'result', 'index': index, 'data': {'nama_file': f"f{index}.py", 'nilai': nilai}}
+
+
+def test_snapshot_hasil_sejak_hanya_hasil_baru():
+    job = Job("j1", "tugas.zip", {}, dibuat=0.0)
+    job.terapkan(_event_hasil(2, 80))
+    job.terapkan(_event_hasil(0, 60))
+
+    penuh = job.snapshot()
+    assert [h['nilai'] for h in penuh['hasil']] == [60, 80]
+    assert penuh['jumlah_hasil'] == 2
+
+    job.terapkan(_event_hasil(1, 70))
+    baru = job.snapshot(hasil_sejak=2)
+    assert baru['hasil'] == [(1, {'nama_file': "f1.py", 'nilai': 70})]
+    assert baru['jumlah_hasil'] == 3
+    assert job.snapshot(hasil_sejak=3)['hasil'] == []
+
+
+class KlienNamaDasar(KlienGroqPalsu):
+    """Menjawab dengan nama file tanpa folder ("main.py" untuk "nim1/main.py"), seperti sebagian model."""
+
+    def _create(self, model, messages, **kwargs):
+        respons = super()._create(model, messages, **kwargs)
+        pesan = respons.choices[0].message
+        data = json.loads(pesan.content)
+        data["nama_file"] = os.path.basename(data["nama_file"])
+        pesan.content = json.dumps(data)
+        return respons
+
+
+def _zip() -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for nim in ("nim1", "nim2", "nim3"):
+            zf.writestr(f"{nim}/main.py", f"print('{nim}')\n")
+    return buffer.getvalue()
+
+
+def _tunggu_selesai(manajer, id):
+    batas = time.time() + 30
+    while manajer.ambil(id).aktif:
+        assert time.time() < batas, "job tidak selesai"
+        time.sleep(0.02)
+    return manajer.ambil(id)
+
+
+def test_job_terputus_dilanjutkan_tanpa_menilai_ulang(tmp_path):
+    folder = str(tmp_path / "job")
+    manajer = ManajerJob(KlienNamaDasar(latensi="tetap:0"), folder=folder)
+    id = manajer.buat_job(_zip(), "kelas.zip", "Cetak NIM", "", nama_tugas="tugas1")
+    assert len(_tunggu_selesai(manajer, id).hasil) == 3
+
+    # Tiru server yang berhenti setelah dua file: status masih berjalan, arsip masih ada
+    folder_job = os.path.join(folder, id)
+    with open(os.path.join(folder_job, "arsip.zip"), "wb") as f:
+        f.write(_zip())
+    path_hasil = os.path.join(folder_job, "hasil.jsonl")
+    with open(path_hasil, encoding="utf-8") as f:
+        baris = f.readlines()
+    with open(path_hasil, "w", encoding="utf-8") as f:
+        f.writelines(baris[:2])
+    path_status = os.path.join(folder_job, "status.json")
+    with open(path_status, encoding="utf-8") as f:
+        status = json.load(f)
+    status.update(status=STATUS_BERJALAN, selesai=None)
+    with open(path_status, "w", encoding="utf-8") as f:
+        json.dump(status, f)
+
+    klien = KlienNamaDasar(latensi="tetap:0")
+    job = _tunggu_selesai(ManajerJob(klien, folder=folder), id)
+    assert job.status == STATUS_SELESAI
+    assert klien.jumlah_panggilan == 1
+    assert sorted(h['nama_file'] for h in job.hasil.values()) == ["nim1/main.py", "nim2/main.py", "nim3/main.py"]
+    with open(path_hasil, encoding="utf-8") as f:
+        assert len(f.readlines()) == 3
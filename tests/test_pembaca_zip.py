@@ -0,0 +1,86 @@
+import io
+import zipfile
+
+from pembaca_zip import (BATAS_RASIO_KOMPRESI, BATAS_UKURAN_PER_FILE, adalah_biner, daftar_file_kode, daftar_submission,
+                         decode_teks)
+
+
+def test_kode_diawali_bm_atau_mz_bukan_biner():
+    assert not adalah_biner(b"BMI = 70 / (1.7**2)\nprint(BMI)\n", "BMI.py")
+    assert not adalah_biner(b"MZ_LIMIT = 10\n", "konstanta.py")
+
+
+def test_ekstensi_biner():
+    assert adalah_biner(b"print('x')", "modul.pyc")
+    assert adalah_biner(b"", "gambar.PNG")
+
+
+def test_magic_bytes_dan_nul():
+    assert adalah_biner(b"\x89PNG\r\n\x1a\n", "tanpa_ekstensi")
+    assert adalah_biner(b"PK\x03\x04", "arsip.py")
+    assert adalah_biner(b"BM\x36\x00\x00\x00", "gambar_salah_nama.py")
+    assert adalah_biner(b"MZ\x90\x00\x03\x00", "program")
+
+
+def test_utf16_ber_bom_tetap_teks():
+    data = "print('halo')".encode("utf-16")
+    assert not adalah_biner(data, "main.py")
+    assert decode_teks(data) == "print('halo')"
+
+
+def test_decode_utf8_bom_dan_latin1():
+    assert decode_teks("x = 'é'".encode("utf-8-sig")) == "x = 'é'"
+    assert decode_teks(b"x = '\xe9'") == "x = 'é'"
+
+
+def test_daftar_file_kode_melewati_biner():
+    b = io.BytesIO()
+    with zipfile.ZipFile(b, "w") as z:
+        z.writestr("tugas/BMI.py", "BMI = 70 / (1.7**2)\n")
+        z.writestr("tugas/logo.png", b"\x89PNG\r\n\x1a\n")
+        z.writestr("tugas/data.bin", b"abc\x00def")
+        z.writestr("__MACOSX/tugas/._BMI.py", "x")
+    with zipfile.ZipFile(b) as z:
+        assert daftar_file_kode(z) == ["tugas/BMI.py"]
+
+
+def _zip_kelas() -> bytes:
+    dalam = io.BytesIO()
+    with zipfile.ZipFile(dalam, "w") as z:
+        z.writestr("main.py", "from lib.helper import f\nprint(f())\n")
+        z.writestr("lib/helper.py", "def f():\n    return 3\n")
+    b = io.BytesIO()
+    with zipfile.ZipFile(b, "w") as z:
+        z.writestr("Kelas/nim1/main.py", "from util import g\nprint(g())\n")
+        z.writestr("Kelas/nim1/util.py", "def g():\n    return 1\n")
+        z.writestr("Kelas/nim2/main.py", "print(2)\n")
+        z.writestr("Kelas/nim3.zip", dalam.getvalue())
+        z.writestr("Kelas/nim4/foto.png", b"\x89PNG\r\n\x1a\n")
+        z.writestr("Kelas/nim5.py", "print(5)\n")
+    return b.getvalue()
+
+
+def test_daftar_submission_per_mahasiswa():
+    with zipfile.ZipFile(io.BytesIO(_zip_kelas())) as z:
+        submission = daftar_submission(z)
+    # Folder pembungkus bersama diabaikan; mahasiswa tanpa file kode tidak disertakan
+    assert submission == [
+        ("nim1", None, ["Kelas/nim1/main.py", "Kelas/nim1/util.py"]),
+        ("nim2", None, ["Kelas/nim2/main.py"]),
+        ("nim3", "Kelas/nim3.zip", ["main.py", "lib/helper.py"]),
+        ("nim5.py", None, ["Kelas/nim5.py"]),
+    ]
+
+
+def test_rasio_kompresi_dicek_untuk_file_di_bawah_batas_ukuran():
+    b = io.BytesIO()
+    with zipfile.ZipFile(b, "w", zipfile.ZIP_DEFLATED) as z:
+        # Sekitar 900 KB yang terkompresi menjadi ~1 KB: di bawah batas 1 MB, tetapi rasionya tidak wajar
+        z.writestr("tugas/bom.py", "a" * (900 * 1024))
+        z.writestr("tugas/main.py", "".join(f"print('baris {i}', {i} * {i})\n" for i in range(2000)))
+        z.writestr("tugas/kosong.py", "")
+    with zipfile.ZipFile(b) as z:
+        info = z.getinfo("tugas/bom.py")
+        assert info.file_size < BATAS_UKURAN_PER_FILE
+        assert info.file_size / info.compress_size > BATAS_RASIO_KOMPRESI
+        assert daftar_file_kode(z) == ["tugas/main.py", "tugas/kosong.py"]
@@ -0,0 +1,77 @@
+import pytest
+
+from pengurai_json import ParserJSONBertahap, perbaiki_json, urai_hasil, urai_hasil_batch, validasi_hasil
+
+HASIL = '{"nama_file": "a.py", "nilai": 85, "kesalahan": "", "feedback": "Bagus"}'
+
+
+def test_objek_di_dalam_prosa_dan_blok_kode():
+    teks = f"Berikut hasilnya:\n```json\n{HASIL}\n```\nSemoga membantu."
+    assert urai_hasil(teks)['nilai'] == 85
+
+
+def test_koma_hilang_koma_berlebih_dan_literal_python():
+    teks = '{"nama_file": "a.py" "nilai": 70, "kesalahan": None, "feedback": "ok",}'
+    hasil = urai_hasil(teks)
+    assert hasil['nilai'] == 70
+    assert hasil['kesalahan'] == ""
+
+
+def test_tanda_kutip_miring():
+    assert urai_hasil(HASIL.replace('"Bagus"', '“Bagus”'))['feedback'] == "Bagus"
+
+
+def test_output_terpotong_ditutup():
+    teks = '{"nama_file": "a.py", "nilai": 60, "kesalahan": "", "feedback": "Kode belum menangani'
+    hasil = urai_hasil(teks)
+    assert hasil['nilai'] == 60
+    assert hasil['feedback'] == "Kode belum menangani"
+
+
+def test_newline_mentah_di_dalam_string():
+    teks = '{"nama_file": "a.py", "nilai": 90, "kesalahan": "", "feedback": "baris 1\nbaris 2"}'
+    assert urai_hasil(teks)['feedback'] == "baris 1\nbaris 2"
+
+
+def test_nama_file_diisi_dan_nilai_dinormalisasi():
+    hasil = urai_hasil('{"nilai": "85/100", "kesalahan": ["a", "b"], "feedback": null}', nama_file="b.py")
+    assert hasil == {'nama_file': "b.py", 'nilai': 85, 'kesalahan': "a; b", 'feedback': ""}
+    assert validasi_hasil({'nama_file': "c.py", 'nilai': 150.4, 'kesalahan': "", 'feedback': ""})['nilai'] == 100
+
+
+def test_tidak_ada_objek_valid():
+    with pytest.raises(ValueError):
+        urai_hasil("Maaf, saya tidak bisa menilai kode ini.")
+    with pytest.raises(ValueError):
+        urai_hasil('{"nama_file": "a.py", "nilai": true, "kesalahan": "", "feedback": ""}')
+
+
+def test_batch_dalam_objek_pembungkus_dan_elemen_rusak():
+    teks = (
+        '{"hasil": [' + HASIL + ', {"nama_file": "b.py", "nilai": "x"},'
+        ' {"nama_file": "c.py", "nilai": 40, "kesalahan": "Syntax", "feedback": "Perbaiki"}]}'
+    )
+    assert [h['nama_file'] for h in urai_hasil_batch(teks)] == ["a.py", "c.py"]
+
+
+def test_parser_bertahap_mengeluarkan_objek_begitu_lengkap():
+    kedua = HASIL.replace("a.py", "b.py")
+    parser = ParserJSONBertahap()
+    assert parser.tambah("[" + HASIL[:30]) == []
+    assert [h['nama_file'] for h in parser.tambah(HASIL[30:] + ", " + kedua[:20])] == ["a.py"]
+    assert [h['nama_file'] for h in parser.tambah(kedua[20:] + "]")] == ["b.py"]
+    assert parser.akhiri() == []
+
+
+def test_parsial_selama_streaming():
+    parser = ParserJSONBertahap()
+    parser.tambah('{"nama_file": "a.py", "nilai": 8')
+    # Angka yang mungkin masih terpotong tidak ditampilkan
+    assert parser.parsial() is None
+    parser.tambah('5, "feedback": "Sudah ben')
+    assert parser.parsial() == {'nama_file': "a.py", 'nilai': 85, 'feedback': "Sudah ben"}
+
+
+def test_perbaiki_json_menutup_kurung_bersarang():
+    assert perbaiki_json('{"a": [1, 2') == '{"a": [1, 2]}'
+    assert perbaiki_json('{"a": ') == '{"a":  null}'
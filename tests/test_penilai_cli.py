@@ -0,0 +1,88 @@
+import csv
+import io
+import json
+import os
+import zipfile
+
+from benchmark_penilaian import KlienGroqPalsu
+from penilai_cli import Checkpoint, _nilai_arsip, buat_parser
+from penjadwal_api import PenjadwalAPI
+
+
+class KlienNamaDasar(KlienGroqPalsu):
+    """Menjawab dengan nama file tanpa folder ("main.py" untuk "nim1/main.py"), seperti sebagian model."""
+
+    def _create(self, model, messages, **kwargs):
+        respons = super()._create(model, messages, **kwargs)
+        pesan = respons.choices[0].message
+        data = json.loads(pesan.content)
+        data["nama_file"] = os.path.basename(data["nama_file"])
+        pesan.content = json.dumps(data)
+        return respons
+
+
+def _buat_zip(path):
+    with zipfile.ZipFile(path, "w") as zf:
+        for nim in ("nim1", "nim2", "nim3"):
+            zf.writestr(f"{nim}/main.py", f"print('{nim}')\n")
+
+
+def _nilai(path_zip, output, klien):
+    args = buat_parser().parse_args([
+        os.path.dirname(path_zip), "--soal", "soal.txt", "--output", output, "--konkurensi", "1",
+        "--saringan-awal", "nonaktif", "--tanpa-cache",
+    ])
+    args.nama_tugas = "tugas1"
+    checkpoint = Checkpoint(os.path.join(output, "checkpoint.jsonl"))
+    try:
+        return _nilai_arsip(path_zip, args, klien, "Cetak NIM", "", checkpoint, PenjadwalAPI(), None, None)
+    finally:
+        checkpoint.tutup()
+
+
+def test_lanjut_dari_checkpoint_walau_model_mengubah_nama_file(tmp_path):
+    path_zip = str(tmp_path / "kelas.zip")
+    _buat_zip(path_zip)
+    output = str(tmp_path / "hasil")
+    os.makedirs(output)
+
+    klien = KlienNamaDasar(latensi="tetap:0")
+    ringkasan, _, _ = _nilai(path_zip, output, klien)
+    assert ringkasan["jumlah"] == 3 and klien.jumlah_panggilan == 3
+
+    # Proses terhenti setelah dua file: baris hasil ketiga dan penanda selesai belum tertulis
+    path_checkpoint = os.path.join(output, "checkpoint.jsonl")
+    with open(path_checkpoint, encoding="utf-8") as f:
+        baris = [b for b in f if '"selesai"' not in b]
+    with open(path_checkpoint, "w", encoding="utf-8") as f:
+        f.writelines(baris[:2])
+
+    klien_lanjut = KlienNamaDasar(latensi="tetap:0")
+    ringkasan, _, _ = _nilai(path_zip, output, klien_lanjut)
+    assert klien_lanjut.jumlah_panggilan == 1
+    assert ringkasan["jumlah"] == 3
+    checkpoint = Checkpoint(path_checkpoint)
+    checkpoint.tutup()
+    assert checkpoint.sudah_dinilai("kelas.zip") == {"nim1/main.py", "nim2/main.py", "nim3/main.py"}
+
+
+def test_csv_ditulis_per_hasil_dan_dilanjutkan(tmp_path):
+    path_zip = str(tmp_path / "kelas.zip")
+    _buat_zip(path_zip)
+    output = str(tmp_path / "hasil")
+    os.makedirs(output)
+    _nilai(path_zip, output, KlienGroqPalsu(latensi="tetap:0"))
+
+    path_checkpoint = os.path.join(output, "checkpoint.jsonl")
+    with open(path_checkpoint, encoding="utf-8") as f:
+        baris = [b for b in f if '"selesai"' not in b]
+    with open(path_checkpoint, "w", encoding="utf-8") as f:
+        f.writelines(baris[:2])
+    _nilai(path_zip, output, KlienGroqPalsu(latensi="tetap:0"))
+
+    # Hasil dari checkpoint ditulis ulang lebih dulu, lalu hasil baru; tidak ada baris ganda
+    with open(os.path.join(output, "kelas.csv"), encoding="utf-8", newline="") as f:
+        isi = list(csv.DictReader(f))
+    assert sorted(b["nama_file"] for b in isi) == ["nim1/main.py", "nim2/main.py", "nim3/main.py"]
+    assert sorted(int(b["index"]) for b in isi) == [1, 2, 3]
+    assert all(b["nilai"] for b in isi)
@@ -0,0 +1,460 @@
+import io
+import json
+import types
+import zipfile
+
+import groq
+import httpx
+import pytest
+
+from anggaran_token import MARGIN_TOKEN, anggaran_kode, estimasi_token
+from benchmark_penilaian import KlienGroqPalsu
+from metrik_penilaian import metrik_kosong
+import penilai_otomatis
+from penilai_otomatis import (MAX_POTONGAN_RINGKASAN, PROMPT_RINGKAS, _panggil_api_stream, _saring_duplikat,
+                               _sebarkan_hasil, alasan_eskalasi, buat_prompt_penilaian, dapatkan_penilaian,
+                               eskalasi_jika_perlu, kemas_batch, proses_file_zip_realtime)
+from penjadwal_api import ErrorAPISementara, PenjadwalAPI
+
+MODEL = "llama-3.3-70b-versatile"
+
+
+class KlienKunciSalah(KlienGroqPalsu):
+    """Setiap request ditolak dengan 401, seperti API key yang salah."""
+
+    def _create(self, model, messages, **kwargs):
+        with self._lock:
+            self.jumlah_panggilan += 1
+        request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+        raise groq.AuthenticationError(
+            "Invalid API Key (palsu)", response=httpx.Response(401, request=request), body=None
+        )
+
+
+def _penjadwal(max_konkurensi: int = 4) -> PenjadwalAPI:
+    """Penjadwal tanpa batas RPM/TPM yang berarti: yang diuji pipeline-nya, bukan kuota."""
+    return PenjadwalAPI(max_konkurensi=max_konkurensi, batas_model={MODEL: (10 ** 9, 10 ** 12)})
+
+
+def _zip(jumlah: int) -> bytes:
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        for i in range(jumlah):
+            zf.writestr(f"mhs{i}/main.py", f"print({i})\n")
+    return buffer.getvalue()
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_api_key_salah_menghentikan_run(max_workers):
+    klien = KlienKunciSalah(latensi="tetap:0")
+    event = list(proses_file_zip_realtime(klien, _zip(20), "Cetak angka", "", max_workers=max_workers))
+
+    assert not [e for e in event if e['type'] == 'result']
+    assert [e for e in event if e['type'] == 'error']
+    # Kelompok yang belum mulai dibatalkan, tidak semua file dikirim
+    assert klien.jumlah_panggilan < 20
+
+
+class KlienPencatatKonkurensi(KlienGroqPalsu):
+    """Mencatat jumlah request yang berjalan bersamaan paling banyak."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.berjalan = 0
+        self.berjalan_maks = 0
+
+    def _create(self, model, messages, **kwargs):
+        with self._lock:
+            self.berjalan += 1
+            self.berjalan_maks = max(self.berjalan_maks, self.berjalan)
+        try:
+            return super()._create(model, messages, **kwargs)
+        finally:
+            with self._lock:
+                self.berjalan -= 1
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_setiap_file_satu_hasil_dan_progress_berurutan(max_workers):
+    klien = KlienPencatatKonkurensi(latensi="uniform:0.01,0.05", seed=3)
+    event = list(proses_file_zip_realtime(
+        klien, _zip(12), "Cetak angka", "", max_workers=max_workers, penjadwal=_penjadwal(max_workers)
+    ))
+
+    hasil = [e for e in event if e['type'] == 'result']
+    assert sorted(e['index'] for e in hasil) == list(range(1, 13))
+    for e in hasil:
+        assert e['data']['nama_file'] == f"mhs{e['index'] - 1}/main.py"
+
+    progress = [e for e in event if e['type'] == 'progress']
+    assert [e['current'] for e in progress] == list(range(1, 13))
+    assert {e['total'] for e in progress} == {12}
+    # Setiap hasil didahului progress untuk file yang sama
+    for sebelum, e in zip(event, event[1:]):
+        if e['type'] == 'result':
+            assert sebelum['type'] == 'progress' and sebelum['file_name'] == e['data']['nama_file']
+    if max_workers == 1:
+        assert [e['index'] for e in hasil] == list(range(1, 13))
+        assert klien.berjalan_maks == 1
+    else:
+        assert 1 < klien.berjalan_maks <= max_workers
+
+
+def test_kemas_batch_mengikuti_anggaran_token_dan_urutan():
+    tugas = [(i, f"f{i}.py", "x" * 400) for i in range(1, 8)]  # sekitar 100 token per file
+    batch = list(kemas_batch(tugas, token_per_batch=250))
+    assert [[i for i, _, _ in b] for b in batch] == [[1, 2], [3, 4], [5, 6], [7]]
+
+    # Anggaran 0 berarti satu file per request; jumlah file per batch juga dibatasi
+    assert all(len(b) == 1 for b in kemas_batch(tugas, token_per_batch=0))
+    assert [len(b) for b in kemas_batch(tugas, token_per_batch=10 ** 6, max_file=3)] == [3, 3, 1]
+
+
+def test_kemas_batch_file_besar_dan_gagal_baca_menjadi_batch_sendiri():
+    tugas = [(1, "a.py", "x" * 40), (2, "besar.py", "x" * 4000), (3, "rusak.py", None), (4, "b.py", "x" * 40)]
+    batch = list(kemas_batch(tugas, token_per_batch=100))
+    assert [[nama for _, nama, _ in b] for b in batch] == [["a.py"], ["besar.py"], ["rusak.py", "b.py"]]
+
+
+def test_sebarkan_hasil_ke_salinan_identik():
+    tugas = [(1, "a/main.py", "print(1)\n"), (2, "b/main.py", "print(1)  # salinan\n"), (3, "c/main.py", "x = 2\n")]
+    unik, salinan, duplikat = _saring_duplikat(tugas)
+    assert [nama for _, nama, _ in unik] == ["a/main.py", "c/main.py"]
+
+    hasil = {"nama_file": "a/main.py", "nilai": 85, "feedback": "Bagus", "latensi_api": 1.5, "token_prompt": 300}
+    disebar = list(_sebarkan_hasil(1, "a/main.py", hasil, salinan, duplikat))
+    assert [(j, nama) for j, nama, _ in disebar] == [(1, "a/main.py"), (2, "b/main.py")]
+    wakil, salinan_b = disebar[0][2], disebar[1][2]
+    assert wakil["duplikat"] == "Identik dengan: b/main.py"
+    assert salinan_b["nama_file"] == "b/main.py" and salinan_b["nilai"] == 85
+    assert salinan_b["duplikat"] == "Identik dengan: a/main.py"
+    # Salinan tidak memakai API
+    assert salinan_b["latensi_api"] == 0.0 and salinan_b["token_prompt"] == 0
+    assert wakil["latensi_api"] == 1.5
+
+    assert [nama for _, nama, _ in _sebarkan_hasil(3, "c/main.py", {"nilai": 70}, salinan, None)] == ["c/main.py"]
+
+
+def test_mode_batch_satu_request_untuk_beberapa_file():
+    klien = KlienGroqPalsu(latensi="tetap:0")
+    event = list(proses_file_zip_realtime(
+        klien, _zip(6), "Cetak angka", "", token_per_batch=10000, penjadwal=_penjadwal()
+    ))
+
+    assert klien.jumlah_panggilan == 1
+    [batch] = [e for e in event if e['type'] == 'batch']
+    assert batch['jumlah_file'] == 6 and batch['jumlah_request'] == 1 and batch['jumlah_fallback'] == 0
+    hasil = {e['index']: e['data'] for e in event if e['type'] == 'result'}
+    assert sorted(hasil) == list(range(1, 7))
+    assert all(h['nama_file'] == f"mhs{i - 1}/main.py" and h['kesalahan'] != "GAGAL proses"
+               for i, h in hasil.items())
+
+
+class KlienBatchRusak(KlienGroqPalsu):
+    """Output prompt batch bukan JSON sama sekali; prompt satu file dijawab normal."""
+
+    def _create(self, model, messages, **kwargs):
+        respons = super()._create(model, messages, **kwargs)
+        if "=== Nama File:" in messages[-1]["content"]:
+            respons.choices[0].message.content = "Maaf, saya tidak bisa menilai banyak file sekaligus."
+        return respons
+
+
+def test_mode_batch_rusak_dinilai_ulang_per_file():
+    klien = KlienBatchRusak(latensi="tetap:0")
+    event = list(proses_file_zip_realtime(
+        klien, _zip(3), "Cetak angka", "", token_per_batch=10000, penjadwal=_penjadwal()
+    ))
+
+    assert klien.jumlah_panggilan == 1 + 3
+    [batch] = [e for e in event if e['type'] == 'batch']
+    assert batch['jumlah_request'] == 4 and batch['jumlah_fallback'] == 3
+    hasil = [e['data'] for e in event if e['type'] == 'result']
+    assert len(hasil) == 3 and all(h['kesalahan'] != "GAGAL proses" for h in hasil)
+
+
+class KlienPerekam(KlienGroqPalsu):
+    """Menyimpan pesan setiap request; request ringkasan bisa dibuat gagal dengan 503."""
+
+    def __init__(self, *args, ringkasan_gagal=False, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ringkasan_gagal = ringkasan_gagal
+        self.request = []
+
+    def _create(self, model, messages, **kwargs):
+        with self._lock:
+            self.request.append(messages)
+        if self.ringkasan_gagal and messages[0]["content"] == PROMPT_RINGKAS:
+            request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+            raise groq.InternalServerError("Server error (palsu)", response=httpx.Response(503, request=request), body=None)
+        return super()._create(model, messages, **kwargs)
+
+
+MODEL_KECIL = "gemma2-9b-it"
+KODE_BESAR = "\n".join(f"total += data[{i % 7}] * {i}  # langkah {i}" for i in range(3000))
+
+
+def test_file_besar_dipotong_sesuai_anggaran_model():
+    klien = KlienPerekam(latensi="tetap:0")
+    prompt = buat_prompt_penilaian("Hitung total", "")
+    hasil = dapatkan_penilaian(klien, prompt, "besar.py", KODE_BESAR, model=MODEL_KECIL)
+
+    assert hasil["kesalahan"] != "GAGAL proses"
+    [messages] = klien.request
+    isi = messages[-1]["content"]
+    assert "baris dipotong karena file terlalu panjang" in isi
+    assert estimasi_token(isi) <= anggaran_kode(MODEL_KECIL, prompt) + MARGIN_TOKEN
+    # Model berkonteks besar menerima kode utuh
+    klien_besar = KlienPerekam(latensi="tetap:0")
+    dapatkan_penilaian(klien_besar, prompt, "besar.py", KODE_BESAR, model=MODEL)
+    assert "dipotong" not in klien_besar.request[0][-1]["content"]
+
+
+def test_file_besar_diringkas_per_bagian_lalu_dinilai():
+    klien = KlienPerekam(latensi="tetap:0")
+    prompt = buat_prompt_penilaian("Hitung total", "")
+    hasil = dapatkan_penilaian(klien, prompt, "besar.py", KODE_BESAR, model=MODEL_KECIL, strategi_file_besar="ringkas")
+
+    assert hasil["kesalahan"] != "GAGAL proses"
+    ringkasan = [m for m in klien.request if m[0]["content"] == PROMPT_RINGKAS]
+    assert 1 < len(ringkasan) <= MAX_POTONGAN_RINGKASAN
+    assert len(klien.request) == len(ringkasan) + 1
+    isi = klien.request[-1][-1]["content"]
+    assert "Catatan: file ini terlalu panjang" in isi
+    assert f"[Bagian {len(ringkasan)}/{len(ringkasan)}]" in isi
+    # Token request ringkasan ikut tercatat di metrik hasil
+    assert hasil["token_prompt"] > sum(estimasi_token(m["content"]) for m in klien.request[-1])
+
+
+def test_ringkasan_gagal_kembali_ke_pemotongan():
+    klien = KlienPerekam(latensi="tetap:0", ringkasan_gagal=True)
+    prompt = buat_prompt_penilaian("Hitung total", "")
+    hasil = dapatkan_penilaian(klien, prompt, "besar.py", KODE_BESAR, model=MODEL_KECIL, strategi_file_besar="ringkas")
+
+    assert hasil["kesalahan"] != "GAGAL proses"
+    assert "baris dipotong karena file terlalu panjang" in klien.request[-1][-1]["content"]
+
+
+class StreamPalsu:
+    """Stream chunk ala Groq SDK; mencatat berapa chunk dibaca dan apakah stream ditutup."""
+
+    def __init__(self, potongan, usage=None, putus_setelah=None):
+        self.potongan = potongan
+        self.usage = usage
+        self.putus_setelah = putus_setelah
+        self.dibaca = 0
+        self.ditutup = False
+
+    def __iter__(self):
+        for teks in self.potongan:
+            if self.dibaca == self.putus_setelah:
+                raise httpx.ReadError("koneksi terputus")
+            self.dibaca += 1
+            yield types.SimpleNamespace(
+                choices=[types.SimpleNamespace(delta=types.SimpleNamespace(content=teks))], x_groq=None
+            )
+        if self.usage is not None:
+            yield types.SimpleNamespace(choices=[], x_groq=types.SimpleNamespace(usage=self.usage))
+
+    def close(self):
+        self.ditutup = True
+
+
+class KlienStream:
+    def __init__(self, stream):
+        self.stream = stream
+        self.kwargs = None
+        self.chat = types.SimpleNamespace(completions=types.SimpleNamespace(create=self._create))
+
+    def _create(self, model, messages, **kwargs):
+        self.kwargs = kwargs
+        return self.stream
+
+
+POTONGAN_STREAM = [
+    '{"nama_file": "a.py", "nilai": 8', '5, "kesalahan": "-", ', '"feedback": "Kode sudah ',
+    'rapi dan benar."}', '\n\nSemoga membantu!', ' Ada pertanyaan lain?'
+]
+MESSAGES = [{"role": "system", "content": "prompt"}, {"role": "user", "content": "Nama File: a.py"}]
+
+
+def test_stream_mengirim_hasil_sementara_dan_berhenti_saat_json_lengkap(monkeypatch):
+    monkeypatch.setattr(penilai_otomatis, "INTERVAL_PARSIAL", 0)
+    stream = StreamPalsu(POTONGAN_STREAM)
+    klien = KlienStream(stream)
+    parsial = []
+    metrik = metrik_kosong()
+    teks = _panggil_api_stream(klien, None, MODEL, MESSAGES, 0.1, 1024, metrik, "a.py",
+                               lambda nama, data: parsial.append((nama, data)))
+
+    assert klien.kwargs["stream"] is True and "response_format" not in klien.kwargs
+    # Prosa setelah objek lengkap tidak ditunggu
+    assert stream.dibaca == 4 and stream.ditutup
+    assert json.loads(teks)["nilai"] == 85
+    # Nilai yang baru sebagian (8 dari 85) tidak ditampilkan; feedback muncul bertahap
+    assert all(data.get("nilai") != 8 for _, data in parsial)
+    assert ("a.py", {"nama_file": "a.py", "nilai": 85, "kesalahan": "-", "feedback": "Kode sudah "}) in parsial
+    # Tanpa usage dari server, token diperkirakan
+    assert metrik["token_prompt"] > 0 and metrik["token_completion"] == estimasi_token(teks)
+
+
+def test_stream_memakai_usage_dari_server():
+    usage = types.SimpleNamespace(prompt_tokens=120, completion_tokens=30)
+    metrik = metrik_kosong()
+    _panggil_api_stream(KlienStream(StreamPalsu(POTONGAN_STREAM[:2], usage=usage)), None, MODEL, MESSAGES,
+                        0.1, 1024, metrik, "a.py")
+    assert (metrik["token_prompt"], metrik["token_completion"]) == (120, 30)
+
+
+def test_stream_terputus_menjadi_error_sementara():
+    stream = StreamPalsu(POTONGAN_STREAM, putus_setelah=2)
+    with pytest.raises(ErrorAPISementara):
+        _panggil_api_stream(KlienStream(stream), None, MODEL, MESSAGES, 0.1, 1024, metrik_kosong(), "a.py")
+    assert stream.ditutup
+
+
+def test_client_tanpa_streaming_tetap_didukung():
+    # KlienGroqPalsu mengabaikan stream=True dan mengembalikan completion biasa
+    teks = _panggil_api_stream(KlienGroqPalsu(latensi="tetap:0"), None, MODEL, MESSAGES, 0.1, 1024,
+                               metrik_kosong(), "a.py")
+    assert json.loads(teks)["nama_file"] == "a.py"
+
+
+def test_dapatkan_penilaian_streaming():
+    hasil = dapatkan_penilaian(KlienStream(StreamPalsu(POTONGAN_STREAM)), "prompt", "a.py", "print(1)",
+                               model=MODEL, streaming=True)
+    assert hasil["nilai"] == 85 and hasil["feedback"] == "Kode sudah rapi dan benar."
+
+
+def test_per_mahasiswa_satu_request_dan_satu_hasil_per_mahasiswa():
+    dalam = io.BytesIO()
+    with zipfile.ZipFile(dalam, "w") as zf:
+        zf.writestr("main.py", "print(3)\n")
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as zf:
+        zf.writestr("Kelas/nim1/main.py", "from util import g\nprint(g())\n")
+        zf.writestr("Kelas/nim1/util.py", "def g():\n    return 1\n")
+        zf.writestr("Kelas/nim2/main.py", "print(2)\n")
+        zf.writestr("Kelas/nim3.zip", dalam.getvalue())
+    klien = KlienPerekam(latensi="tetap:0")
+    event = list(proses_file_zip_realtime(
+        klien, buffer.getvalue(), "Cetak angka", "", per_mahasiswa=True, penjadwal=_penjadwal()
+    ))
+
+    hasil = {e['data']['nama_file']: e['data'] for e in event if e['type'] == 'result'}
+    assert list(hasil) == ["nim1", "nim2", "nim3"]
+    assert hasil["nim1"]["daftar_file"] == "main.py, util.py"
+    assert hasil["nim3"]["daftar_file"] == "main.py"
+    assert [e['total'] for e in event if e['type'] == 'progress'] == [3, 3, 3]
+
+    # Semua file satu mahasiswa dikirim bersama dalam satu request
+    assert len(klien.request) == 3
+    isi_nim1 = klien.request[0][-1]["content"]
+    assert "Nama File: nim1" in isi_nim1
+    assert "### File: main.py\nfrom util import g" in isi_nim1 and "### File: util.py\ndef g()" in isi_nim1
+    assert "Mode Per Mahasiswa" in klien.request[0][0]["content"]
+
+
+def test_per_mahasiswa_dilanjutkan_per_mahasiswa():
+    klien = KlienGroqPalsu(latensi="tetap:0")
+    event = list(proses_file_zip_realtime(
+        klien, _zip(4), "Cetak angka", "", per_mahasiswa=True, lewati_file={"mhs0", "mhs2"},
+        penjadwal=_penjadwal()
+    ))
+    assert klien.jumlah_panggilan == 2
+    assert sorted(e['data']['nama_file'] for e in event if e['type'] == 'result') == ["mhs1", "mhs3"]
+
+
+@pytest.mark.parametrize("hasil, alasan", [
+    ({"nilai": 0, "kesalahan": "GAGAL proses"}, "gagal"),
+    ({"nilai": 50, "keyakinan": 95}, "nilai_ragu"),
+    ({"nilai": 75, "keyakinan": 95}, "nilai_ragu"),
+    ({"nilai": 49, "keyakinan": 95}, None),
+    ({"nilai": 76, "keyakinan": 95}, None),
+    ({"nilai": 90, "keyakinan": 69}, "keyakinan"),
+    ({"nilai": 90, "keyakinan": 70}, None),
+    ({"nilai": 90, "keyakinan": "tinggi"}, "keyakinan"),
+    # Model yang tidak melaporkan keyakinan dianggap yakin
+    ({"nilai": 90}, None),
+])
+def test_alasan_eskalasi(hasil, alasan):
+    assert alasan_eskalasi(hasil) == alasan
+
+
+def test_alasan_eskalasi_ambang_sendiri():
+    assert alasan_eskalasi({"nilai": 80, "keyakinan": 95}, rentang_nilai_ragu=(60, 85)) == "nilai_ragu"
+    assert alasan_eskalasi({"nilai": 60, "keyakinan": 50}, rentang_nilai_ragu=(0, -1), batas_keyakinan=40) is None
+
+
+class KlienKaskade(KlienGroqPalsu):
+    """Model kecil menjawab sesuai `jawaban_kecil[nama_file]`; model lain selalu memberi nilai 80."""
+
+    def __init__(self, jawaban_kecil, **kwargs):
+        super().__init__(**kwargs)
+        self.jawaban_kecil = jawaban_kecil
+        self.model_dipanggil = []
+
+    def _create(self, model, messages, **kwargs):
+        respons = super()._create(model, messages, **kwargs)
+        pesan = respons.choices[0].message
+        batch = pesan.content.startswith("```json")
+        daftar = json.loads(pesan.content.strip("`").removeprefix("json")) if batch else [json.loads(pesan.content)]
+        for data in daftar:
+            with self._lock:
+                self.model_dipanggil.append((model, data["nama_file"]))
+            data.update(self.jawaban_kecil[data["nama_file"]] if model == MODEL_KECIL else {"nilai": 80})
+        pesan.content = json.dumps({"hasil": daftar} if batch else daftar[0])
+        return respons
+
+
+def test_eskalasi_jika_perlu_menjumlahkan_metrik():
+    klien = KlienKaskade({}, latensi="tetap:0")
+    yakin = {"nama_file": "a.py", "nilai": 95, "keyakinan": 90, "kesalahan": "-", "feedback": "-",
+             **metrik_kosong(), "token_prompt": 100}
+    hasil = eskalasi_jika_perlu(klien, "prompt", "a.py", "print(1)", dict(yakin), MODEL_KECIL, MODEL)
+    assert klien.jumlah_panggilan == 0
+    assert (hasil["model_penilai"], hasil["eskalasi"], hasil["nilai"]) == (MODEL_KECIL, "", 95)
+
+    ragu = dict(yakin, nilai=60)
+    hasil = eskalasi_jika_perlu(klien, "prompt", "a.py", "print(1)", ragu, MODEL_KECIL, MODEL)
+    assert klien.model_dipanggil == [(MODEL, "a.py")]
+    assert (hasil["model_penilai"], hasil["eskalasi"], hasil["nilai"]) == (MODEL, "nilai_ragu", 80)
+    # Biaya model kecil tetap tercatat
+    assert hasil["token_prompt"] > 100
+
+
+@pytest.mark.parametrize("token_per_batch", [0, 10000])
+def test_kaskade_hanya_mengeskalasi_hasil_meragukan(token_per_batch):
+    klien = KlienKaskade({
+        "mhs0/main.py": {"nilai": 60, "keyakinan": 95},
+        "mhs1/main.py": {"nilai": 90, "keyakinan": 95},
+        "mhs2/main.py": {"nilai": 90, "keyakinan": 40},
+        "mhs3/main.py": {"nilai": 20, "keyakinan": 90},
+    }, latensi="tetap:0")
+    penjadwal = PenjadwalAPI(batas_model={MODEL: (10 ** 9, 10 ** 12), MODEL_KECIL: (10 ** 9, 10 ** 12)})
+    event = list(proses_file_zip_realtime(
+        klien, _zip(4), "Cetak angka", "", model=MODEL_KECIL, model_eskalasi=MODEL,
+        token_per_batch=token_per_batch, penjadwal=penjadwal
+    ))
+
+    hasil = {e['data']['nama_file']: e['data'] for e in event if e['type'] == 'result'}
+    ringkas = {nama: (h["model_penilai"], h["eskalasi"], h["nilai"]) for nama, h in hasil.items()}
+    assert ringkas == {
+        "mhs0/main.py": (MODEL, "nilai_ragu", 80),
+        "mhs1/main.py": (MODEL_KECIL, "", 90),
+        "mhs2/main.py": (MODEL, "keyakinan", 80),
+        "mhs3/main.py": (MODEL_KECIL, "", 20),
+    }
+    assert sorted(nama for model, nama in klien.model_dipanggil if model == MODEL) == ["mhs0/main.py", "mhs2/main.py"]
+    if token_per_batch:
+        # Model kecil menilai keempat file dalam satu request batch
+        assert [e['jumlah_fallback'] for e in event if e['type'] == 'batch'] == [0]
+        assert klien.jumlah_panggilan == 1 + 2
+
+
+def test_output_rusak_klien_palsu_diminta_ulang():
+    # Output rusak dari klien benchmark tidak bisa diperbaiki lokal, jadi jalur request ulang teruji
+    klien = KlienGroqPalsu(latensi="tetap:0", p_json_rusak=1.0)
+    hasil = dapatkan_penilaian(klien, "prompt", "a.py", "print(1)", model=MODEL)
+    assert klien.jumlah_panggilan == klien.jumlah_json_rusak == 3
+    assert hasil["kesalahan"] == "GAGAL proses" and hasil["jumlah_retry"] == 2
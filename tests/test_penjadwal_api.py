@@ -0,0 +1,122 @@
+import time
+
+import groq
+import httpx
+import pytest
+
+from benchmark_penilaian import KlienGroqPalsu
+from penjadwal_api import (BatasKonkurensiAIMD, EmberToken, ErrorAPISementara, PenjadwalAPI, parse_durasi,
+                           parse_retry_after)
+
+PESAN = [{"role": "user", "content": "Nama File: a.py\n\nKode Program:\nprint(1)"}]
+
+
+class KlienSekali429(KlienGroqPalsu):
+    """Request pertama mendapat 429 (dengan retry-after), request berikutnya sukses."""
+
+    def _create(self, model, messages, **kwargs):
+        try:
+            return super()._create(model, messages, **kwargs)
+        finally:
+            self.p_429 = 0.0
+
+
+def test_parse_durasi():
+    assert parse_durasi("7.66s") == pytest.approx(7.66)
+    assert parse_durasi("2m59.56s") == pytest.approx(179.56)
+    assert parse_durasi("1h2m") == 3720
+    assert parse_durasi("150ms") == pytest.approx(0.15)
+    assert parse_durasi("12") == 12
+    assert parse_durasi("") is None
+    assert parse_durasi("besok") is None
+
+
+def test_parse_retry_after():
+    assert parse_retry_after({"retry-after-ms": "1500", "retry-after": "9"}) == 1.5
+    assert parse_retry_after({"retry-after": "3"}) == 3
+    tanggal = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 30))
+    assert 25 < parse_retry_after({"retry-after": tanggal}) <= 30
+    assert parse_retry_after({}) is None
+    assert parse_retry_after(None) is None
+
+
+def test_ember_token_menunggu_isi_ulang():
+    # 6000 token per menit = 100 token per detik
+    ember = EmberToken(6000)
+    ember.ambil(6000)
+    mulai = time.monotonic()
+    ember.ambil(10)
+    assert time.monotonic() - mulai >= 0.05
+
+
+def test_ember_token_permintaan_besar_dan_tahan():
+    ember = EmberToken(60)
+    # Lebih besar dari kapasitas: tetap dilayani saat ember penuh
+    ember.ambil(1000)
+    ember = EmberToken(6000)
+    ember.tahan(0.2)
+    mulai = time.monotonic()
+    ember.ambil(1)
+    assert time.monotonic() - mulai >= 0.2
+
+
+def test_ember_token_sinkron_dengan_sisa_server():
+    ember = EmberToken(6000)
+    ember.sinkronkan(sisa=0, kapasitas=12000)
+    assert ember.kapasitas == 12000
+    mulai = time.monotonic()
+    ember.ambil(20)
+    assert time.monotonic() - mulai >= 0.05
+
+
+def test_aimd_turun_setengah_lalu_naik_perlahan():
+    batas = BatasKonkurensiAIMD(8)
+    batas.throttled()
+    assert batas.batas == 4
+    # 429 dari request yang berjalan bersamaan hanya menurunkan batas sekali
+    batas.throttled()
+    assert batas.batas == 4
+    batas.sukses()
+    assert batas.batas == pytest.approx(4.25)
+    for _ in range(100):
+        batas.sukses()
+    assert batas.batas == 8
+
+
+def test_429_menghormati_retry_after_dan_menurunkan_konkurensi():
+    klien = KlienSekali429(latensi="tetap:0", p_429=1.0, retry_after=0.3)
+    penjadwal = PenjadwalAPI(max_konkurensi=4)
+    info = {}
+    mulai = time.monotonic()
+    hasil = penjadwal.jalankan(klien, "model-uji", estimasi_token=10, info=info, messages=PESAN)
+
+    assert '"nama_file": "a.py"' in hasil.choices[0].message.content
+    assert time.monotonic() - mulai >= 0.3
+    assert klien.jumlah_panggilan == 2
+    assert info == {'retry': 1}
+    assert penjadwal.statistik()['throttled'] == 1
+    # 4 -> 2 karena 429, lalu +1/2 setelah sukses
+    assert penjadwal.konkurensi.batas == pytest.approx(2.5)
+
+
+def test_error_yang_tidak_bisa_diulang_langsung_diteruskan():
+    class KlienRequestSalah(KlienGroqPalsu):
+        def _create(self, model, messages, **kwargs):
+            with self._lock:
+                self.jumlah_panggilan += 1
+            request = httpx.Request("POST", "https://api.groq.com/openai/v1/chat/completions")
+            raise groq.BadRequestError("Bad request (palsu)", response=httpx.Response(400, request=request), body=None)
+
+    klien = KlienRequestSalah(latensi="tetap:0")
+    with pytest.raises(groq.BadRequestError):
+        PenjadwalAPI().jalankan(klien, "model-uji", messages=PESAN)
+    assert klien.jumlah_panggilan == 1
+
+
+def test_percobaan_habis():
+    klien = KlienGroqPalsu(latensi="tetap:0", p_5xx=1.0)
+    penjadwal = PenjadwalAPI(max_percobaan=2)
+    with pytest.raises(ErrorAPISementara):
+        penjadwal.jalankan(klien, "model-uji", messages=PESAN)
+    assert klien.jumlah_panggilan == 2
+    assert penjadwal.jumlah_retry == 1
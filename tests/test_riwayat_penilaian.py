@@ -0,0 +1,109 @@
+import sqlite3
+
+import pytest
+
+from riwayat_penilaian import RiwayatPenilaian, peta_mahasiswa
+
+
+@pytest.fixture
+def riwayat(tmp_path):
+    return RiwayatPenilaian(str(tmp_path / "riwayat.sqlite3"))
+
+
+def _catat(riwayat, id_run, mahasiswa, nilai, model="m-besar", waktu=0.0, nama_file="main.py", **kwargs):
+    hasil = {'nama_file': f"{mahasiswa}/{nama_file}", 'nilai': nilai, 'token_prompt': 100, 'token_completion': 20}
+    hasil.update(kwargs.pop('hasil', {}))
+    riwayat.catat(id_run, "tugas1", mahasiswa, model, "hash", hasil, waktu=waktu, **kwargs)
+
+
+def test_agregat_per_model_dan_total(riwayat):
+    _catat(riwayat, "r1", "a", 80, model="m1")
+    _catat(riwayat, "r1", "b", 60, model="m1")
+    _catat(riwayat, "r1", "c", 0, model="m2", hasil={'kesalahan': "GAGAL proses"})
+
+    per_model = {baris['model']: baris for baris in riwayat.agregat("model")}
+    assert per_model['m1']['jumlah'] == 2
+    assert per_model['m1']['rata_rata'] == 70
+    assert per_model['m1']['simpangan_baku'] == pytest.approx(10)
+    assert per_model['m1']['token_prompt'] == 200
+    # Hasil gagal dihitung, tetapi tidak masuk statistik nilai
+    assert per_model['m2']['gagal'] == 1
+    assert per_model['m2']['rata_rata'] is None
+
+    (total,) = riwayat.agregat(None)
+    assert total['jumlah'] == 3 and total['jumlah_mahasiswa'] == 3
+    assert total['min'] == 60 and total['maks'] == 80
+
+
+def test_agregat_kelompok_tidak_dikenal(riwayat):
+    with pytest.raises(ValueError):
+        riwayat.agregat("nama_file")
+
+
+def test_hanya_terakhir_per_mahasiswa(riwayat):
+    _catat(riwayat, "r1", "a", 50, waktu=1.0)
+    _catat(riwayat, "r2", "a", 90, waktu=2.0)
+    (total,) = riwayat.agregat(None, hanya_terakhir=True)
+    assert total['jumlah'] == 1 and total['rata_rata'] == 90
+
+
+def test_hanya_terakhir_menyimpan_semua_file_mahasiswa(riwayat):
+    for mahasiswa in ("nim1", "nim2"):
+        _catat(riwayat, "r1", mahasiswa, 60, nama_file="main.py", waktu=1.0)
+        _catat(riwayat, "r1", mahasiswa, 80, nama_file="utils.py", waktu=1.0)
+    # Run berikutnya hanya menilai ulang satu file nim1
+    _catat(riwayat, "r2", "nim1", 90, nama_file="utils.py", waktu=2.0)
+
+    (total,) = riwayat.agregat(None, hanya_terakhir=True)
+    assert total['jumlah'] == 4
+    assert total['rata_rata'] == pytest.approx((60 + 90 + 60 + 80) / 4)
+    assert len(riwayat.cari(hanya_terakhir=True)) == 4
+    assert len(riwayat.nilai_mahasiswa("nim1")) == 2
+
+
+def test_hanya_terakhir_kaskade_tidak_dihitung_dua_kali(riwayat):
+    # Run pertama: nilai mahasiswa a cukup yakin dari model kecil; run kedua dieskalasi ke model besar
+    _catat(riwayat, "r1", "a", 60, model="m-kecil", model_run="m-kecil>m-besar", waktu=1.0)
+    _catat(riwayat, "r2", "a", 75, model="m-besar", model_run="m-kecil>m-besar", waktu=2.0)
+    _catat(riwayat, "r2", "b", 85, model="m-kecil", model_run="m-kecil>m-besar", waktu=2.0)
+
+    (total,) = riwayat.agregat(None, hanya_terakhir=True)
+    assert total['jumlah'] == 2
+    assert total['rata_rata'] == 80
+    assert {(r['mahasiswa'], r['nilai']) for r in riwayat.nilai_mahasiswa()} == {("a", 75), ("b", 85)}
+
+
+def test_riwayat_lama_tanpa_model_run(tmp_path):
+    path = str(tmp_path / "lama.sqlite3")
+    conn = sqlite3.connect(path)
+    conn.execute(
+        """
+        CREATE TABLE hasil (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, waktu REAL NOT NULL, id_run TEXT NOT NULL,
+            tugas TEXT NOT NULL, mahasiswa TEXT NOT NULL, nama_file TEXT NOT NULL, model TEXT NOT NULL,
+            hash_prompt TEXT NOT NULL, nilai REAL, gagal INTEGER NOT NULL DEFAULT 0,
+            token_prompt INTEGER NOT NULL DEFAULT 0, token_completion INTEGER NOT NULL DEFAULT 0,
+            latensi_api REAL NOT NULL DEFAULT 0, jumlah_retry INTEGER NOT NULL DEFAULT 0, hasil TEXT NOT NULL
+        )
+        """
+    )
+    conn.execute(
+        "INSERT INTO hasil (waktu, id_run, tugas, mahasiswa, nama_file, model, hash_prompt, nilai, hasil) "
+        "VALUES (1, 'r0', 'tugas1', 'a', 'a/main.py', 'm1', 'hash', 70, '{}')"
+    )
+    conn.commit()
+    conn.close()
+
+    riwayat = RiwayatPenilaian(path)
+    _catat(riwayat, "r1", "a", 90, model="m1", waktu=2.0)
+    (total,) = riwayat.agregat(None, hanya_terakhir=True)
+    assert total['jumlah'] == 1 and total['rata_rata'] == 90
+
+
+def test_peta_mahasiswa_folder_dan_nama_file():
+    assert peta_mahasiswa(["Tugas1/nim1.py", "Tugas1/nim2.py"]) == {
+        "Tugas1/nim1.py": "nim1", "Tugas1/nim2.py": "nim2"
+    }
+    assert peta_mahasiswa(["nim1/main.py", "nim1/util.py", "nim3/main.py"]) == {
+        "nim1/main.py": "nim1", "nim1/util.py": "nim1", "nim3/main.py": "nim3"
+    }
@@ -0,0 +1,87 @@
+from saringan_awal import bahasa_asing, periksa_file, saring
+
+PHP_DENGAN_HTML = """<!DOCTYPE html>
+<html>
+<body>
+<div class="hasil">
+<?php
+$nama = "Budi";
+echo "Halo " . $nama;
+?>
+</div>
+</body>
+</html>
+"""
+
+HTML_DENGAN_SCRIPT = """<!DOCTYPE html>
+<html>
+<body>
+<div id="out"></div>
+<script>
+const angka = 5;
+function faktorial(n) { return n <= 1 ? 1 : n * faktorial(n - 1); }
+console.log(faktorial(angka));
+</script>
+</body>
+</html>
+"""
+
+JAVA = """import java.util.Scanner;
+public class Main {
+    public static void main(String[] args) {
+        Scanner sc = new Scanner(System.in);
+        System.out.println(sc.nextInt() * 2);
+    }
+}
+"""
+
+
+def test_php_berisi_html_tidak_ditolak():
+    assert periksa_file("index.php", PHP_DENGAN_HTML)[0] is None
+
+
+def test_html_dengan_script_tidak_ditolak():
+    assert periksa_file("tugas.html", HTML_DENGAN_SCRIPT)[0] is None
+
+
+def test_js_berisi_html_tidak_ditolak():
+    kode = "const el = '<div>';\nconsole.log(el);\n// <!DOCTYPE html> <html>\n"
+    assert periksa_file("app.js", kode)[0] is None
+
+
+def test_bahasa_lain_tanpa_ciri_bahasa_ekstensi_ditolak():
+    kategori, catatan = periksa_file("tugas.php", JAVA)
+    assert kategori == "bahasa"
+    assert "Java" in catatan[0]
+
+
+def test_campuran_dengan_satu_ciri_bahasa_sendiri_tidak_ditolak():
+    # Ada $var = (ciri PHP) walaupun ciri Java lebih banyak
+    assert bahasa_asing(JAVA + "\n$x = 1;\n", "PHP") is None
+
+
+def test_java_di_file_python_ditolak():
+    tanpa_import = JAVA.split("\n", 1)[1]
+    assert periksa_file("main.py", tanpa_import)[0] == "bahasa"
+    # Baris import cocok dengan ciri Python, jadi tidak dianggap bahasa lain, tetapi tetap gagal kompilasi
+    assert periksa_file("main.py", JAVA)[0] == "sintaks"
+
+
+def test_python_valid_lolos():
+    assert periksa_file("main.py", "def f(x):\n    return x * 2\n\nprint(f(input()))\n")[0] is None
+
+
+def test_python_sintaks_salah():
+    assert periksa_file("main.py", "def f(:\n    return 1\n")[0] == "sintaks"
+
+
+def test_kosong_dan_trivial():
+    assert periksa_file("main.py", "  \n\n")[0] == "kosong"
+    assert periksa_file("main.c", "// TODO\n/* nanti */\n")[0] == "trivial"
+
+
+def test_saring_submission_gabungan_gagal_hanya_jika_semua_gagal():
+    gabungan = "### File: a.py\n\n### File: b.py\nprint('halo')\nx = input()\n"
+    kategori, diagnostik = saring("nim1", gabungan)
+    assert kategori is None
+    assert "a.py" in diagnostik